@@ -0,0 +1,592 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import parameters
+from estimate import instance_parts, part_of
+from parameters import (
+    build_params,
+    default_variant,
+    load_material_options,
+    load_variants,
+    model_name,
+    output_folders,
+    trace_folder,
+)
+from stage_timing import (
+    print_summary,
+    read_traces,
+    stage,
+    start_tracing,
+    stop_tracing,
+    summarize,
+)
+
+# Benchmark and call check of the generation pipeline without Abaqus: the
+# recording stand-in in fake_abaqus/ takes the place of abaqus,
+# abaqusConstants, caeModules, driverUtils, mesh and part, so
+# change_parameters.py runs unchanged in plain Python.
+#
+#   python benchmark.py                   sweep of bench_axes, batch mode
+#   python benchmark.py variants.json     sweep of a variant file
+#   python benchmark.py --check           every modify_* emits the expected
+#                                         calls, every mesh_* meshes as asked
+#
+# The benchmark reports variants per second of the Python side alone and
+# with the simulated CAE costs (fake_mdb.costs, --costs file to override),
+# and the API calls per variant by method: the number to watch when changing
+# how change_parameters.py talks to the model.
+
+fake_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_abaqus")
+config_folder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config")
+
+# Default sweep: materials, reinforcement and two mesh sizes
+bench_axes = {
+    "material_c": ["C30", "C35"],
+    "beta": [1, 2],
+    "alpha": [1.0, 0.8],
+}
+
+# Geometry of the fake base model without config/part_geometry.json
+default_volume = 2.0e7  # mm^3 per volume part
+default_edges = [1000.0] * 4  # mm, edges per beam part
+
+# Calls that change the model; lookups are left out of the call check
+changing_calls = (
+    "setValues",
+    "setValuesInStep",
+    "changeKey",
+    "LinearInstancePattern",
+    "Set",
+)
+
+
+def load_fake():
+    # Import change_parameters.py against the stand-in
+    if fake_folder not in sys.path:
+        sys.path.insert(0, fake_folder)
+    import change_parameters
+    import fake_mdb
+
+    return change_parameters, fake_mdb
+
+
+def model_description(params, geometry_file=None):
+    # Parts and instances of the base model for fake_mdb.configure
+    geometry = {}
+    if geometry_file and os.path.exists(geometry_file):
+        with open(geometry_file, "r") as json_file:
+            geometry = json.load(json_file)
+    parts = {}
+    for teile in params["mesh_part_volume"]:
+        parts[teile["part_name"]] = {
+            "volume": geometry.get(teile["part_name"], {}).get("volume", default_volume)
+        }
+    for teile in params["mesh_part_beam"]:
+        parts[teile["part_name"]] = {
+            "edges": geometry.get(teile["part_name"], {}).get("edges", default_edges)
+        }
+    instances = [(name + "-1", name) for name in parts]
+    known = instance_parts(geometry)
+    for pattern in params["linear_pattern"]:
+        for instance_name in pattern["instanceList"]:
+            part_name = known.get(instance_name) or part_of(instance_name, parts)
+            if part_name and (instance_name, part_name) not in instances:
+                instances.append((instance_name, part_name))
+    return parts, instances
+
+
+def setup(costs_file=None, sleep=False, geometry_file=None):
+    # Material CSV files of the repository, fake base model of the default
+    # variant
+    parameters.csv_concrete = os.path.join(config_folder, "concrete_parameters.csv")
+    parameters.csv_steel = os.path.join(config_folder, "steel_parameters.csv")
+    change_parameters, fake_mdb = load_fake()
+    concrete_options, steel_options = load_material_options()
+    params = build_params(default_variant, concrete_options, steel_options)
+    parts, instances = model_description(params, geometry_file)
+    cost_table = None
+    if costs_file:
+        with open(costs_file, "r") as json_file:
+            cost_table = json.load(json_file)
+    fake_mdb.configure(model_name, parts, instances, cost_table, sleep)
+    return change_parameters, fake_mdb
+
+
+def bench_variants():
+    variants = [{}]
+    for name, values in bench_axes.items():
+        variants = [
+            dict(variant, **{name: value}) for variant in variants for value in values
+        ]
+    return variants
+
+
+def run_benchmark(
+    variants,
+    lean=False,
+    mesh_dir=None,
+    work_dir=None,
+    trace=False,
+    verbose=False,
+    incremental=False,
+    **options
+):
+    change_parameters, fake_mdb = setup(**options)
+
+    work_dir = work_dir or tempfile.mkdtemp(prefix="benchmark-")
+    for folder in output_folders.values():
+        os.makedirs(os.path.join(work_dir, folder), exist_ok=True)
+    manifest_path = os.path.join(work_dir, "manifest.sqlite")
+    if os.path.exists(manifest_path):
+        # Every run generates the whole sweep
+        os.remove(manifest_path)
+
+    cwd = os.getcwd()
+    output = None if verbose else io.StringIO()
+    fake_mdb.reset_log()
+    if trace:
+        start_tracing(os.path.join(work_dir, trace_folder))
+    os.chdir(work_dir)
+    try:
+        with contextlib.redirect_stdout(output or sys.stdout):
+            started = time.perf_counter()
+            change_parameters.run_batch(
+                variants, not lean, manifest_path, mesh_dir, incremental
+            )
+            with stage("move_output_files"):
+                change_parameters.move_output_files()
+            wall = time.perf_counter() - started
+    finally:
+        os.chdir(cwd)
+        stop_tracing()
+
+    simulated = fake_mdb.clock["simulated"]
+    python_seconds = wall - simulated if fake_mdb.clock["sleep"] else wall
+    calls = sum(fake_mdb.log["counts"].values())
+    return {
+        "variants": len(variants),
+        "work_dir": work_dir,
+        "python_seconds": python_seconds,
+        "simulated_seconds": simulated,
+        "variants_per_second": len(variants) / python_seconds,
+        "variants_per_second_simulated": len(variants) / (python_seconds + simulated),
+        "calls_per_variant": float(calls) / len(variants),
+        "calls_by_method": dict(
+            (method, float(count) / len(variants))
+            for method, count in fake_mdb.log["counts"].most_common()
+        ),
+    }
+
+
+def print_benchmark(result):
+    print("%d variants in %s" % (result["variants"], result["work_dir"]))
+    print(
+        "Python side:        %8.3f s  %10.1f variants/s"
+        % (result["python_seconds"], result["variants_per_second"])
+    )
+    print(
+        "With simulated CAE: %8.1f s  %10.3f variants/s"
+        % (
+            result["python_seconds"] + result["simulated_seconds"],
+            result["variants_per_second_simulated"],
+        )
+    )
+    print("API calls per variant: %.1f" % result["calls_per_variant"])
+    for method, count in result["calls_by_method"].items():
+        print("  %-24s %8.1f" % (method, count))
+
+
+def expected_calls(params, model):
+    # Changing calls of every modify_* function for params on the base model
+    m = "models[%s]" % model.name
+    table = lambda curve: tuple(map(tuple, curve.tolist()))
+    concrete = params["material_c"]
+    sas = params["material_sas"]
+    steel = params["material_s"]
+    pretension = params["pretension"]
+    cdp = m + ".materials[concrete].concreteDamagedPlasticity"
+
+    def steel_calls(material, key, section):
+        return [
+            (
+                m + ".materials[%s].elastic" % key,
+                "setValues",
+                {"table": ((material["E"], material["Nu"]),)},
+            ),
+            (
+                m + ".materials[%s].plastic" % key,
+                "setValues",
+                {"scaleStress": None, "table": table(material["Y"])},
+            ),
+            (
+                m + ".materials",
+                "changeKey",
+                {"fromName": key, "toName": material["name"]},
+            ),
+            (
+                m + ".sections[%s]" % section,
+                "setValues",
+                {"material": material["name"], "thickness": None},
+            ),
+        ]
+
+    stress = dict(
+        (name, 0.0)
+        for name in ("sigma11", "sigma22", "sigma33", "sigma12", "sigma13", "sigma23")
+    )
+    assembly = model.rootAssembly
+    embedded = len(dict.__getitem__(assembly.sets, "embedded").edges)
+    pattern_calls = []
+    for pattern in params["linear_pattern"]:
+        pattern_calls.append(
+            (
+                m + ".rootAssembly",
+                "LinearInstancePattern",
+                {
+                    "instanceList": tuple(pattern["instanceList"]),
+                    "direction1": tuple(pattern["direction1"]),
+                    "number1": pattern["number1"],
+                    "number2": 1,
+                    "spacing1": pattern["spacing1"],
+                    "spacing2": 1.0,
+                },
+            )
+        )
+        for name in pattern["instanceList"]:
+            edges = len(dict.__getitem__(assembly.instances, name).part.edges)
+            embedded += (pattern["number1"] - 1) * edges
+    pattern_calls.append(
+        (m + ".rootAssembly", "Set", {"name": "embedded", "edges": embedded})
+    )
+
+    return {
+        "modify_concrete_parameters": [
+            (
+                m + ".materials[concrete].elastic",
+                "setValues",
+                {"table": ((concrete["E"], concrete["Nu"]),)},
+            ),
+            (
+                cdp,
+                "setValues",
+                {
+                    "table": (
+                        (
+                            concrete["Psi"],
+                            concrete["Ecc"],
+                            concrete["fb0/fc0"],
+                            concrete["K"],
+                            concrete["Visc"],
+                        ),
+                    )
+                },
+            ),
+            (
+                cdp + ".concreteCompressionHardening",
+                "setValues",
+                {"table": table(concrete["C"])},
+            ),
+            (
+                cdp + ".concreteTensionStiffening",
+                "setValues",
+                {"table": table(concrete["T"]), "type": "DISPLACEMENT"},
+            ),
+            (
+                cdp + ".concreteCompressionDamage",
+                "setValues",
+                {"table": table(concrete["CD"])},
+            ),
+            (
+                cdp + ".concreteTensionDamage",
+                "setValues",
+                {"table": table(concrete["TD"])},
+            ),
+            (
+                m + ".sections[C]",
+                "setValues",
+                {"material": concrete["name"], "thickness": None},
+            ),
+            (
+                m + ".materials",
+                "changeKey",
+                {"fromName": "concrete", "toName": concrete["name"]},
+            ),
+        ],
+        "modify_sas_parameters": steel_calls(sas, "steel_sas", "sas"),
+        "modify_steel_parameters": steel_calls(steel, "steel", "S"),
+        "modify_pretension": [
+            (
+                m + ".predefinedFields[Predefined Field-sas]",
+                "setValues",
+                dict(stress, region=None, sigma22=pretension["P_sas"]),
+            ),
+            (
+                m + ".predefinedFields[Predefined Field-sas_trans]",
+                "setValues",
+                dict(stress, region=None, sigma11=pretension["P_sas_trans"]),
+            ),
+        ],
+        "modify_reinforcement_radius": [
+            (
+                m + ".profiles[dia%d]" % i,
+                "setValues",
+                {"r": params["reinforcement"]["dia_rf%d" % i]},
+            )
+            for i in range(1, 5)
+        ],
+        "modify_reinforcement_linear_pattern": pattern_calls,
+        "apply_load": [
+            (
+                m + ".boundaryConditions[BC-load]",
+                "setValuesInStep",
+                {"stepName": "Step-2-disp", "u2": params["disp"]},
+            )
+        ],
+    }
+
+
+def model_state(model, options_type):
+    # Everything the steps set on a model, to compare two models
+    options = {}
+
+    def collect(item):
+        values = comparable(("", "", item.values))[2]
+        options[item.path] = (repr(values), repr(item.step_values))
+        for child in vars(item).values():
+            if isinstance(child, options_type):
+                collect(child)
+
+    for repository in (
+        model.materials,
+        model.sections,
+        model.profiles,
+        model.predefinedFields,
+        model.boundaryConditions,
+    ):
+        for item in dict.values(repository):
+            collect(item)
+    assembly = model.rootAssembly
+    return {
+        "materials": sorted(dict.keys(model.materials)),
+        "options": options,
+        "instances": len(assembly.instances),
+        "embedded": len(dict.__getitem__(assembly.sets, "embedded").edges),
+        "meshes": dict(
+            (name, (part.seed, part.element_types, len(part.elements)))
+            for name, part in dict.items(model.parts)
+        ),
+    }
+
+
+def wrong_meshes(model, parts):
+    # Parts of the model not meshed with the size and type params ask for
+    wrong = []
+    for teile in parts:
+        part = dict.__getitem__(model.parts, teile["part_name"])
+        if (
+            part.seed != teile["mesh_size"]
+            or part.element_types is None
+            or part.element_types[0] != teile["mesh_type"]
+            or not len(part.elements)
+        ):
+            wrong.append(teile["part_name"])
+    return wrong
+
+
+def comparable(call):
+    # Regions are objects of the model: compare that one was given
+    path, method, kwargs = call
+    kwargs = dict(kwargs)
+    if "region" in kwargs:
+        kwargs["region"] = None
+    return path, method, kwargs
+
+
+def check_calls(check_variant=None):
+    # Run every modify_* function on a fresh base model and compare its
+    # changing calls, run every mesh_* function and compare the meshes
+    change_parameters, fake_mdb = setup()
+    concrete_options, steel_options = load_material_options()
+    variant = check_variant or {
+        "material_c": "C35",
+        "material_s": "S355",
+        "P_sas": 420.5,
+        "beta": 2,
+        "dia_rf1": 8.0,
+        "alpha": 0.8,
+        "disp": -20.0,
+    }
+    params = build_params(variant, concrete_options, steel_options)
+    arguments = {
+        "modify_concrete_parameters": params["material_c"],
+        "modify_sas_parameters": params["material_sas"],
+        "modify_steel_parameters": params["material_s"],
+        "modify_pretension": params["pretension"],
+        "modify_reinforcement_radius": params["reinforcement"],
+        "modify_reinforcement_linear_pattern": params["linear_pattern"],
+        "apply_load": params["disp"],
+    }
+
+    failures = []
+    for name, argument in arguments.items():
+        change_parameters.open_database()
+        model = dict.__getitem__(fake_mdb.mdb.models, model_name)
+        expected = expected_calls(params, model)[name]
+        context = change_parameters.model_context(model_name)
+        fake_mdb.reset_log()
+        getattr(change_parameters, name)(argument, context)
+        calls = [
+            comparable(call)
+            for call in fake_mdb.log["calls"]
+            if call[1] in changing_calls
+        ]
+        if calls != expected:
+            failures.append(name)
+            print("FAIL", name)
+            for i, (got, want) in enumerate(
+                zip(calls + [None] * len(expected), expected + [None] * len(calls))
+            ):
+                if got != want:
+                    print("  call %d: got  %r\n          want %r" % (i, got, want))
+                    break
+        else:
+            print("ok  ", name, "(%d calls)" % len(calls))
+
+    # Incremental mode: the live model after replaying the changes from one
+    # variant to the next equals the model built for the second one afresh
+    previous = build_params({}, concrete_options, steel_options)
+    states = []
+    for replays in ((previous, params), (params,)):
+        change_parameters.open_database()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for replay in replays:
+                change_parameters.apply_variant(replay, model_name, changes_only=True)
+        model = dict.__getitem__(fake_mdb.mdb.models, model_name)
+        states.append(model_state(model, fake_mdb.Options))
+    if states[0] != states[1]:
+        failures.append("apply_variant")
+        print("FAIL apply_variant, changes only: live model differs from a fresh one")
+    else:
+        print("ok   apply_variant, changes only")
+
+    # Incremental mode after a failed variant: the live model is copied anew
+    # from the meshed base model and must not keep the mesh cache of the old
+    # live model
+    failed = dict(params, linear_pattern=[dict(params["linear_pattern"][0])])
+    failed["linear_pattern"][0]["instanceList"] = ("missing-1",)
+    recovered = build_params(
+        dict(variant, alpha=0.5, P_sas=300.0), concrete_options, steel_options
+    )
+    change_parameters.open_database()
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix="check-"))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            change_parameters.mesh_parts(previous, model_name)
+            change_parameters.generate_incremental(
+                dict(variant, alpha=0.5),
+                build_params(dict(variant, alpha=0.5), concrete_options, steel_options),
+                save_cae=False,
+            )
+            try:
+                change_parameters.generate_incremental(variant, failed, save_cae=False)
+            except KeyError:
+                pass
+            change_parameters.generate_incremental(
+                dict(variant, alpha=0.5, P_sas=300.0), recovered, save_cae=False
+            )
+    finally:
+        os.chdir(cwd)
+    live = dict.__getitem__(fake_mdb.mdb.models, change_parameters.live_model_name)
+    wrong = wrong_meshes(
+        live, recovered["mesh_part_volume"] + recovered["mesh_part_beam"]
+    )
+    if wrong:
+        failures.append("generate_incremental")
+        print(
+            "FAIL generate_incremental after a failure, wrong mesh:", ", ".join(wrong)
+        )
+    else:
+        print("ok   generate_incremental after a failure")
+
+    for name, parts in (
+        ("mesh_volume", params["mesh_part_volume"]),
+        ("mesh_beam", params["mesh_part_beam"]),
+    ):
+        change_parameters.open_database()
+        with contextlib.redirect_stdout(io.StringIO()):
+            getattr(change_parameters, name)(
+                parts, change_parameters.model_context(model_name)
+            )
+        model = dict.__getitem__(fake_mdb.mdb.models, model_name)
+        wrong = wrong_meshes(model, parts)
+        if wrong:
+            failures.append(name)
+            print("FAIL", name, "wrong mesh:", ", ".join(wrong))
+        else:
+            print("ok  ", name, "(%d parts)" % len(parts))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark and call check of change_parameters.py on a fake mdb"
+    )
+    parser.add_argument(
+        "variants", nargs="?", help="variant file (default: bench_axes)"
+    )
+    parser.add_argument("--check", action="store_true", help="run the call check only")
+    parser.add_argument("--costs", help="JSON file of simulated costs per method")
+    parser.add_argument("--geometry", help="part geometry file (estimate.py)")
+    parser.add_argument(
+        "--sleep", action="store_true", help="really spend the simulated time"
+    )
+    parser.add_argument("--lean", action="store_true", help="no .cae per variant")
+    parser.add_argument("--mesh-dir", help="shared mesh include files")
+    parser.add_argument("--work-dir", help="default: a new temporary folder")
+    parser.add_argument("--trace", action="store_true", help="write stage traces")
+    parser.add_argument(
+        "--incremental", action="store_true", help="replay only what changed"
+    )
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    if args.check:
+        failures = check_calls()
+        if failures:
+            raise SystemExit(1)
+        return
+
+    variants = load_variants(args.variants) if args.variants else bench_variants()
+    result = run_benchmark(
+        variants,
+        lean=args.lean,
+        mesh_dir=args.mesh_dir,
+        work_dir=args.work_dir,
+        trace=args.trace,
+        verbose=args.verbose,
+        incremental=args.incremental,
+        costs_file=args.costs,
+        sleep=args.sleep,
+        geometry_file=args.geometry,
+    )
+    print_benchmark(result)
+    if args.trace:
+        print_summary(
+            summarize(read_traces(os.path.join(result["work_dir"], trace_folder)))
+        )
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(result, json_file, indent=1, sort_keys=True)
+        print("Written", args.output)
+
+
+if __name__ == "__main__":
+    main()
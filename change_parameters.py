@@ -1,1078 +1,938 @@
-from abaqus import *
-from abaqusConstants import *
-from caeModules import *
-from driverUtils import *
-from csv import reader
-import os
-import shutil
-from pathlib import Path
-import sys
-
-file_name = "3_ft.cae"
-model_name = "Model-s16-4"
-
-# file_name = "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/ft_wib_shear_MA.cae"
-# model_name = "Model-s16"
-
-# output folders
-output_folders = {".inp": "INP_files", ".cae": "CAE_files", ".jnl": "JNL_files"}
-
-# material selection
-material_c = "C30"  # C30 / C35 / C40 / C45
-material_s = "S235"  # S235 or S355
-material_sas = "SAS_950"  # only option SAS_950
-
-# displacement value
-disp = -30.0
-
-# pretension value
-P_sas = 1.0 * 841.0  # sigma_sas_max = 841 MPa
-P_sas_trans = 1.0 * 841.0  # sigma_sas_trans_max = 841 MPa
-
-
-# mesh size ratio
-alpha = 1.0
-
-# reinforcement ratio for superstructure
-beta = 1
-
-# reinforcement radius selection
-dia_rf1 = 6.0  # default 6.0  (rf_sas,rf_spz_plate)
-dia_rf2 = 7.0  # default 7.0  (rf_sup_trans)
-dia_rf3 = 10.0  # default 10.0 (rf_sub_long,...)
-dia_rf4 = 10.0  # default 10.0 (rf_sup_long)
-
-# mesh types for volume, beam and rigid elements
-mesh_type_volume = C3D8R
-mesh_type_beam = B31
-mesh_type_rigid = R3D3
-
-# activate wanted mesh controls by removing #
-mesh_tech_volume = SWEEP
-mesh_algo_volume = MEDIAL_AXIS
-
-
-# csv paths for material parameters
-csv_concrete = (
-    "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/config/concrete_parameters.csv"
-)
-csv_steel = "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/config/steel_parameters.csv"
-
-
-def load_values_from_csv(file_path):
-    values = {}
-
-    with open(file_path, "r") as csv_file:
-        csv_reader = reader(csv_file, delimiter=";")
-        csv_index = next(csv_reader)
-
-        for row in csv_reader:
-            current_value = {}
-
-            converted_row = []
-            for elem in row:
-                try:
-                    converted_row.append(float(elem))
-                except ValueError:
-                    converted_row.append(elem)
-
-            for i, elem in enumerate(converted_row):
-                key = csv_index[i]
-
-                if key.endswith("_x"):
-                    name = key[:-2]
-                    current_value[name] = (elem, converted_row[i + 1])
-                elif key.endswith("_y"):
-                    continue
-                else:
-                    current_value[key] = elem
-
-            name = current_value["short_name"]
-            values[name] = current_value
-
-    return values
-
-
-concrete_options = load_values_from_csv(csv_concrete)
-steel_options = load_values_from_csv(csv_steel)
-
-rf_pattern = {
-    "rf_sup_long_n": beta * 2,
-    "rf_sup_long_d": 75.0,
-    "rf_sup_trans_n": beta * 8,
-    "rf_sup_trans_d": 2.0e03,  # 3_ft -> 2.00e03; 2_ft -> 1.5e03
-    "rf_sup_sas_n": 2,
-    "rf_sup_sas_d": 60.0,
-    "rf_back_n": 2,
-    "rf_back_d1": 85.0,
-    "rf_back_d2": 160.0,
-    "rf_back_d3": 235.0,
-    "rf_sub_long_n": 5,
-    "rf_sub_long_d": 400.0,
-    "rf_sub_trans_n": 5,
-    "rf_sub_trans_d": 320.0,
-    "rf_sub_sub_trans_n": 5,
-    "rf_sub_sub_trans_d": 400.0,
-    "rf_sub_sas_n": 4,
-    "rf_sub_sas_d": 180.0,
-}
-
-linear_patterns = [
-    {
-        "instanceList": (
-            "rf_sup_long-1",
-            "rf_sup_long-1-lin-2-1-1",
-            "rf_sup_long-1-lin-2-1-2",  # 3_ft
-        ),
-        "direction1": (-1.0, 0.0, 0.0),
-        "number1": rf_pattern["rf_sup_long_n"],
-        "spacing1": rf_pattern["rf_sup_long_d"] / (rf_pattern["rf_sup_long_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_sup_long-1-lin-5-1",
-            "rf_sup_long-1-lin-5-1-lin-2-1",
-            "rf_sup_long-1-lin-5-1-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (1.0, 0.0, 0.0),
-        "number1": rf_pattern["rf_sup_long_n"],
-        "spacing1": rf_pattern["rf_sup_long_d"] / (rf_pattern["rf_sup_long_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_sup_trans-1-lin-2-1-lin-4-lin-2-1-1",
-            "rf_sup_trans-1-lin-4-1-lin-2-lin-2-1",
-            "rf_sup_trans-1-lin-4-1-lin-2-lin-2-1-3",  # 3_ft
-        ),
-        "direction1": (0.0, 0.0, -1.0),
-        "number1": rf_pattern["rf_sup_trans_n"],
-        "spacing1": rf_pattern["rf_sup_trans_d"] / (rf_pattern["rf_sup_trans_n"] - 1),
-        "spacing1": rf_pattern["rf_sup_trans_d"]
-        / (rf_pattern["rf_sup_trans_n"]),  # 3_ft
-    },
-    {
-        "instanceList": (
-            "rf_sas-2-lin-2-1",
-            "rf_sas-2-lin-2-1-lin-2-1",
-            "rf_sas-2-lin-2-1-lin-2-1-1",
-            "rf_sas-2-lin-2-1-lin-2-1-lin-2-1",
-            "rf_sas-2-lin-2-1-lin-2-1-lin-2-1-1",  # 3_ft
-            "rf_sas-2-lin-2-1-lin-2-1-lin-lin-2-1",  # 3_ft
-        ),
-        "direction1": (0.0, -1.0, 0.0),
-        "number1": rf_pattern["rf_sup_sas_n"],
-        "spacing1": rf_pattern["rf_sup_sas_d"],
-    },
-    {
-        "instanceList": (
-            "rf_sub_long-1",
-            "rf_sub_long-1-lin-2-1-1",
-            "rf_sub_long-1-lin-2-1-2",  # 3_ft
-        ),
-        "direction1": (-1.0, 0.0, 0.0),
-        "number1": rf_pattern["rf_sub_long_n"],
-        "spacing1": rf_pattern["rf_sub_long_d"] / (rf_pattern["rf_sub_long_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_back-1-lin-1-2-lin-2-1",
-            "rf_back-1-lin-1-2",
-            "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_back_n"],
-        "spacing1": rf_pattern["rf_back_d1"],
-    },
-    {
-        "instanceList": (
-            "rf_back-1-lin-1-2-lin-2-1",
-            "rf_back-1-lin-1-2",
-            "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_back_n"],
-        "spacing1": rf_pattern["rf_back_d2"],
-    },
-    {
-        "instanceList": (
-            "rf_back-1-lin-1-2-lin-2-1",
-            "rf_back-1-lin-1-2",
-            "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_back_n"],
-        "spacing1": rf_pattern["rf_back_d3"],
-    },
-    {
-        "instanceList": (
-            "rf_sub_long-2-1",
-            "rf_sub_long-2-1-lin-2-1-1",
-            "rf_sub_long-2-1-lin-2-1-2",  # 3_ft
-        ),
-        "direction1": (-1.0, 0.0, 0.0),
-        "number1": rf_pattern["rf_sub_long_n"],
-        "spacing1": rf_pattern["rf_sub_long_d"] / (rf_pattern["rf_sub_long_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_sub_trans-1",
-            "rf_sub_trans-1-lin-2-1-2",
-            "rf_sub_trans-1-lin-2-1-3",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_sub_trans_n"],
-        "spacing1": rf_pattern["rf_sub_trans_d"]
-        / (rf_pattern["rf_sub_sub_trans_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_sub_trans-1-lin-2-1-1-lin-1-2",
-            "rf_sub_trans-1-lin-2-1-1-lin-lin-2-1",
-            "rf_sub_trans-1-lin-2-1-1-lin-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_sub_sub_trans_n"],
-        "spacing1": rf_pattern["rf_sub_sub_trans_d"]
-        / (rf_pattern["rf_sub_sub_trans_n"] - 1),
-    },
-    {
-        "instanceList": (
-            "rf_sas-1-lin-2-1-1",
-            "rf_sas-1-lin-1-2-lin-2-1",
-            "rf_sas-1-lin-2-1-1-lin-2-1",
-            "rf_sas-1-lin-1-2-lin-2-1-lin-2-1",
-            "rf_sas-1-lin-2-1-1-lin-2-1-1",  # 3_ft
-            "rf_sas-1-lin-1-2-lin-2-1-lin-2-1-1",  # 3_ft
-        ),
-        "direction1": (0.0, 1.0, 0.0),
-        "number1": rf_pattern["rf_sub_sas_n"],
-        "spacing1": rf_pattern["rf_sub_sas_d"] / (rf_pattern["rf_sub_long_n"] - 1),
-    },
-]
-
-value_pretension = {
-    "P_sas": P_sas,
-    "P_sas_trans": P_sas_trans,
-}
-
-reinforcement_radius = {
-    "dia_rf1": dia_rf1,
-    "dia_rf2": dia_rf2,
-    "dia_rf3": dia_rf3,
-    "dia_rf4": dia_rf4,
-}
-
-mesh_part_rigid = [
-    {
-        "part_name": "Load_plate",
-        "mesh_size": 25.0 * alpha,
-        "mesh_type": mesh_type_rigid,
-    },
-]
-
-mesh_part_beam = [
-    {
-        "part_name": "rf_back",
-        "mesh_size": 42.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_plate_long",
-        "mesh_size": 20.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sas",
-        "mesh_size": 12.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_spz_plate",
-        "mesh_size": 40.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sub_long",
-        "mesh_size": 20.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sub_long-2",
-        "mesh_size": 20.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sub_trans",
-        "mesh_size": 41.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sup_long",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-    {
-        "part_name": "rf_sup_trans",
-        "mesh_size": 21.0 * alpha,
-        "mesh_type": mesh_type_beam,
-    },
-]
-
-mesh_part_volume = [
-    {
-        "part_name": "Beam",
-        "mesh_size": 15.0 * alpha,
-        "mesh_type": mesh_type_volume,
-        "mesh_tech": mesh_tech_volume,
-        "mesh_algo": mesh_algo_volume,
-    },
-    {
-        "part_name": "Plate_C",
-        "mesh_size": 25.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Plate_CF",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Plate_S",
-        "mesh_size": 20.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_bot",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_bot-2",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_bot-2-Copy",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_top-l",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_top-r",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "Region_top_ext",
-        "mesh_size": 30.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "plate_sas",
-        "mesh_size": 10.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "plate_sas-32",
-        "mesh_size": 10.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "region_enc",
-        "mesh_size": 33.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "sas",
-        "mesh_size": 10.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-    {
-        "part_name": "sas-trans",
-        "mesh_size": 10.0 * alpha,
-        "mesh_type": mesh_type_volume,
-    },
-]
-
-params = {
-    "material_c": concrete_options[material_c],
-    "material_s": steel_options[material_s],
-    "material_sas": steel_options[material_sas],
-    "pretension": value_pretension,
-    "reinforcement": reinforcement_radius,
-    "linear_pattern": linear_patterns,
-    "mesh_part_rigid": mesh_part_rigid,
-    "mesh_part_beam": mesh_part_beam,
-    "mesh_part_volume": mesh_part_volume,
-}
-
-
-def modify_concrete_parameters(material):
-    # Unpack dictionary values
-    material_name = material["name"]
-    E = material["E"]
-    Nu = material["Nu"]
-    Psi = material["Psi"]
-    Ecc = material["Ecc"]
-    fb0 = material["fb0/fc0"]
-    K = material["K"]
-    Visc = material["Visc"]
-    C1 = material["C1"]
-    C2 = material["C2"]
-    C3 = material["C3"]
-    C4 = material["C4"]
-    C5 = material["C5"]
-    C6 = material["C6"]
-    C7 = material["C7"]
-    C8 = material["C8"]
-    C9 = material["C9"]
-    C10 = material["C10"]
-    C11 = material["C11"]
-    C12 = material["C12"]
-    C13 = material["C13"]
-    C14 = material["C14"]
-    C15 = material["C15"]
-    C16 = material["C16"]
-    C17 = material["C17"]
-    C18 = material["C18"]
-    C19 = material["C19"]
-    C20 = material["C20"]
-    C21 = material["C21"]
-    C22 = material["C22"]
-    C23 = material["C23"]
-    C24 = material["C24"]
-    C25 = material["C25"]
-    C26 = material["C26"]
-    C27 = material["C27"]
-    C28 = material["C28"]
-    C29 = material["C29"]
-    C30 = material["C30"]
-    C31 = material["C31"]
-    C32 = material["C32"]
-    C33 = material["C33"]
-    C34 = material["C34"]
-    C35 = material["C35"]
-    C36 = material["C36"]
-    C37 = material["C37"]
-    C38 = material["C38"]
-    C39 = material["C39"]
-    C40 = material["C40"]
-    C41 = material["C41"]
-    C42 = material["C42"]
-    C43 = material["C43"]
-    C44 = material["C44"]
-    C45 = material["C45"]
-    C46 = material["C46"]
-    C47 = material["C47"]
-    C48 = material["C48"]
-    C49 = material["C49"]
-    C50 = material["C50"]
-    C51 = material["C51"]
-    C52 = material["C52"]
-    C53 = material["C53"]
-    C54 = material["C54"]
-    C55 = material["C55"]
-    C56 = material["C56"]
-    C57 = material["C57"]
-    C58 = material["C58"]
-    T1 = material["T1"]
-    T2 = material["T2"]
-    T3 = material["T3"]
-    T4 = material["T4"]
-    T5 = material["T5"]
-    T6 = material["T6"]
-    T7 = material["T7"]
-    T8 = material["T8"]
-    T9 = material["T9"]
-    T10 = material["T10"]
-    T11 = material["T11"]
-    T12 = material["T12"]
-    T13 = material["T13"]
-    T14 = material["T14"]
-    T15 = material["T15"]
-    T16 = material["T16"]
-    T17 = material["T17"]
-    T18 = material["T18"]
-    CD1 = material["CD1"]
-    CD2 = material["CD2"]
-    CD3 = material["CD3"]
-    CD4 = material["CD4"]
-    CD5 = material["CD5"]
-    CD6 = material["CD6"]
-    CD7 = material["CD7"]
-    CD8 = material["CD8"]
-    CD9 = material["CD9"]
-    CD10 = material["CD10"]
-    CD11 = material["CD11"]
-    CD12 = material["CD12"]
-    CD13 = material["CD13"]
-    CD14 = material["CD14"]
-    CD15 = material["CD15"]
-    CD16 = material["CD16"]
-    CD17 = material["CD17"]
-    CD18 = material["CD18"]
-    CD19 = material["CD19"]
-    CD20 = material["CD20"]
-    CD21 = material["CD21"]
-    CD22 = material["CD22"]
-    CD23 = material["CD23"]
-    CD24 = material["CD24"]
-    CD25 = material["CD25"]
-    CD26 = material["CD26"]
-    CD27 = material["CD27"]
-    CD28 = material["CD28"]
-    CD29 = material["CD29"]
-    CD30 = material["CD30"]
-    CD31 = material["CD31"]
-    CD32 = material["CD32"]
-    CD33 = material["CD33"]
-    CD34 = material["CD34"]
-    CD35 = material["CD35"]
-    CD36 = material["CD36"]
-    CD37 = material["CD37"]
-    CD38 = material["CD38"]
-    CD39 = material["CD39"]
-    CD40 = material["CD40"]
-    CD41 = material["CD41"]
-    CD42 = material["CD42"]
-    CD43 = material["CD43"]
-    CD44 = material["CD44"]
-    CD45 = material["CD45"]
-    CD46 = material["CD46"]
-    CD47 = material["CD47"]
-    CD48 = material["CD48"]
-    CD49 = material["CD49"]
-    CD50 = material["CD50"]
-    CD51 = material["CD51"]
-    CD52 = material["CD52"]
-    CD53 = material["CD53"]
-    CD54 = material["CD54"]
-    CD55 = material["CD55"]
-    CD56 = material["CD56"]
-    CD57 = material["CD57"]
-    CD58 = material["CD58"]
-    CD59 = material["CD59"]
-    TD1 = material["TD1"]
-    TD2 = material["TD2"]
-    TD3 = material["TD3"]
-    TD4 = material["TD4"]
-    TD5 = material["TD5"]
-    TD6 = material["TD6"]
-    TD7 = material["TD7"]
-    TD8 = material["TD8"]
-    TD9 = material["TD9"]
-    TD10 = material["TD10"]
-    TD11 = material["TD11"]
-    TD12 = material["TD12"]
-    TD13 = material["TD13"]
-    # Rho_s           = material["Rho_s"]
-
-    # Access the model database
-    model = mdb.models[model_name]
-
-    # Access the material in the model
-    material = model.materials["concrete"]
-
-    # Modify the materials values
-    material.elastic.setValues(table=((E, Nu),))
-    material.concreteDamagedPlasticity.setValues(table=((Psi, Ecc, fb0, K, Visc),))
-    material.concreteDamagedPlasticity.concreteCompressionHardening.setValues(
-        table=(
-            C1,
-            C2,
-            C3,
-            C4,
-            C5,
-            C6,
-            C7,
-            C8,
-            C9,
-            C10,
-            C11,
-            C12,
-            C13,
-            C14,
-            C15,
-            C16,
-            C17,
-            C18,
-            C19,
-            C20,
-            C21,
-            C22,
-            C23,
-            C24,
-            C25,
-            C26,
-            C27,
-            C28,
-            C29,
-            C30,
-            C31,
-            C32,
-            C33,
-            C34,
-            C35,
-            C36,
-            C37,
-            C38,
-            C39,
-            C40,
-            C41,
-            C42,
-            C43,
-            C44,
-            C45,
-            C46,
-            C47,
-            C48,
-            C49,
-            C50,
-            C51,
-            C52,
-            C53,
-            C54,
-            C55,
-            C56,
-            C57,
-            C58,
-        )
-    )
-    material.concreteDamagedPlasticity.concreteTensionStiffening.setValues(
-        table=(
-            T1,
-            T2,
-            T3,
-            T4,
-            T5,
-            T6,
-            T7,
-            T8,
-            T9,
-            T10,
-            T11,
-            T12,
-            T13,
-            T14,
-            T15,
-            T16,
-            T17,
-            T18,
-        ),
-        type=DISPLACEMENT,
-    )
-    material.concreteDamagedPlasticity.concreteCompressionDamage.setValues(
-        table=(
-            CD1,
-            CD2,
-            CD3,
-            CD4,
-            CD5,
-            CD6,
-            CD7,
-            CD8,
-            CD9,
-            CD10,
-            CD11,
-            CD12,
-            CD13,
-            CD14,
-            CD15,
-            CD16,
-            CD17,
-            CD18,
-            CD19,
-            CD20,
-            CD21,
-            CD22,
-            CD23,
-            CD24,
-            CD25,
-            CD26,
-            CD27,
-            CD28,
-            CD29,
-            CD30,
-            CD31,
-            CD32,
-            CD33,
-            CD34,
-            CD35,
-            CD36,
-            CD37,
-            CD38,
-            CD39,
-            CD40,
-            CD41,
-            CD42,
-            CD43,
-            CD44,
-            CD45,
-            CD46,
-            CD47,
-            CD48,
-            CD49,
-            CD50,
-            CD51,
-            CD52,
-            CD53,
-            CD54,
-            CD55,
-            CD56,
-            CD57,
-            CD58,
-            CD59,
-        )
-    )
-    material.concreteDamagedPlasticity.concreteTensionDamage.setValues(
-        table=(
-            TD1,
-            TD2,
-            TD3,
-            TD4,
-            TD5,
-            TD6,
-            TD7,
-            TD8,
-            TD9,
-            TD10,
-            TD11,
-            TD12,
-            TD13,
-        )
-    )
-    # Reassign material to section
-    model.sections["C"].setValues(material=material_name, thickness=None)
-    # Rename the material to selected concrete
-    model.materials.changeKey(fromName="concrete", toName=material_name)
-
-
-def modify_sas_parameters(material):
-    # Unpack dictionary values
-    material_name = material["name"]
-    E = material["E"]
-    Nu = material["Nu"]
-    Y1 = material["Y1"]
-    Y2 = material["Y2"]
-    Y3 = material["Y3"]
-    Y4 = material["Y4"]
-
-    # Access the model database
-    model = mdb.models[model_name]
-
-    # Access the material in the model
-    material = model.materials["steel_sas"]
-
-    # Modify the materials values
-    material.elastic.setValues(table=((E, Nu),))
-    material.plastic.setValues(
-        scaleStress=None,
-        table=(
-            (Y1),
-            (Y2),
-            (Y3),
-            (Y4),
-        ),
-    )
-    # Rename the material to selected sas_steel
-    model.materials.changeKey(fromName="steel_sas", toName=material_name)
-    # Reassign material steel to sections
-    model.sections["sas"].setValues(material=material_name, thickness=None)
-
-
-def modify_steel_parameters(material):
-    # Unpack dictionary values
-    material_name = material["name"]
-    E = material["E"]
-    Nu = material["Nu"]
-    Y1 = material["Y1"]
-    Y2 = material["Y2"]
-
-    # Access the model database
-    model = mdb.models[model_name]
-
-    # Access the material in the model
-    material = model.materials["steel"]
-
-    # Modify the materials values
-    material.elastic.setValues(table=((E, Nu),))
-    material.plastic.setValues(scaleStress=None, table=(Y1, Y2))
-
-    # Rename the material to selected concrete
-    model.materials.changeKey(fromName="steel", toName=material_name)
-    # Reassign material steel to sections
-    model.sections["S"].setValues(material=material_name, thickness=None)
-
-
-def modify_pretension(value_pretension):
-    # Unpack dictionary value
-    amount_sas = value_pretension["P_sas"]
-    amount_sas_trans = value_pretension["P_sas_trans"]
-
-    # Access the model database
-    model = mdb.models[model_name]
-
-    # Modify the amount of pretension force
-    a = mdb.models[model_name].rootAssembly
-    region = a.sets["set_pretension"]
-    mdb.models[model_name].predefinedFields["Predefined Field-sas"].setValues(
-        region=region,
-        sigma11=0.0,
-        sigma22=amount_sas,
-        sigma33=0.0,
-        sigma12=0.0,
-        sigma13=0.0,
-        sigma23=0.0,
-    )
-    region = a.sets["set_pretension_trans"]
-    mdb.models[model_name].predefinedFields["Predefined Field-sas_trans"].setValues(
-        region=region,
-        sigma11=amount_sas_trans,
-        sigma22=0.0,
-        sigma33=0.0,
-        sigma12=0.0,
-        sigma13=0.0,
-        sigma23=0.0,
-    )
-
-
-def modify_reinforcement_radius(reinforcement_radius):
-    # Unpack dictionary value
-    dia1 = reinforcement_radius["dia_rf1"]
-    dia2 = reinforcement_radius["dia_rf2"]
-    dia3 = reinforcement_radius["dia_rf3"]
-    dia4 = reinforcement_radius["dia_rf4"]
-
-    # Access the model database
-    model = mdb.models[model_name]
-
-    # Modify radius reinforcement sections
-    model.profiles["dia1"].setValues(r=dia1)
-    model.profiles["dia2"].setValues(r=dia2)
-    model.profiles["dia3"].setValues(r=dia3)
-    model.profiles["dia4"].setValues(r=dia4)
-
-
-def modify_reinforcement_linear_pattern(linear_patterns):
-    # Access the model database
-    a1 = mdb.models[model_name].rootAssembly
-    # Access existing "Embedded" Set and convert into list
-    orig_edges = a1.sets["embedded"].edges
-    all_edges = list(orig_edges)
-
-    for pattern in linear_patterns:
-        # Default values because direction2 is not relevant
-        number2 = 1
-        spacing2 = 1.0
-        # Unpack dictionary values
-        instanceList = pattern["instanceList"]
-        direction1 = pattern["direction1"]
-        number1 = pattern["number1"]
-        spacing1 = pattern["spacing1"]
-        # Generate new reinforment bars
-        new_parts = a1.LinearInstancePattern(
-            instanceList=instanceList,
-            direction1=direction1,
-            number1=number1,
-            number2=number2,
-            spacing1=spacing1,
-            spacing2=spacing2,
-        )
-
-        # Add newly generated edges from linear pattern to list
-        for new_part in new_parts:
-            all_edges.extend(new_part.edges)
-    # Assign new instances to "Embedded" Set
-    a1.Set(edges=part.EdgeArray(all_edges), name="embedded")
-
-
-def mesh_volume(mesh_part_volume):
-    for teile in mesh_part_volume:
-        elemname = teile["part_name"]
-        elemsize = teile["mesh_size"]
-        elemtype = teile["mesh_type"]
-        # Select part
-        part = mdb.models[model_name].parts[elemname]
-        # Delete previous mesh
-        part.deleteMesh()
-        # Assign new mesh size
-        part.seedPart(size=elemsize, deviationFactor=0.1, minSizeFactor=0.1)
-        # Assign new mesh type
-        elemType1 = mesh.ElemType(
-            elemCode=elemtype,
-            elemLibrary=STANDARD,
-            kinematicSplit=AVERAGE_STRAIN,
-            secondOrderAccuracy=OFF,
-            hourglassControl=DEFAULT,
-            distortionControl=DEFAULT,
-        )
-        elemType2 = mesh.ElemType(elemCode=C3D6, elemLibrary=STANDARD)
-        elemType3 = mesh.ElemType(elemCode=C3D4, elemLibrary=STANDARD)
-        part = mdb.models[model_name].parts[elemname]
-        c = part.cells
-        cells = c.getByBoundingBox(
-            xMin=-1e10, yMin=-1e10, zMin=-1e10, xMax=1e10, yMax=1e10, zMax=1e10
-        )
-        pickedRegions = (cells,)
-        part.setElementType(
-            regions=pickedRegions, elemTypes=(elemType1, elemType2, elemType3)
-        )
-        # Assign new mesh shape
-        # part = mdb.models[model_name].parts[elemname]
-        # c = part.cells
-        # pickedRegions = c.getByBoundingBox(
-        #     xMin=-1e10, yMin=-1e10, zMin=-1e10, xMax=1e10, yMax=1e10, zMax=1e10
-        # )
-        # part.setMeshControls(
-        #     regions=pickedRegions, technique=elemtech, algorithm=elemalgo
-        # )
-        # part = mdb.models[model_name].parts[elemname]
-        # Mesh part with selected mesh size and type
-        part.generateMesh()
-
-
-def mesh_rigid(mesh_part_rigid):
-    for teile in mesh_part_rigid:
-        elemname = teile["part_name"]
-        elemsize = teile["mesh_size"]
-        elemtype = teile["mesh_type"]
-        # Select part
-        part = mdb.models[model_name].parts[elemname]
-        # Delete previous mesh
-        part.deleteMesh()
-        # Assign new mesh size
-        part.seedPart(size=elemsize, deviationFactor=0.1, minSizeFactor=0.1)
-        # Assign new mesh type
-        elemType1 = mesh.ElemType(elemCode=elemtype, elemLibrary=STANDARD)
-        elemType2 = mesh.ElemType(elemCode=R3D3, elemLibrary=STANDARD)
-        part = mdb.models[model_name].parts[elemname]
-        f = part.faces
-        faces = f.getByBoundingBox(
-            xMin=-1e10, yMin=-1e10, zMin=-1e10, xMax=1e10, yMax=1e10, zMax=1e10
-        )
-        pickedRegions = (faces,)
-        part.setElementType(regions=pickedRegions, elemTypes=(elemType1, elemType2))
-        # Mesh part with selected mesh size and type
-        part.generateMesh()
-
-
-def mesh_beam(mesh_part_beam):
-    for teile in mesh_part_beam:
-        elemname = teile["part_name"]
-        elemsize = teile["mesh_size"]
-        elemtype = teile["mesh_type"]
-        # Select part
-        part = mdb.models[model_name].parts[elemname]
-        # Delete previous mesh
-        part.deleteMesh()
-        # Assign new mesh size
-        part.seedPart(size=elemsize, deviationFactor=0.1, minSizeFactor=0.1)
-        # Assign new mesh type
-        elemType1 = mesh.ElemType(elemCode=elemtype, elemLibrary=STANDARD)
-        part = mdb.models[model_name].parts[elemname]
-        e = part.edges
-        edges = e.getByBoundingBox(
-            xMin=-1e10, yMin=-1e10, zMin=-1e10, xMax=1e10, yMax=1e10, zMax=1e10
-        )
-        pickedRegions = (edges,)
-        part.setElementType(regions=pickedRegions, elemTypes=(elemType1,))
-        # Mesh part with selected mesh size and type
-        part.generateMesh()
-
-
-def apply_load(disp):
-    # Access the model database
-    model = mdb.models[model_name]
-    # edit displacement value
-    model.boundaryConditions["BC-load"].setValuesInStep(stepName="Step-2-disp", u2=disp)
-
-
-executeOnCaeStartup()
-openMdb(file_name)
-
-modify_concrete_parameters(params["material_c"])
-modify_sas_parameters(params["material_sas"])
-modify_steel_parameters(params["material_s"])
-modify_pretension(params["pretension"])
-modify_reinforcement_radius(params["reinforcement"])
-modify_reinforcement_linear_pattern(params["linear_pattern"])
-# mesh_rigid(params["mesh_part_rigid"])
-mesh_beam(params["mesh_part_beam"])
-mesh_volume(params["mesh_part_volume"])
-apply_load(disp)
-
-# job name: Automatically generated
-job_name = "%s-%s-P_sas%.0f-%.0f-%.0f-%.0f-%.0f-%.0f" % (
-    material_c,
-    material_s,
-    P_sas,
-    beta,
-    dia_rf1,
-    dia_rf2,
-    dia_rf3,
-    dia_rf4,
-)
-
-# Create Job
-mdb.Job(
-    name=job_name,
-    model=model_name,
-    description="",
-    type=ANALYSIS,
-    atTime=None,
-    waitMinutes=0,
-    waitHours=0,
-    queue=None,
-    memory=90,
-    memoryUnits=PERCENTAGE,
-    getMemoryFromAnalysis=True,
-    explicitPrecision=SINGLE,
-    nodalOutputPrecision=SINGLE,
-    echoPrint=OFF,
-    modelPrint=OFF,
-    contactPrint=OFF,
-    historyPrint=OFF,
-    userSubroutine="",
-    scratch="",
-    resultsFormat=ODB,
-    numThreadsPerMpiProcess=1,
-    multiprocessingMode=DEFAULT,
-    numCpus=1,
-    numGPUs=0,
-)
-
-# Data Check
-# mdb.jobs[job_name].submit(consistencyChecking=OFF, datacheckJob=True)
-
-# Write Input
-mdb.jobs[job_name].writeInput(consistencyChecking=OFF)
-
-# Save model with selected concrete, steel, pretension values and reinforcement grade and mesh size ratio
-mdb.saveAs(job_name + ".cae")
-
-# Close model so files can be moved
-mdb.close()
-
-
-# Get the list of all files in the current folder
-current_directory = os.getcwd()
-files = os.listdir(current_directory)
-
-print("Moving output files to respective folders")
-
-for file in files:
-    # Skip files that have the input file in the name
-    ignored_filename = file_name.split(".")[0]
-    if ignored_filename in file:
-        print("Skipping", file)
-        continue
-
-    for ending, folder in output_folders.items():
-        if file.endswith(ending):
-            new_file = os.path.join(folder, file)
-            print("Moving", file, "to", new_file)
-            os.replace(file, new_file)
+from abaqus import *
+from abaqusConstants import *
+from caeModules import *
+from driverUtils import *
+import abaqusConstants
+import argparse
+import inspect
+import json
+import os
+import shutil
+from pathlib import Path
+import sys
+
+# Make the pure-Python helpers next to this script importable inside CAE
+script_directory = os.path.dirname(
+    os.path.abspath(inspect.getfile(inspect.currentframe()))
+)
+if script_directory not in sys.path:
+    sys.path.insert(0, script_directory)
+
+from early_stop import write_force_print
+from estimate import part_geometry_file
+from manifest import find, is_generated, manifest_file, open_manifest, record
+from material_library import table
+from mesh_include import share_mesh
+from model_server import default_port, parse_address, serve
+from parameters import (
+    build_params,
+    default_variant,
+    file_name,
+    job_name,
+    load_material_options,
+    load_variants,
+    mesh_parameters,
+    model_name,
+    output_folders,
+    params_hash,
+    resolve_variant,
+    trace_folder,
+)
+from resources import dofs_of, job_resources
+from stage_timing import (
+    print_summary,
+    read_traces,
+    stage,
+    start_tracing,
+    stop_tracing,
+    summarize,
+    variant_trace,
+)
+
+# base model, output folders and variant parameters (materials, pretension,
+# alpha, beta, radii, mesh types) are defined in parameters.py
+
+
+def symbolic_constant(name):
+    # Resolve an abaqusConstants name such as "C3D8R" to the symbolic constant
+    return getattr(abaqusConstants, name)
+
+
+# Mesh currently on each part: (model_name, part_name) -> mesh key
+mesh_cache = {}
+
+# Objects of each open model, resolved once: model_name -> context
+model_contexts = {}
+
+# Model the incremental mode applies the variants of a sweep to
+live_model_name = model_name + "-live"
+
+# Limits of the job sizing (resources.job_resources), from --max-cpus and
+# --max-tokens: the budget of the scheduler that solves the jobs
+job_limits = {"max_cpus": None, "max_tokens": None}
+
+
+def model_context(model_name=model_name):
+    # Model, assembly, parts, selections and element types of a model. Every
+    # lookup in CAE crosses into the kernel, so they are made once and kept
+    # until the model is replaced: open_database, copy_model and drop_model
+    # forget them. The repository may hand out a new wrapper of the same model
+    # on every lookup, so object identity tells nothing.
+    context = model_contexts.get(model_name)
+    if context is None:
+        model = mdb.models[model_name]
+        context = {
+            "model_name": model_name,
+            "model": model,
+            "assembly": model.rootAssembly,
+            "parts": {},
+            "regions": {},
+            "elem_types": {},
+            "assigned_types": {},
+            "material_names": {},
+            "embedded_edges": None,
+            "pattern_instances": [],
+            "applied": {},
+        }
+        model_contexts[model_name] = context
+    return context
+
+
+def drop_job(name):
+    if name in mdb.jobs.keys():
+        del mdb.jobs[name]
+
+
+def forget_model(name):
+    # Everything kept about a model: its context and the mesh cache entries
+    # of its parts, which a new model of that name does not carry
+    model_contexts.pop(name, None)
+    for key in [key for key in mesh_cache if key[0] == name]:
+        del mesh_cache[key]
+
+
+def drop_model(name):
+    if name in mdb.models.keys():
+        del mdb.models[name]
+    forget_model(name)
+
+
+def copy_model(name, source=model_name):
+    forget_model(name)
+    with stage("copy model"):
+        mdb.Model(name=name, objectToCopy=mdb.models[source])
+
+
+def open_database(file_path=file_name):
+    # openMdb replaces every model, so nothing kept about the models holds
+    with stage("openMdb"):
+        openMdb(file_path)
+    model_contexts.clear()
+    mesh_cache.clear()
+
+
+def part_of(context, part_name):
+    if part_name not in context["parts"]:
+        context["parts"][part_name] = context["model"].parts[part_name]
+    return context["parts"][part_name]
+
+
+def region_of(context, part_name, geometry):
+    # All cells, faces or edges of a part; the geometry does not change from
+    # one variant to the next, only the mesh
+    key = (part_name, geometry)
+    if key not in context["regions"]:
+        context["regions"][key] = getattr(
+            part_of(context, part_name), geometry
+        ).getByBoundingBox(
+            xMin=-1e10, yMin=-1e10, zMin=-1e10, xMax=1e10, yMax=1e10, zMax=1e10
+        )
+    return context["regions"][key]
+
+
+def elem_types_of(context, elem_codes, technique=None):
+    # One set of ElemType objects per unique (element codes, technique),
+    # shared by every part meshed with it
+    key = (elem_codes, technique)
+    if key not in context["elem_types"]:
+        first, others = elem_codes[0], elem_codes[1:]
+        if technique == "volume":
+            elem_type = mesh.ElemType(
+                elemCode=symbolic_constant(first),
+                elemLibrary=STANDARD,
+                kinematicSplit=AVERAGE_STRAIN,
+                secondOrderAccuracy=OFF,
+                hourglassControl=DEFAULT,
+                distortionControl=DEFAULT,
+            )
+        else:
+            elem_type = mesh.ElemType(
+                elemCode=symbolic_constant(first), elemLibrary=STANDARD
+            )
+        context["elem_types"][key] = (elem_type,) + tuple(
+            mesh.ElemType(elemCode=symbolic_constant(code), elemLibrary=STANDARD)
+            for code in others
+        )
+    return context["elem_types"][key]
+
+
+def assign_elem_types(context, part_name, geometry, elem_codes, technique=None):
+    # Element types stay assigned when a mesh is deleted: only assign them
+    # when they change
+    key = (elem_codes, technique)
+    if context["assigned_types"].get(part_name) == key:
+        return
+    part_of(context, part_name).setElementType(
+        regions=(region_of(context, part_name, geometry),),
+        elemTypes=elem_types_of(context, elem_codes, technique),
+    )
+    context["assigned_types"][part_name] = key
+
+
+def rename_material(context, key, material_name):
+    # Materials carry the name of the selected grade; on a live model the
+    # material was renamed by an earlier variant
+    current = context["material_names"].get(key, key)
+    if current != material_name:
+        context["model"].materials.changeKey(fromName=current, toName=material_name)
+        context["material_names"][key] = material_name
+
+
+def mesh_key(teile, elem_codes):
+    return (
+        teile["part_name"],
+        teile["mesh_size"],
+        tuple(elem_codes),
+        teile.get("mesh_tech"),
+        teile.get("mesh_algo"),
+    )
+
+
+def mesh_is_cached(part, model_name, key):
+    # The part still carries the mesh generated for this key
+    return mesh_cache.get((model_name, key[0])) == key and len(part.elements) > 0
+
+
+def modify_concrete_parameters(material, context):
+    # Unpack dictionary values
+    material_name = material["name"]
+    E = material["E"]
+    Nu = material["Nu"]
+    Psi = material["Psi"]
+    Ecc = material["Ecc"]
+    fb0 = material["fb0/fc0"]
+    K = material["K"]
+    Visc = material["Visc"]
+    # Curves of the material library, as many points as the grade defines
+    C = material["C"]
+    T = material["T"]
+    CD = material["CD"]
+    TD = material["TD"]
+    # Rho_s           = material["Rho_s"]
+
+    # Report decimated curves (decimate_stress / decimate_damage)
+    for prefix, (before, after, error) in material.get("decimation", {}).items():
+        print(
+            "%s %s: %d -> %d points, max error %.3g"
+            % (material_name, prefix, before, after, error)
+        )
+
+    model = context["model"]
+
+    # Access the material in the model
+    material = model.materials[context["material_names"].get("concrete", "concrete")]
+    cdp = material.concreteDamagedPlasticity
+
+    # Modify the materials values
+    material.elastic.setValues(table=((E, Nu),))
+    cdp.setValues(table=((Psi, Ecc, fb0, K, Visc),))
+    cdp.concreteCompressionHardening.setValues(table=table(C))
+    cdp.concreteTensionStiffening.setValues(
+        table=table(T),
+        type=DISPLACEMENT,
+    )
+    cdp.concreteCompressionDamage.setValues(table=table(CD))
+    cdp.concreteTensionDamage.setValues(table=table(TD))
+    # Reassign material to section
+    model.sections["C"].setValues(material=material_name, thickness=None)
+    # Rename the material to selected concrete
+    rename_material(context, "concrete", material_name)
+
+
+def modify_sas_parameters(material, context):
+    # Unpack dictionary values
+    material_name = material["name"]
+    E = material["E"]
+    Nu = material["Nu"]
+    Y = material["Y"]
+
+    model = context["model"]
+
+    # Access the material in the model
+    material = model.materials[context["material_names"].get("steel_sas", "steel_sas")]
+
+    # Modify the materials values
+    material.elastic.setValues(table=((E, Nu),))
+    material.plastic.setValues(scaleStress=None, table=table(Y))
+    # Rename the material to selected sas_steel
+    rename_material(context, "steel_sas", material_name)
+    # Reassign material steel to sections
+    model.sections["sas"].setValues(material=material_name, thickness=None)
+
+
+def modify_steel_parameters(material, context):
+    # Unpack dictionary values
+    material_name = material["name"]
+    E = material["E"]
+    Nu = material["Nu"]
+    Y = material["Y"]
+
+    model = context["model"]
+
+    # Access the material in the model
+    material = model.materials[context["material_names"].get("steel", "steel")]
+
+    # Modify the materials values
+    material.elastic.setValues(table=((E, Nu),))
+    material.plastic.setValues(scaleStress=None, table=table(Y))
+
+    # Rename the material to selected concrete
+    rename_material(context, "steel", material_name)
+    # Reassign material steel to sections
+    model.sections["S"].setValues(material=material_name, thickness=None)
+
+
+def modify_pretension(value_pretension, context):
+    # Unpack dictionary value
+    amount_sas = value_pretension["P_sas"]
+    amount_sas_trans = value_pretension["P_sas_trans"]
+
+    # Modify the amount of pretension force
+    a = context["assembly"]
+    fields = context["model"].predefinedFields
+    region = a.sets["set_pretension"]
+    fields["Predefined Field-sas"].setValues(
+        region=region,
+        sigma11=0.0,
+        sigma22=amount_sas,
+        sigma33=0.0,
+        sigma12=0.0,
+        sigma13=0.0,
+        sigma23=0.0,
+    )
+    region = a.sets["set_pretension_trans"]
+    fields["Predefined Field-sas_trans"].setValues(
+        region=region,
+        sigma11=amount_sas_trans,
+        sigma22=0.0,
+        sigma33=0.0,
+        sigma12=0.0,
+        sigma13=0.0,
+        sigma23=0.0,
+    )
+
+
+def modify_reinforcement_radius(reinforcement_radius, context):
+    # Unpack dictionary value
+    dia1 = reinforcement_radius["dia_rf1"]
+    dia2 = reinforcement_radius["dia_rf2"]
+    dia3 = reinforcement_radius["dia_rf3"]
+    dia4 = reinforcement_radius["dia_rf4"]
+
+    # Modify radius reinforcement sections
+    profiles = context["model"].profiles
+    profiles["dia1"].setValues(r=dia1)
+    profiles["dia2"].setValues(r=dia2)
+    profiles["dia3"].setValues(r=dia3)
+    profiles["dia4"].setValues(r=dia4)
+
+
+def modify_reinforcement_linear_pattern(linear_patterns, context):
+    a1 = context["assembly"]
+    if context["embedded_edges"] is None:
+        # Access existing "Embedded" Set and convert into list
+        context["embedded_edges"] = list(a1.sets["embedded"].edges)
+    elif context["pattern_instances"]:
+        # Live model: drop the bars of the previous patterns first
+        a1.deleteFeatures(featureNames=tuple(context["pattern_instances"]))
+    all_edges = list(context["embedded_edges"])
+    context["pattern_instances"] = []
+
+    for pattern in linear_patterns:
+        # Default values because direction2 is not relevant
+        number2 = 1
+        spacing2 = 1.0
+        # Unpack dictionary values
+        instanceList = pattern["instanceList"]
+        direction1 = pattern["direction1"]
+        number1 = pattern["number1"]
+        spacing1 = pattern["spacing1"]
+        # Generate new reinforment bars
+        new_parts = a1.LinearInstancePattern(
+            instanceList=instanceList,
+            direction1=direction1,
+            number1=number1,
+            number2=number2,
+            spacing1=spacing1,
+            spacing2=spacing2,
+        )
+
+        # Add newly generated edges from linear pattern to list
+        for new_part in new_parts:
+            all_edges.extend(new_part.edges)
+            context["pattern_instances"].append(new_part.name)
+    # Assign new instances to "Embedded" Set
+    a1.Set(edges=part.EdgeArray(all_edges), name="embedded")
+
+
+def mesh_part(context, teile, geometry, elem_codes, technique=None):
+    # Mesh one part with its size and element types, unless it still carries
+    # that mesh
+    elemname = teile["part_name"]
+    with stage("mesh_" + technique, "mesh", part=elemname) as timing:
+        part = part_of(context, elemname)
+        # Skip parts whose mesh size and type did not change
+        key = mesh_key(teile, elem_codes)
+        if mesh_is_cached(part, context["model_name"], key):
+            print("Mesh of", elemname, "unchanged, skipping")
+            timing.update(cached=True, elements=len(part.elements))
+            return
+        # Delete previous mesh
+        part.deleteMesh()
+        # Assign new mesh size
+        part.seedPart(size=teile["mesh_size"], deviationFactor=0.1, minSizeFactor=0.1)
+        # Assign new mesh type
+        assign_elem_types(context, elemname, geometry, elem_codes, technique)
+        # Assign new mesh shape
+        # part.setMeshControls(
+        #     regions=region_of(context, elemname, "cells"),
+        #     technique=elemtech,
+        #     algorithm=elemalgo,
+        # )
+        # Mesh part with selected mesh size and type
+        part.generateMesh()
+        mesh_cache[(context["model_name"], elemname)] = key
+        timing.update(cached=False, elements=len(part.elements))
+
+
+def mesh_volume(mesh_part_volume, context):
+    for teile in mesh_part_volume:
+        mesh_part(
+            context, teile, "cells", (teile["mesh_type"], "C3D6", "C3D4"), "volume"
+        )
+
+
+def mesh_rigid(mesh_part_rigid, context):
+    for teile in mesh_part_rigid:
+        mesh_part(context, teile, "faces", (teile["mesh_type"], "R3D3"), "rigid")
+
+
+def mesh_beam(mesh_part_beam, context):
+    for teile in mesh_part_beam:
+        mesh_part(context, teile, "edges", (teile["mesh_type"],), "beam")
+
+
+def apply_load(disp, context):
+    # edit displacement value
+    context["model"].boundaryConditions["BC-load"].setValuesInStep(
+        stepName="Step-2-disp", u2=disp
+    )
+
+
+def mesh_parts(params, model_name=model_name):
+    context = model_context(model_name)
+    # mesh_rigid(params["mesh_part_rigid"], context)
+    mesh_beam(params["mesh_part_beam"], context)
+    mesh_volume(params["mesh_part_volume"], context)
+
+
+# Steps of a variant in the order they are applied, with the params entry each
+# one reads. build_params derives these entries from the variant parameters,
+# which gives the dependencies of the incremental mode:
+#   material_c, fck, concrete_law, decimate_* -> material_c -> concrete
+#   material_s                                -> material_s -> steel
+#   P_sas, P_sas_trans                        -> pretension -> predefined fields
+#   dia_rf1 .. dia_rf4                        -> reinforcement -> profiles
+#   beta -> linear_pattern -> patterned bars and the embedded set
+#   alpha, mesh_type_*, mesh_tech/algo_volume -> mesh_part_* -> meshes
+#   disp                                      -> disp -> BC-load
+variant_steps = (
+    (modify_concrete_parameters, "material_c"),
+    (modify_sas_parameters, "material_sas"),
+    (modify_steel_parameters, "material_s"),
+    (modify_pretension, "pretension"),
+    (modify_reinforcement_radius, "reinforcement"),
+    (modify_reinforcement_linear_pattern, "linear_pattern"),
+    (mesh_beam, "mesh_part_beam"),
+    (mesh_volume, "mesh_part_volume"),
+    (apply_load, "disp"),
+)
+mesh_steps = (mesh_beam, mesh_volume)
+
+
+def apply_variant(params, model_name=model_name, mesh=True, changes_only=False):
+    # changes_only: replay only the steps whose params differ from the ones
+    # last applied to this model
+    context = model_context(model_name)
+    replayed = []
+    for step, key in variant_steps:
+        if step in mesh_steps and not mesh:
+            continue
+        digest = params_hash(params[key])
+        if changes_only and context["applied"].get(step.__name__) == digest:
+            continue
+        if step in mesh_steps:
+            # Timed per part
+            step(params[key], context)
+        else:
+            with stage(step.__name__):
+                step(params[key], context)
+        context["applied"][step.__name__] = digest
+        replayed.append(step.__name__)
+    return replayed
+
+
+def model_size(model_name=model_name):
+    # Degrees of freedom and elements of the meshed assembly
+    dofs = 0
+    elements = 0
+    for instance in mdb.models[model_name].rootAssembly.instances.values():
+        if not len(instance.elements):
+            continue
+        element_code = str(instance.elements[0].type)
+        dofs += len(instance.nodes) * dofs_of(element_code)
+        elements += len(instance.elements)
+    return dofs, elements
+
+
+def create_job(job_name, model_name=model_name, resources=None):
+    # Cores and memory follow the size of the meshed model (resources.py)
+    if resources is None:
+        with stage("model_size") as timing:
+            resources = job_resources(*model_size(model_name), **job_limits)
+            timing.update(dofs=resources["dofs"], elements=resources["elements"])
+    print(
+        "Job %s: %d dofs -> %d cpus, %d MB"
+        % (job_name, resources["dofs"], resources["cpus"], resources["memory"])
+    )
+    mdb.Job(
+        name=job_name,
+        model=model_name,
+        description="",
+        type=ANALYSIS,
+        atTime=None,
+        waitMinutes=0,
+        waitHours=0,
+        queue=None,
+        memory=resources["memory"],
+        memoryUnits=MEGA_BYTES,
+        getMemoryFromAnalysis=True,
+        explicitPrecision=SINGLE,
+        nodalOutputPrecision=SINGLE,
+        echoPrint=OFF,
+        modelPrint=OFF,
+        contactPrint=OFF,
+        historyPrint=OFF,
+        userSubroutine="",
+        scratch="",
+        resultsFormat=ODB,
+        numThreadsPerMpiProcess=1,
+        multiprocessingMode=DEFAULT,
+        numCpus=resources["cpus"],
+        numDomains=resources["domains"],
+        numGPUs=0,
+    )
+    return resources
+
+
+def generate_variant(variant, params, save_cae=True, mesh_dir=None):
+    # Build the variant on a copy of the pristine base model, so the base model
+    # stays untouched and the next variant starts from the same state
+    variant_name = job_name(variant, params)
+
+    # Mesh the parts of the base model instead of the copy: parts keep their
+    # mesh from one variant to the next, so only a changed mesh key remeshes,
+    # and the copy inherits the mesh. Meshes do not depend on the materials,
+    # pretension or load applied to the copy.
+    mesh_parts(params, model_name)
+    try:
+        copy_model(variant_name)
+        apply_variant(params, variant_name, mesh=False)
+        resources = create_job(variant_name, variant_name)
+        write_variant(variant_name, save_cae, mesh_dir)
+    finally:
+        # Drop the variant again, also after a failed step, so a server does
+        # not pile up model copies
+        drop_job(variant_name)
+        drop_model(variant_name)
+    return variant_name, resources
+
+
+def generate_incremental(variant, params, save_cae=True, mesh_dir=None):
+    # Build the variant on one live model kept for the whole sweep, replaying
+    # only the steps whose params changed since the previous variant
+    variant_name = job_name(variant, params)
+    if live_model_name not in mdb.models.keys():
+        copy_model(live_model_name)
+    try:
+        replayed = apply_variant(params, live_model_name, changes_only=True)
+    except Exception:
+        # State of the live model unknown: the next variant starts afresh
+        drop_model(live_model_name)
+        raise
+    print("Replayed", ", ".join(replayed) or "nothing")
+    try:
+        resources = create_job(variant_name, live_model_name)
+        write_variant(variant_name, save_cae, mesh_dir)
+    finally:
+        drop_job(variant_name)
+    return variant_name, resources
+
+
+def write_variant(variant_name, save_cae=True, mesh_dir=None):
+    with stage("writeInput"):
+        mdb.jobs[variant_name].writeInput(consistencyChecking=OFF)
+    # Load-displacement print for the early termination (early_stop.py)
+    with stage("write_force_print"):
+        write_force_print(variant_name + ".inp")
+    if mesh_dir:
+        # Node and element tables go to shared include files: less disk, but
+        # writeInput above has written them in full anyway
+        with stage("share_mesh"):
+            share_mesh(variant_name + ".inp", mesh_dir)
+    if save_cae:
+        # The saved database also holds the pristine base model
+        with stage("saveAs"):
+            mdb.saveAs(variant_name + ".cae")
+
+
+def script_arguments():
+    # Arguments given after "--": abaqus cae noGUI=change_parameters.py -- ...
+    arguments = []
+    if "--" in sys.argv:
+        arguments = sys.argv[sys.argv.index("--") + 1 :]
+    parser = argparse.ArgumentParser(prog="change_parameters.py")
+    parser.add_argument(
+        "variants",
+        nargs="?",
+        help="variant file for a batch sweep, regenerate, geometry or serve",
+    )
+    parser.add_argument(
+        "variant_hash", nargs="?", help="regenerate: variant hash or a prefix of it"
+    )
+    parser.add_argument("--manifest", default=manifest_file)
+    parser.add_argument(
+        "--address",
+        default=str(default_port),
+        help="serve: host:port or port to listen on (see model_server.py)",
+    )
+    parser.add_argument(
+        "--mesh-dir",
+        help="store part meshes once in shared include files here (saves disk, "
+        "not writeInput time)",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="apply the variants to one live model, replaying only what changed",
+    )
+    parser.add_argument(
+        "--trace",
+        nargs="?",
+        const=trace_folder,
+        help="write stage timing traces here (default folder: %s)" % trace_folder,
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="write input files only, no .cae per variant (see regenerate)",
+    )
+    parser.add_argument("--max-cpus", type=int, help="cores per job at most")
+    parser.add_argument("--max-tokens", type=int, help="licence tokens per job at most")
+    args = parser.parse_args(arguments)
+    if args.variants == "regenerate" and not args.variant_hash:
+        parser.error("regenerate needs the hash of a variant")
+    if args.incremental and args.variants in (None, "geometry", "regenerate"):
+        # A single variant has nothing to replay
+        parser.error("--incremental applies to a batch sweep or serve only")
+    return args
+
+
+def record_generated(connection, variant, params, name, save_cae, resources):
+    # Paths relative to the output root, where the files end up after moving
+    record(
+        connection,
+        params_hash(params),
+        job_name=name,
+        variant=variant,
+        status="generated",
+        inp=os.path.join(output_folders[".inp"], name + ".inp"),
+        cae=os.path.join(output_folders[".cae"], name + ".cae") if save_cae else None,
+        dofs=resources["dofs"],
+        cpus=resources["cpus"],
+        memory=resources["memory"],
+    )
+
+
+def move_output_files():
+    # Get the list of all files in the current folder
+    current_directory = os.getcwd()
+    files = os.listdir(current_directory)
+
+    print("Moving output files to respective folders")
+
+    for file in files:
+        # Skip files that have the input file in the name
+        ignored_filename = file_name.split(".")[0]
+        if ignored_filename in file:
+            print("Skipping", file)
+            continue
+
+        for ending, folder in output_folders.items():
+            if file.endswith(ending):
+                new_file = os.path.join(folder, file)
+                print("Moving", file, "to", new_file)
+                os.replace(file, new_file)
+
+
+def run_single(manifest_path=manifest_file, save_cae=True, mesh_dir=None):
+    concrete_options, steel_options = load_material_options()
+    params = build_params(default_variant, concrete_options, steel_options)
+
+    executeOnCaeStartup()
+    open_database()
+
+    name = job_name(default_variant, params)
+
+    with variant_trace(name):
+        apply_variant(params)
+
+        # Create Job
+        resources = create_job(name)
+
+        # Data Check
+        # mdb.jobs[name].submit(consistencyChecking=OFF, datacheckJob=True)
+
+        # Write Input and save model with selected concrete, steel, pretension
+        # values and reinforcement grade and mesh size ratio
+        write_variant(name, save_cae, mesh_dir)
+    record_generated(
+        open_manifest(manifest_path),
+        default_variant,
+        params,
+        name,
+        save_cae,
+        resources,
+    )
+
+    # Close model so files can be moved
+    mdb.close()
+
+
+def run_batch(
+    variants,
+    save_cae=True,
+    manifest_path=manifest_file,
+    mesh_dir=None,
+    incremental=False,
+):
+    # One CAE session for the whole sweep: the base model is opened only once
+    concrete_options, steel_options = load_material_options()
+    connection = open_manifest(manifest_path)
+    output_root = os.path.dirname(os.path.abspath(manifest_path))
+
+    # Skip variants whose input the manifest already has (resumed sweeps)
+    pending = []
+    for variant in variants:
+        variant = resolve_variant(variant)
+        params = build_params(variant, concrete_options, steel_options)
+        if is_generated(connection, params_hash(params), output_root):
+            print("Skipping", job_name(variant, params), "(already generated)")
+            continue
+        pending.append((variant, params))
+    if not pending:
+        return
+
+    executeOnCaeStartup()
+    open_database()
+    generate = generate_incremental if incremental else generate_variant
+
+    # Variants sharing a mesh follow each other, so the mesh cache is hit, and
+    # within a mesh those sharing the reinforcement pattern (incremental mode)
+    pending.sort(
+        key=lambda item: [repr(item[0][key]) for key in mesh_parameters + ("beta",)]
+    )
+    for i, (variant, params) in enumerate(pending):
+        print("Generating variant %d/%d" % (i + 1, len(pending)))
+        with variant_trace(job_name(variant, params)):
+            name, resources = generate(variant, params, save_cae, mesh_dir)
+        record_generated(connection, variant, params, name, save_cae, resources)
+        print("Written", name + ".inp")
+
+    # Close model so files can be moved
+    mdb.close()
+
+
+def write_part_geometry(params, file_path=part_geometry_file, model_name=model_name):
+    # Part volumes, beam edge lengths and instances of the base model for the
+    # pre-mesh estimate (estimate.py)
+    model = mdb.models[model_name]
+    instances = {}
+    for instance in model.rootAssembly.instances.values():
+        instances.setdefault(instance.partName, []).append(instance.name)
+
+    geometry = {}
+    for teile in params["mesh_part_volume"]:
+        part = model.parts[teile["part_name"]]
+        geometry[teile["part_name"]] = {
+            "volume": part.getVolume(),
+            "instances": len(instances.get(teile["part_name"], [])),
+            "instance_names": sorted(instances.get(teile["part_name"], [])),
+        }
+    for teile in params["mesh_part_beam"]:
+        part = model.parts[teile["part_name"]]
+        geometry[teile["part_name"]] = {
+            "edges": [edge.getSize(printResults=False) for edge in part.edges],
+            "instances": len(instances.get(teile["part_name"], [])),
+            "instance_names": sorted(instances.get(teile["part_name"], [])),
+        }
+    with open(file_path, "w") as json_file:
+        json.dump(geometry, json_file, indent=1, sort_keys=True)
+    print("Written", file_path)
+
+
+def run_geometry():
+    concrete_options, steel_options = load_material_options()
+    params = build_params(default_variant, concrete_options, steel_options)
+
+    executeOnCaeStartup()
+    open_database()
+    write_part_geometry(params)
+    mdb.close()
+
+
+def regenerate(hash_prefix, manifest_path=manifest_file):
+    # Rebuild the .cae of a variant written without one (lean mode) from the
+    # base model and the resolved variant recorded in the manifest
+    connection = open_manifest(manifest_path)
+    entry = find(connection, hash_prefix)
+    concrete_options, steel_options = load_material_options()
+    params = build_params(entry["variant"], concrete_options, steel_options)
+    if params_hash(params) != entry["hash"]:
+        # Material data changed since the input file was written
+        raise ValueError(
+            "Params of %s no longer match the recorded hash %s"
+            % (entry["job_name"], entry["hash"])
+        )
+    name = entry["job_name"]
+
+    executeOnCaeStartup()
+    open_database()
+
+    apply_variant(params)
+    create_job(name)
+    mdb.saveAs(name + ".cae")
+    record(
+        connection,
+        entry["hash"],
+        cae=os.path.join(output_folders[".cae"], name + ".cae"),
+    )
+    print("Regenerated", name + ".cae")
+
+    # Close model so files can be moved
+    mdb.close()
+
+
+def run_server(
+    address,
+    save_cae=True,
+    manifest_path=manifest_file,
+    mesh_dir=None,
+    incremental=False,
+):
+    # Keep the base model open and generate the variants sent over the local
+    # socket (model_server.py) until a shutdown request
+    concrete_options, steel_options = load_material_options()
+    connection = open_manifest(manifest_path)
+    output_root = os.path.dirname(os.path.abspath(manifest_path))
+
+    executeOnCaeStartup()
+    open_database()
+    generate_one = generate_incremental if incremental else generate_variant
+
+    def generate(variant):
+        variant = resolve_variant(variant)
+        params = build_params(variant, concrete_options, steel_options)
+        variant_hash = params_hash(params)
+        name = job_name(variant, params)
+        reply = {
+            "hash": variant_hash,
+            "job_name": name,
+            "inp": os.path.join(output_folders[".inp"], name + ".inp"),
+        }
+        if is_generated(connection, variant_hash, output_root):
+            return dict(reply, skipped=True)
+        with variant_trace(name):
+            name, resources = generate_one(variant, params, save_cae, mesh_dir)
+        # The input file goes to its folder right away; the saved .cae stays
+        # locked by CAE and is moved on shutdown
+        os.replace(name + ".inp", reply["inp"])
+        record_generated(connection, variant, params, name, save_cae, resources)
+        return dict(reply, skipped=False, cpus=resources["cpus"])
+
+    host, port = parse_address(address)
+    serve(generate, host, port)
+
+    # Close model so files can be moved
+    mdb.close()
+
+
+if __name__ == "__main__":
+    # abaqus cae noGUI=change_parameters.py                    -> default variant
+    # abaqus cae noGUI=change_parameters.py -- variants.json   -> batch sweep
+    #   [--manifest path]  variant manifest (default: manifest.sqlite)
+    #   [--mesh-dir path]  shared mesh include files, less disk (default: full input files)
+    #   [--lean]           no .cae per variant, only input file and manifest
+    #   [--trace [path]]   stage timing traces (default: TRACE_files)
+    #   [--incremental]    replay only the changed steps on one live model
+    #   [--max-cpus n] [--max-tokens n]  job size limits (budget of the scheduler)
+    # abaqus cae noGUI=change_parameters.py -- regenerate <hash> -> .cae of a variant
+    # abaqus cae noGUI=change_parameters.py -- geometry -> part geometry for estimate.py
+    # abaqus cae noGUI=change_parameters.py -- serve [--address host:port]
+    #                                                      -> model server
+    arguments = script_arguments()
+    job_limits.update(max_cpus=arguments.max_cpus, max_tokens=arguments.max_tokens)
+    if arguments.trace:
+        start_tracing(arguments.trace)
+    if arguments.variants == "geometry":
+        run_geometry()
+    elif arguments.variants == "serve":
+        run_server(
+            arguments.address,
+            save_cae=not arguments.lean,
+            manifest_path=arguments.manifest,
+            mesh_dir=arguments.mesh_dir,
+            incremental=arguments.incremental,
+        )
+    elif arguments.variants == "regenerate":
+        regenerate(arguments.variant_hash, arguments.manifest)
+    elif arguments.variants:
+        run_batch(
+            load_variants(arguments.variants),
+            save_cae=not arguments.lean,
+            manifest_path=arguments.manifest,
+            mesh_dir=arguments.mesh_dir,
+            incremental=arguments.incremental,
+        )
+    else:
+        run_single(
+            arguments.manifest,
+            save_cae=not arguments.lean,
+            mesh_dir=arguments.mesh_dir,
+        )
+
+    with stage("move_output_files"):
+        move_output_files()
+    if arguments.trace:
+        stop_tracing()
+        print_summary(summarize(read_traces(arguments.trace)))
@@ -0,0 +1,172 @@
+import argparse
+
+import numpy as np
+
+from material_library import validate_material
+
+# Analytical concrete damaged plasticity curves for arbitrary grades, computed
+# for many grades at once (one row per grade). The result has the structure of
+# a material library entry (see material_library.py) and can be handed to
+# modify_concrete_parameters like a grade from concrete_parameters.csv.
+#
+# Law "ec2_sargin":
+#   compression: EN 1992-1-1 3.1.5 (Sargin) with fcm, Ecm, eps_c1 from table 3.1,
+#                linear elastic up to 0.4 fcm, stress floor residual * fcm
+#   tension:     fctm from table 3.1, Hordijk softening over crack opening w
+#                with fracture energy GF = 73 fcm^0.18 N/m (fib MC 2010)
+#   damage:      d = 1 - stress / peak stress on the softening branches
+
+laws = ("ec2_sargin",)
+
+# Plasticity parameters as used for the CSV grades
+default_plasticity = {
+    "Nu": 0.19,
+    "Psi": 30.0,
+    "Ecc": 0.1,
+    "fb0/fc0": 1.16,
+    "K": 0.666,
+    "Visc": 0.0001,
+}
+
+
+def ec2_properties(fck):
+    # EN 1992-1-1 table 3.1, all in MPa, strains absolute
+    fck = np.asarray(fck, dtype=np.float64)
+    fcm = fck + 8.0
+    Ecm = 22000.0 * (fcm / 10.0) ** 0.3
+    fctm = np.where(
+        fck <= 50.0, 0.30 * fck ** (2.0 / 3.0), 2.12 * np.log(1.0 + fcm / 10.0)
+    )
+    eps_c1 = np.minimum(0.7 * fcm**0.31, 2.8) / 1000.0
+    GF = 0.073 * fcm**0.18  # N/mm
+    return {
+        "fck": fck,
+        "fcm": fcm,
+        "Ecm": Ecm,
+        "fctm": fctm,
+        "eps_c1": eps_c1,
+        "GF": GF,
+    }
+
+
+def sargin(eta, k):
+    return (k * eta - eta**2) / (1.0 + (k - 2.0) * eta)
+
+
+def compression_curves(props, points, eps_max, residual):
+    fcm = props["fcm"][:, None]
+    Ecm = props["Ecm"][:, None]
+    eps_c1 = props["eps_c1"][:, None]
+    k = 1.05 * Ecm * eps_c1 / fcm
+
+    # Start of plastic flow: ascending Sargin branch at 0.4 fcm
+    r = 0.4
+    b = k - r * (k - 2.0)
+    eta_0 = (b - np.sqrt(b**2 - 4.0 * r)) / 2.0
+
+    # Total strain grid per grade, denser around the peak
+    s = np.linspace(0.0, 1.0, points)[None, :]
+    eta_max = eps_max / eps_c1
+    eta = eta_0 + (eta_max - eta_0) * s**2
+    stress = fcm * sargin(eta, k)
+    # Descending branch: never rising again (Sargin has a pole for k < 2),
+    # floored at the residual stress
+    peak = eta >= 1.0
+    descending = np.minimum.accumulate(np.where(peak, stress, np.inf), axis=1)
+    descending = np.where(descending < 0.0, 0.0, descending)
+    stress = np.where(peak, np.maximum(descending, residual * fcm), stress)
+    stress[:, 0] = r * fcm[:, 0]
+
+    inelastic = eta * eps_c1 - stress / Ecm
+    inelastic = inelastic - inelastic[:, :1]
+    damage = np.where(peak, 1.0 - stress / fcm, 0.0)
+    return stress, inelastic, damage
+
+
+def hordijk(w, wc):
+    c1 = 3.0
+    c2 = 6.93
+    x = w / wc
+    return (1.0 + (c1 * x) ** 3) * np.exp(-c2 * x) - x * (1.0 + c1**3) * np.exp(-c2)
+
+
+def tension_curves(props, points, residual):
+    fctm = props["fctm"][:, None]
+    wc = 5.14 * props["GF"][:, None] / fctm
+
+    w = wc * np.linspace(0.0, 1.0, points)[None, :]
+    stress = np.maximum(fctm * hordijk(w, wc), residual * fctm)
+    damage = 1.0 - stress / fctm
+    return stress, w, damage
+
+
+def curve(first, second):
+    return np.ascontiguousarray(np.stack([first, second], axis=-1))
+
+
+def strictly_increasing(x):
+    # Mask of points whose strain exceeds every earlier one
+    keep = np.ones(len(x), dtype=bool)
+    keep[1:] = x[1:] > np.maximum.accumulate(x)[:-1]
+    return keep
+
+
+def generate_concrete(
+    fck,
+    law="ec2_sargin",
+    compression_points=60,
+    tension_points=20,
+    eps_max=0.02,
+    residual=0.1,
+    plasticity=None,
+):
+    # fck: one value or a sequence of grades; returns short_name -> material
+    if law not in laws:
+        raise ValueError("Unknown concrete law %r, expected one of %s" % (law, laws))
+    plasticity = dict(default_plasticity, **(plasticity or {}))
+
+    props = ec2_properties(np.atleast_1d(fck))
+    c_stress, c_strain, c_damage = compression_curves(
+        props, compression_points, eps_max, residual
+    )
+    t_stress, t_opening, t_damage = tension_curves(props, tension_points, residual)
+
+    materials = {}
+    for i, grade in enumerate(props["fck"]):
+        short_name = "C%g" % grade
+        keep = strictly_increasing(c_strain[i])
+        material = {
+            "name": "concrete_c%s" % ("%g" % grade).replace(".", "_"),
+            "short_name": short_name,
+            "E": float(props["Ecm"][i]),
+            "C": curve(c_stress[i][keep], c_strain[i][keep]),
+            "T": curve(t_stress[i], t_opening[i]),
+            "CD": curve(c_damage[i][keep], c_strain[i][keep]),
+            "TD": curve(t_damage[i], t_opening[i]),
+        }
+        material.update(plasticity)
+        validate_material(material)
+        materials[short_name] = material
+    return materials
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Print analytical CDP curves for concrete grades"
+    )
+    parser.add_argument("fck", type=float, nargs="+", help="characteristic strength")
+    parser.add_argument("--law", default="ec2_sargin", choices=laws)
+    args = parser.parse_args()
+
+    for short_name, material in generate_concrete(args.fck, args.law).items():
+        print("%s (%s): E = %.0f MPa" % (short_name, material["name"], material["E"]))
+        for prefix in ("C", "T", "CD", "TD"):
+            first, last = material[prefix][0], material[prefix][-1]
+            print(
+                "  %-2s %3d points, (%.4g, %.4g) ... (%.4g, %.4g)"
+                % (prefix, len(material[prefix]), first[0], first[1], last[0], last[1])
+            )
+
+
+if __name__ == "__main__":
+    main()
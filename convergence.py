@@ -0,0 +1,242 @@
+import argparse
+import json
+import math
+import os
+
+from manifest import lookup, manifest_file
+from parameters import (
+    build_params,
+    default_variant,
+    file_name,
+    load_material_options,
+    load_variants,
+    params_hash,
+    resolve_variant,
+)
+from postprocess import curve_metrics, stack_curves
+from resources import licence_tokens
+from results_store import extract_command, extract_results, has_results, read_results
+from run_parallel import abaqus_command, run_parallel
+from scheduler import enqueue, open_queue, run_queue, solver_command
+
+# Mesh convergence on alpha: a reference variant is solved on a ladder of
+# alphas from coarse to fine, alpha_i = alpha_0 / ratio^i. After every level
+# the peak load and the initial stiffness are compared with the previous
+# level; the ladder stops as soon as both change by less than the tolerance,
+# and the coarser of the two levels is the adequate alpha.
+#
+# With three or more levels the discretization error is estimated by
+# Richardson extrapolation of the last three levels (observed order p);
+# with two levels the formal order of the elements is assumed.
+
+metrics = ("peak_load", "initial_stiffness")
+
+# Linear hexahedra (C3D8R): force error of first order in the element size
+formal_order = 1.0
+
+
+def response_metrics(displacement, force):
+    U, F = stack_curves([(displacement, force)])
+    values = curve_metrics(U, F)
+    return dict((metric, float(values[metric][0])) for metric in metrics)
+
+
+def richardson(values, ratio, order=None):
+    # values of the last levels, coarse to fine, refined by ratio per level;
+    # returns (extrapolated value, order)
+    if len(values) >= 3 and order is None:
+        f1, f2, f3 = values[-3:]
+        if f1 != f2 and f2 != f3 and (f1 - f2) / (f2 - f3) > 0.0:
+            order = math.log((f1 - f2) / (f2 - f3)) / math.log(ratio)
+    if order is None or order <= 0.0:
+        order = formal_order
+    f2, f3 = values[-2:]
+    return f3 + (f3 - f2) / (ratio**order - 1.0), order
+
+
+def relative_change(previous, current):
+    return abs(current - previous) / max(abs(current), 1e-30)
+
+
+def alpha_ladder(alpha_0, ratio, levels, alpha_min=None):
+    alphas = [alpha_0 / ratio**i for i in range(levels)]
+    return [alpha for alpha in alphas if alpha_min is None or alpha >= alpha_min]
+
+
+def run_convergence(reference, alphas, evaluate, ratio, tolerance=0.02):
+    # evaluate(variant) -> (displacement, force) of the solved variant
+    levels = []
+    adequate = None
+    for alpha in alphas:
+        variant = resolve_variant(dict(reference, alpha=alpha))
+        level = {"alpha": alpha}
+        level.update(response_metrics(*evaluate(variant)))
+        levels.append(level)
+
+        report = ["alpha %-8g" % alpha]
+        for metric in metrics:
+            report.append("%s %.6g" % (metric, level[metric]))
+        if len(levels) > 1:
+            changes = [
+                relative_change(levels[-2][metric], level[metric]) for metric in metrics
+            ]
+            level["change"] = max(changes)
+            report.append("change %.3g" % level["change"])
+        print("  ".join(report))
+
+        if len(levels) > 1 and level["change"] < tolerance:
+            adequate = levels[-2]["alpha"]
+            break
+
+    result = {"levels": levels, "adequate_alpha": adequate, "extrapolated": {}}
+    if len(levels) > 1:
+        for metric in metrics:
+            value, order = richardson([level[metric] for level in levels], ratio)
+            result["extrapolated"][metric] = {"value": value, "order": order}
+            # Discretization error of the adequate (or finest) level
+            level = levels[-2] if adequate is not None else levels[-1]
+            result["extrapolated"][metric]["error"] = relative_change(
+                value, level[metric]
+            )
+    return result
+
+
+def sweep_evaluator(
+    output_root=".",
+    cae_command=abaqus_command,
+    solver=solver_command,
+    reader=extract_command,
+    base_cae=file_name,
+    cores=os.cpu_count() or 1,
+    tokens=None,
+    memory=16000,
+):
+    # Generate (change_parameters.py), solve (scheduler.py) and extract
+    # (results_store.py) one variant with the tools of a production sweep
+    manifest_path = os.path.abspath(os.path.join(output_root, manifest_file))
+    concrete_options, steel_options = load_material_options()
+    if tokens is None:
+        tokens = licence_tokens(cores)
+
+    def evaluate(variant):
+        variant_hash = params_hash(
+            build_params(variant, concrete_options, steel_options)
+        )
+        results = run_parallel(
+            [variant],
+            1,
+            command=cae_command,
+            base_cae=base_cae,
+            work_root=os.path.join(output_root, "workers"),
+            output_root=output_root,
+            max_cpus=cores,
+            max_tokens=tokens,
+        )
+        if any(result["returncode"] != 0 for result in results):
+            raise RuntimeError("Generating alpha %g failed" % variant["alpha"])
+
+        connection = open_queue(manifest_path)
+        enqueue(connection, output_root, hashes=[variant_hash])
+        run_queue(
+            connection,
+            output_root,
+            command=solver,
+            cores=cores,
+            tokens=tokens,
+            memory=memory,
+            hashes=[variant_hash],
+        )
+        entry = lookup(connection, variant_hash)
+        if entry is None or entry["status"] != "completed":
+            raise RuntimeError(
+                "Solving alpha %g failed: %s"
+                % (variant["alpha"], entry and entry["message"])
+            )
+
+        extract_results(connection, output_root, reader, hashes=[variant_hash])
+        connection.close()
+        if not has_results(variant_hash, output_root):
+            raise RuntimeError("Extracting alpha %g failed" % variant["alpha"])
+        results = read_results(variant_hash, output_root, ("displacement", "force"))
+        return results["displacement"], results["force"]
+
+    return evaluate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesh convergence study on alpha for a reference variant"
+    )
+    parser.add_argument(
+        "--reference",
+        help="variant file with the reference variant (default: default_variant)",
+    )
+    parser.add_argument("--alpha", type=float, default=2.0, help="coarsest alpha")
+    parser.add_argument("--ratio", type=float, default=1.5, help="refinement ratio")
+    parser.add_argument("--levels", type=int, default=6, help="maximum levels")
+    parser.add_argument("--alpha-min", type=float, help="finest alpha to try")
+    parser.add_argument("--tolerance", type=float, default=0.02)
+    parser.add_argument("--output-root", default=".")
+    parser.add_argument("--base-cae", default=file_name)
+    parser.add_argument("--cae-command", default=abaqus_command)
+    parser.add_argument("--solver-command", default=solver_command)
+    parser.add_argument("--reader-command", default=extract_command)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--tokens", type=int, help="default: the tokens of --cores cores in one job"
+    )
+    parser.add_argument("--memory", type=int, default=16000)
+    parser.add_argument(
+        "--update-study",
+        help="JSON study file whose base alpha is set to the adequate alpha",
+    )
+    args = parser.parse_args()
+
+    reference = default_variant
+    if args.reference:
+        reference = load_variants(args.reference)[0]
+
+    evaluate = sweep_evaluator(
+        args.output_root,
+        args.cae_command,
+        args.solver_command,
+        args.reader_command,
+        args.base_cae,
+        args.cores,
+        args.tokens,
+        args.memory,
+    )
+    result = run_convergence(
+        reference,
+        alpha_ladder(args.alpha, args.ratio, args.levels, args.alpha_min),
+        evaluate,
+        args.ratio,
+        args.tolerance,
+    )
+
+    for metric, extrapolated in result["extrapolated"].items():
+        print(
+            "%s: extrapolated %.6g (order %.2f), error %.3g"
+            % (
+                metric,
+                extrapolated["value"],
+                extrapolated["order"],
+                extrapolated["error"],
+            )
+        )
+    if result["adequate_alpha"] is None:
+        print("Not converged within %g" % args.tolerance)
+        return
+    print("Adequate alpha: %g" % result["adequate_alpha"])
+
+    if args.update_study:
+        with open(args.update_study, "r") as json_file:
+            study = json.load(json_file)
+        study.setdefault("base", {})["alpha"] = result["adequate_alpha"]
+        with open(args.update_study, "w") as json_file:
+            json.dump(study, json_file, indent=4)
+        print("Set base alpha of", args.update_study)
+
+
+if __name__ == "__main__":
+    main()
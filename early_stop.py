@@ -0,0 +1,95 @@
+from mesh_include import is_keyword, keyword_of
+from patch_inp import load_boundary, load_step, option_of
+
+# Early termination once the softening after the peak load is captured. The
+# applied displacement (u2 = -30.0 in Step-2-disp) goes far beyond the peak;
+# the interesting part of the curve ends a little after it.
+#
+# The input file gets a *Node Print of U2 and RF2 of the loaded set in the
+# load step, one table per increment in the .dat file. monitor.py tails the
+# .dat file like the .sta file, and the scheduler stops a job cleanly (abaqus
+# terminate, the .odb keeps every finished increment) as soon as the force
+# has dropped stop_drop below its peak:
+#   force < (1 - stop_drop) * peak force, in load direction
+
+# Number of the load step in the .sta file
+load_step_number = 2
+
+
+def force_print_lines(set_name, newline="\n"):
+    return [
+        "*Node Print, nset=%s, frequency=1%s" % (set_name, newline),
+        "U2, RF2%s" % newline,
+    ]
+
+
+def add_force_print(lines):
+    # Insert the node print before *End Step of the load step; the set is the
+    # one of the displacement boundary condition
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    result = []
+    current_step = None
+    comment = ""
+    set_name = None
+    in_boundary = False
+    for line in lines:
+        if is_keyword(line):
+            keyword = keyword_of(line)
+            in_boundary = False
+            if keyword == "step":
+                current_step = option_of(line, "name")
+            elif keyword == "boundary":
+                in_boundary = comment.startswith("** Name: %s " % load_boundary)
+            elif keyword == "node print" and current_step == load_step:
+                # Written before
+                return lines
+            elif keyword == "end step":
+                if current_step == load_step and set_name:
+                    result.extend(force_print_lines(set_name, newline))
+                current_step = None
+            comment = ""
+        elif line.startswith("**"):
+            comment = line
+        elif in_boundary and current_step == load_step and set_name is None:
+            set_name = line.split(",")[0].strip()
+        result.append(line)
+    return result
+
+
+def write_force_print(inp_path):
+    # Rewrite a written input file in place
+    with open(inp_path, "r", newline="") as inp_file:
+        lines = inp_file.readlines()
+    lines = add_force_print(lines)
+    with open(inp_path, "w", newline="") as inp_file:
+        inp_file.writelines(lines)
+
+
+def softened(state, stop_drop):
+    # Reason to stop the job, or None
+    peak = state["peak_force"]
+    if stop_drop is None or state["force"] is None or peak <= 0.0:
+        return None
+    if state["force"] < (1.0 - stop_drop) * peak:
+        return "load dropped %.0f%% below the peak %.4g at u = %.4g (now u = %.4g)" % (
+            100.0 * (1.0 - state["force"] / peak),
+            peak,
+            state["peak_displacement"],
+            state["displacement"],
+        )
+    return None
+
+
+def force_missing(state, stop_drop):
+    # Warning for a job watched for softening that has finished increments of
+    # the load step (the second one, Step-2-disp) but no force rows in the
+    # .dat, e.g. an input file written without the node print; or None
+    if stop_drop is None or state["force"] is not None:
+        return None
+    if state["step"] is None or state["step"] < load_step_number:
+        return None
+    if state["step"] == load_step_number and state["increment"] < 2:
+        return None
+    return "no load-displacement rows in %s.dat, stop_drop has no effect" % (
+        state["job_name"]
+    )
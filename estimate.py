@@ -0,0 +1,216 @@
+import argparse
+import json
+import math
+import os
+import statistics
+
+from manifest import entries, manifest_file, open_manifest
+from parameters import (
+    build_params,
+    load_material_options,
+    load_variants,
+    resolve_variant,
+)
+from resources import job_resources
+
+# Pre-mesh cost estimate of a variant: element and node counts per part from
+# the part geometry and the mesh sizes of params (mesh_size * alpha), summed
+# into degrees of freedom, memory and solve time before anything is meshed.
+#
+#   volume parts: hexahedra of edge h filling the part volume,
+#                 nodes of a cube-like block (elements^(1/3) + 1)^3, 3 dofs
+#   beam parts:   ceil(length / h) elements per edge, one more node per edge,
+#                 6 dofs
+#
+# Part geometry (volume, edge lengths, instances in the base model) is read
+# from part_geometry_file, written by "change_parameters.py -- geometry".
+# Reinforcement patterns add (number1 - 1) instances per listed instance, of
+# the part the instance names in the base model (longest part name prefix
+# for a geometry file without instance names).
+#
+# Calibration from the manifest of earlier runs:
+#   dofs:    predicted dofs scaled by the median ratio of the dofs counted at
+#            job creation to the prediction
+#   runtime: seconds = a * dofs^b, fitted in log space to the recorded solver
+#            runtimes (b stays at the prior with runs of a single size)
+
+part_geometry_file = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "config", "part_geometry.json"
+)
+
+# Prior of the runtime model: about 2 hours for a million dofs
+runtime_prior = (7.2e-6, 1.5)
+
+
+def load_part_geometry(file_path=part_geometry_file):
+    if not os.path.exists(file_path):
+        raise IOError(
+            "No part geometry %s, write it with: "
+            "abaqus cae noGUI=change_parameters.py -- geometry" % file_path
+        )
+    with open(file_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def part_of(instance_name, part_names):
+    # Longest part name the instance name starts with
+    candidates = [name for name in part_names if instance_name.startswith(name + "-")]
+    return max(candidates, key=len) if candidates else None
+
+
+def instance_parts(geometry):
+    # Part of every instance of the base model
+    parts = {}
+    for name, part in geometry.items():
+        for instance_name in part.get("instance_names", []):
+            parts[instance_name] = name
+    return parts
+
+
+def instance_counts(params, geometry):
+    # Instances per part after the reinforcement patterns of the variant
+    counts = dict((name, part["instances"]) for name, part in geometry.items())
+    parts = instance_parts(geometry)
+    for pattern in params["linear_pattern"]:
+        for instance in pattern["instanceList"]:
+            part_name = parts.get(instance) or part_of(instance, counts)
+            if part_name in counts:
+                counts[part_name] += pattern["number1"] - 1
+    return counts
+
+
+def predict(params, geometry):
+    # Predicted elements and dofs of the meshed assembly
+    counts = instance_counts(params, geometry)
+    elements = 0
+    dofs = 0
+    for teile in params["mesh_part_volume"]:
+        part = geometry[teile["part_name"]]
+        part_elements = part["volume"] / teile["mesh_size"] ** 3
+        part_nodes = (part_elements ** (1.0 / 3.0) + 1.0) ** 3
+        elements += counts[teile["part_name"]] * part_elements
+        dofs += counts[teile["part_name"]] * 3 * part_nodes
+    for teile in params["mesh_part_beam"]:
+        part = geometry[teile["part_name"]]
+        part_elements = sum(
+            max(1, math.ceil(length / teile["mesh_size"])) for length in part["edges"]
+        )
+        part_nodes = part_elements + len(part["edges"])
+        elements += counts[teile["part_name"]] * part_elements
+        dofs += counts[teile["part_name"]] * 6 * part_nodes
+    return elements, dofs
+
+
+def calibrate(connection, geometry, concrete_options, steel_options):
+    # dofs scale and runtime model from the variants of earlier runs
+    ratios = []
+    runs = []
+    for entry in entries(connection):
+        if not entry["variant"] or not entry["dofs"]:
+            continue
+        params = build_params(entry["variant"], concrete_options, steel_options)
+        elements, dofs = predict(params, geometry)
+        ratios.append(entry["dofs"] / dofs)
+        if entry["status"] == "completed" and entry["runtime"]:
+            runs.append((entry["dofs"], entry["runtime"]))
+
+    scale = statistics.median(ratios) if ratios else 1.0
+    a, b = runtime_prior
+    if len(set(dofs for dofs, runtime in runs)) > 1:
+        x = [math.log(dofs) for dofs, runtime in runs]
+        y = [math.log(runtime) for dofs, runtime in runs]
+        x_mean = statistics.mean(x)
+        y_mean = statistics.mean(y)
+        b = sum((xi - x_mean) * (yi - y_mean) for xi, yi in zip(x, y)) / sum(
+            (xi - x_mean) ** 2 for xi in x
+        )
+        a = math.exp(y_mean - b * x_mean)
+    elif runs:
+        a = statistics.median(runtime / dofs**b for dofs, runtime in runs)
+    return {"scale": scale, "runtime": (a, b), "runs": len(ratios)}
+
+
+def estimate(params, geometry, calibration=None):
+    calibration = calibration or {"scale": 1.0, "runtime": runtime_prior}
+    elements, dofs = predict(params, geometry)
+    dofs *= calibration["scale"]
+    elements *= calibration["scale"]
+    a, b = calibration["runtime"]
+    resources = job_resources(dofs, elements)
+    return {
+        "elements": int(elements),
+        "dofs": int(dofs),
+        "cpus": resources["cpus"],
+        "memory": resources["memory"],
+        "hours": a * dofs**b / 3600.0,
+    }
+
+
+def over_budget(cost, max_dofs=None, max_memory=None, max_hours=None):
+    # Exceeded limits, e.g. ["dofs", "hours"]
+    exceeded = []
+    for key, limit in (
+        ("dofs", max_dofs),
+        ("memory", max_memory),
+        ("hours", max_hours),
+    ):
+        if limit is not None and cost[key] > limit:
+            exceeded.append(key)
+    return exceeded
+
+
+def estimator(manifest_path=manifest_file, concrete_options=None, steel_options=None):
+    # Calibrated estimate function params -> cost
+    if concrete_options is None or steel_options is None:
+        concrete_options, steel_options = load_material_options()
+    geometry = load_part_geometry()
+    calibration = {"scale": 1.0, "runtime": runtime_prior, "runs": 0}
+    if os.path.exists(manifest_path):
+        connection = open_manifest(manifest_path)
+        calibration = calibrate(connection, geometry, concrete_options, steel_options)
+        connection.close()
+    print(
+        "Estimator calibrated from %d runs: dofs x %.3g, runtime %.3g * dofs^%.3g s"
+        % (
+            calibration["runs"],
+            calibration["scale"],
+            calibration["runtime"][0],
+            calibration["runtime"][1],
+        )
+    )
+
+    def cost_of(params):
+        return estimate(params, geometry, calibration)
+
+    return cost_of
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Estimate mesh size and solver cost of variants before meshing"
+    )
+    parser.add_argument("variants", help="variant file written by plan_study.py")
+    parser.add_argument("--manifest", default=manifest_file)
+    args = parser.parse_args()
+
+    concrete_options, steel_options = load_material_options()
+    cost_of = estimator(args.manifest, concrete_options, steel_options)
+    for i, variant in enumerate(load_variants(args.variants)):
+        variant = resolve_variant(variant)
+        cost = cost_of(build_params(variant, concrete_options, steel_options))
+        print(
+            "%4d alpha %-5g %9d elements %10d dofs %3d cpus %7d MB %8.2f h"
+            % (
+                i,
+                variant["alpha"],
+                cost["elements"],
+                cost["dofs"],
+                cost["cpus"],
+                cost["memory"],
+                cost["hours"],
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
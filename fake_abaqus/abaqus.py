@@ -0,0 +1,3 @@
+from fake_mdb import mdb, openMdb
+
+__all__ = ["mdb", "openMdb"]
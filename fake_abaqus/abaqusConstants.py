@@ -0,0 +1,28 @@
+from fake_mdb import SymbolicConstant
+
+# Constants used by name in change_parameters.py; any other upper case name
+# (element codes for symbolic_constant) is made on access
+__all__ = [
+    "ANALYSIS",
+    "AVERAGE_STRAIN",
+    "C3D4",
+    "C3D6",
+    "DEFAULT",
+    "DISPLACEMENT",
+    "MEGA_BYTES",
+    "ODB",
+    "OFF",
+    "ON",
+    "R3D3",
+    "SINGLE",
+    "STANDARD",
+]
+
+for _name in __all__:
+    globals()[_name] = SymbolicConstant(_name)
+
+
+def __getattr__(name):
+    if not name.isupper():
+        raise AttributeError(name)
+    return SymbolicConstant(name)
@@ -0,0 +1,4 @@
+import mesh
+import part
+
+__all__ = ["mesh", "part"]
@@ -0,0 +1,3 @@
+from fake_mdb import executeOnCaeStartup
+
+__all__ = ["executeOnCaeStartup"]
@@ -0,0 +1,475 @@
+import copy
+import math
+import time
+from collections import Counter
+
+# Recording stand-in for the parts of the Abaqus scripting interface that
+# change_parameters.py uses: mdb, openMdb, models with materials, sections,
+# profiles, predefined fields, boundary conditions, parts and the root
+# assembly, mesh.ElemType and part.EdgeArray. Every API call is logged as
+#   (path, method, keyword arguments)
+# e.g. ("models[Model-s16-4].profiles[dia1]", "setValues", {"r": 6.0}), and
+# costs simulated time from the costs table (seconds per call, or per element
+# for meshing and writing). The simulated time only adds up in the clock,
+# unless the clock sleeps it, e.g. to see it in the stage traces.
+#
+# The base model opened by openMdb is built from a model description
+# (configure): model name, parts with their geometry and assembly instances.
+
+# Simulated seconds per call; per element for generateMesh and writeInput
+costs = {
+    "openMdb": 8.0,
+    "Model": 0.5,
+    "generateMesh": 2e-5,
+    "writeInput": 1e-5,
+    "saveAs": 2.0,
+    "LinearInstancePattern": 0.05,
+    "Set": 0.05,
+    "getByBoundingBox": 0.01,
+    "setElementType": 0.01,
+    "seedPart": 0.02,
+    "default": 0.001,
+}
+
+log = {"calls": [], "counts": Counter()}
+clock = {"simulated": 0.0, "sleep": False}
+description = {"model_name": "Model-1", "parts": {}, "instances": []}
+
+
+def configure(model_name=None, parts=None, instances=None, cost_table=None, sleep=None):
+    # parts: name -> {"volume": mm^3} or {"edges": [length, ...]}
+    # instances: [(instance name, part name), ...]
+    if model_name is not None:
+        description["model_name"] = model_name
+    if parts is not None:
+        description["parts"] = parts
+    if instances is not None:
+        description["instances"] = instances
+    if cost_table is not None:
+        costs.update(cost_table)
+    if sleep is not None:
+        clock["sleep"] = sleep
+
+
+def reset_log():
+    log["calls"] = []
+    log["counts"] = Counter()
+    clock["simulated"] = 0.0
+
+
+def spend(method, units=1.0):
+    seconds = costs.get(method, costs["default"]) * units
+    clock["simulated"] += seconds
+    if clock["sleep"]:
+        time.sleep(seconds)
+
+
+def record(path, method, units=1.0, **kwargs):
+    log["calls"].append((path, method, kwargs))
+    log["counts"][method] += 1
+    spend(method, units)
+
+
+class SymbolicConstant(str):
+    def __repr__(self):
+        return str(self)
+
+
+class Options(object):
+    # Any object configured through setValues (material behaviours, sections,
+    # profiles, fields, boundary conditions)
+    def __init__(self, path, **children):
+        self.path = path
+        self.values = {}
+        self.step_values = {}
+        for name, child in children.items():
+            setattr(self, name, child)
+
+    def setValues(self, **kwargs):
+        record(self.path, "setValues", **kwargs)
+        self.values.update(kwargs)
+
+    def setValuesInStep(self, stepName, **kwargs):
+        record(self.path, "setValuesInStep", stepName=stepName, **kwargs)
+        self.step_values.setdefault(stepName, {}).update(kwargs)
+
+
+class Repository(dict):
+    def __init__(self, path, items=()):
+        dict.__init__(self, items)
+        self.path = path
+
+    def __getitem__(self, key):
+        record(self.path, "__getitem__", key=key)
+        return dict.__getitem__(self, key)
+
+    def changeKey(self, fromName, toName):
+        record(self.path, "changeKey", fromName=fromName, toName=toName)
+        self[toName] = self.pop(fromName)
+
+
+class GeomArray(list):
+    def __init__(self, path, items=()):
+        list.__init__(self, items)
+        self.path = path
+
+    def getByBoundingBox(self, **kwargs):
+        record(self.path, "getByBoundingBox", **kwargs)
+        return GeomArray(self.path, self)
+
+
+class Edge(object):
+    def __init__(self, owner, index, length):
+        self.owner = owner
+        self.index = index
+        self.length = length
+
+    def getSize(self, printResults=True):
+        return self.length
+
+
+class Element(object):
+    def __init__(self, element_type):
+        self.type = element_type
+
+
+class MeshArray(object):
+    # Elements or nodes of a mesh, by count only
+    def __init__(self, count=0, element_type=None):
+        self.count = count
+        self.element_type = element_type
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not -self.count <= index < self.count:
+            raise IndexError(index)
+        return Element(self.element_type)
+
+
+class ElemType(object):
+    def __init__(self, elemCode, elemLibrary=None, **kwargs):
+        record("mesh", "ElemType", elemCode=elemCode, elemLibrary=elemLibrary, **kwargs)
+        self.elemCode = elemCode
+        self.elemLibrary = elemLibrary
+        self.options = kwargs
+
+
+def EdgeArray(edges):
+    record("part", "EdgeArray", count=len(edges))
+    return GeomArray("part.EdgeArray", edges)
+
+
+class Part(object):
+    def __init__(self, path, name, geometry):
+        self.path = path
+        self.name = name
+        self.geometry = geometry
+        edges = [
+            Edge(name, i, length) for i, length in enumerate(geometry.get("edges", ()))
+        ]
+        self.cells = GeomArray(path + ".cells", [name] if "volume" in geometry else [])
+        self.faces = GeomArray(path + ".faces", [])
+        self.edges = GeomArray(path + ".edges", edges)
+        self.seed = None
+        self.element_types = None
+        self.elements = MeshArray()
+        self.nodes = MeshArray()
+
+    def getVolume(self):
+        return self.geometry.get("volume", 0.0)
+
+    def deleteMesh(self):
+        record(self.path, "deleteMesh")
+        self.elements = MeshArray()
+        self.nodes = MeshArray()
+
+    def seedPart(self, size, deviationFactor=None, minSizeFactor=None):
+        record(
+            self.path,
+            "seedPart",
+            size=size,
+            deviationFactor=deviationFactor,
+            minSizeFactor=minSizeFactor,
+        )
+        self.seed = size
+
+    def setElementType(self, regions, elemTypes):
+        record(
+            self.path,
+            "setElementType",
+            regions=len(regions),
+            elemTypes=tuple(str(elem_type.elemCode) for elem_type in elemTypes),
+        )
+        self.element_types = tuple(str(elem_type.elemCode) for elem_type in elemTypes)
+
+    def generateMesh(self):
+        # Hexahedra of the seed size filling the volume, or elements along
+        # the edges of a wire part
+        size = self.seed or 1.0
+        if "volume" in self.geometry:
+            elements = max(1, int(self.geometry["volume"] / size**3))
+            nodes = int((elements ** (1.0 / 3.0) + 1) ** 3)
+        else:
+            lengths = self.geometry.get("edges", ())
+            elements = sum(max(1, int(math.ceil(length / size))) for length in lengths)
+            nodes = elements + len(lengths)
+        record(self.path, "generateMesh", units=elements)
+        element_type = self.element_types[0] if self.element_types else "C3D8R"
+        self.elements = MeshArray(elements, SymbolicConstant(element_type))
+        self.nodes = MeshArray(nodes)
+
+
+class Instance(object):
+    def __init__(self, name, part):
+        self.name = name
+        self.partName = part.name
+        self.part = part
+
+    @property
+    def elements(self):
+        return self.part.elements
+
+    @property
+    def nodes(self):
+        return self.part.nodes
+
+    @property
+    def edges(self):
+        return [Edge(self.name, edge.index, edge.length) for edge in self.part.edges]
+
+
+class Set(object):
+    def __init__(self, name, edges=()):
+        self.name = name
+        self.edges = GeomArray(name + ".edges", edges)
+
+
+class Assembly(object):
+    def __init__(self, path, parts):
+        self.path = path
+        self.instances = Repository(path + ".instances")
+        for instance_name, part_name in description["instances"]:
+            self.instances[instance_name] = Instance(instance_name, parts[part_name])
+        reinforcement = [
+            edge
+            for instance in self.instances.values()
+            if not instance.part.cells
+            for edge in instance.edges
+        ]
+        self.sets = Repository(
+            path + ".sets",
+            {
+                "embedded": Set("embedded", reinforcement),
+                "set_pretension": Set("set_pretension"),
+                "set_pretension_trans": Set("set_pretension_trans"),
+            },
+        )
+
+    def LinearInstancePattern(
+        self, instanceList, direction1, number1, number2, spacing1, spacing2
+    ):
+        record(
+            self.path,
+            "LinearInstancePattern",
+            instanceList=tuple(instanceList),
+            direction1=tuple(direction1),
+            number1=number1,
+            number2=number2,
+            spacing1=spacing1,
+            spacing2=spacing2,
+        )
+        new_instances = []
+        for name in instanceList:
+            instance = dict.__getitem__(self.instances, name)
+            for i in range(2, number1 + 1):
+                new_name = "%s-lin-%d-1" % (name, i)
+                while new_name in self.instances:
+                    new_name += "-1"
+                new_instance = Instance(new_name, instance.part)
+                self.instances[new_name] = new_instance
+                new_instances.append(new_instance)
+        return tuple(new_instances)
+
+    def deleteFeatures(self, featureNames):
+        record(self.path, "deleteFeatures", featureNames=tuple(featureNames))
+        for name in featureNames:
+            del self.instances[name]
+
+    def Set(self, name, edges=()):
+        record(self.path, "Set", name=name, edges=len(edges))
+        self.sets[name] = Set(name, edges)
+        return self.sets[name]
+
+
+class Model(object):
+    def __init__(self, name):
+        path = "models[%s]" % name
+        self.name = name
+        self.path = path
+        self.parts = Repository(path + ".parts")
+        for part_name, geometry in description["parts"].items():
+            self.parts[part_name] = Part(
+                "%s.parts[%s]" % (path, part_name), part_name, geometry
+            )
+        self.rootAssembly = Assembly(
+            path + ".rootAssembly", dict(dict.items(self.parts))
+        )
+        self.materials = Repository(
+            path + ".materials",
+            {
+                "concrete": concrete_material(path + ".materials[concrete]"),
+                "steel_sas": steel_material(path + ".materials[steel_sas]"),
+                "steel": steel_material(path + ".materials[steel]"),
+            },
+        )
+        self.sections = options_of(path + ".sections", ("C", "sas", "S"))
+        self.profiles = options_of(path + ".profiles", ("dia1", "dia2", "dia3", "dia4"))
+        self.predefinedFields = options_of(
+            path + ".predefinedFields",
+            ("Predefined Field-sas", "Predefined Field-sas_trans"),
+        )
+        self.boundaryConditions = options_of(path + ".boundaryConditions", ("BC-load",))
+
+
+def options_of(path, names):
+    return Repository(
+        path, dict((name, Options("%s[%s]" % (path, name))) for name in names)
+    )
+
+
+def concrete_material(path):
+    cdp = path + ".concreteDamagedPlasticity"
+    return Options(
+        path,
+        elastic=Options(path + ".elastic"),
+        concreteDamagedPlasticity=Options(
+            cdp,
+            concreteCompressionHardening=Options(cdp + ".concreteCompressionHardening"),
+            concreteTensionStiffening=Options(cdp + ".concreteTensionStiffening"),
+            concreteCompressionDamage=Options(cdp + ".concreteCompressionDamage"),
+            concreteTensionDamage=Options(cdp + ".concreteTensionDamage"),
+        ),
+    )
+
+
+def steel_material(path):
+    return Options(
+        path, elastic=Options(path + ".elastic"), plastic=Options(path + ".plastic")
+    )
+
+
+class Job(object):
+    def __init__(self, name, model, **kwargs):
+        self.name = name
+        self.model = model
+        self.options = kwargs
+
+    def writeInput(self, consistencyChecking=None):
+        model = dict.__getitem__(mdb.models, self.model)
+        elements = sum(
+            len(instance.elements) for instance in model.rootAssembly.instances.values()
+        )
+        record("jobs[%s]" % self.name, "writeInput", units=elements)
+        write_input(self.name + ".inp", model)
+
+
+def write_input(file_path, model):
+    # Skeleton of an Abaqus input file: one node and element per part, the
+    # load step with the displacement boundary condition
+    bc = dict.__getitem__(model.boundaryConditions, "BC-load")
+    u2 = bc.step_values.get("Step-2-disp", {}).get("u2", -30.0)
+    lines = ["*Heading", "** Job name: %s Model name: %s" % (file_path, model.name)]
+    for part_name, part in dict.items(model.parts):
+        lines += [
+            "*Part, name=%s" % part_name,
+            "*Node",
+            "      1,           0.,           0.,           0.",
+            "*Element, type=%s" % (part.element_types or ("C3D8R",))[0],
+            "1, 1",
+            "** %d elements" % len(part.elements),
+            "*End Part",
+        ]
+    lines += [
+        "*Step, name=Step-2-disp, nlgeom=YES",
+        "*Static",
+        "0.01, 1., 1e-05, 0.01",
+        "** BOUNDARY CONDITIONS",
+        "**",
+        "** Name: BC-load Type: Displacement/Rotation",
+        "*Boundary",
+        "Set-load, 2, 2, %g" % u2,
+        "*End Step",
+    ]
+    with open(file_path, "w") as inp_file:
+        inp_file.write("\n".join(lines) + "\n")
+
+
+class Mdb(object):
+    def __init__(self):
+        self.models = Repository("models")
+        self.jobs = Repository("jobs")
+
+    def Model(self, name, objectToCopy=None):
+        record(
+            "mdb", "Model", name=name, objectToCopy=getattr(objectToCopy, "name", None)
+        )
+        if objectToCopy is None:
+            model = Model(name)
+        else:
+            model = copy.deepcopy(objectToCopy)
+            rename(model, objectToCopy.path, "models[%s]" % name)
+            model.name = name
+        self.models[name] = model
+        return model
+
+    def Job(self, name, model, **kwargs):
+        record("mdb", "Job", name=name, model=model)
+        self.jobs[name] = Job(name, model, **kwargs)
+        return self.jobs[name]
+
+    def saveAs(self, pathName):
+        record("mdb", "saveAs", pathName=pathName)
+        with open(pathName, "w") as cae_file:
+            cae_file.write("fake model database: %s\n" % ", ".join(self.models))
+
+    def close(self):
+        record("mdb", "close")
+        self.models.clear()
+        self.jobs.clear()
+
+
+def rename(value, old, new, seen=None):
+    # Paths of a copied model start with the name of the copy
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return
+    seen.add(id(value))
+    if isinstance(getattr(value, "path", None), str) and value.path.startswith(old):
+        value.path = new + value.path[len(old) :]
+    children = []
+    if isinstance(value, dict):
+        children = list(dict.values(value))
+    elif isinstance(value, list):
+        children = list(value)
+    if hasattr(value, "__dict__"):
+        children += list(vars(value).values())
+    for child in children:
+        if hasattr(child, "__dict__") or isinstance(child, (dict, list)):
+            rename(child, old, new, seen)
+
+
+mdb = Mdb()
+
+
+def openMdb(pathName):
+    record("mdb", "openMdb", pathName=pathName)
+    mdb.models.clear()
+    mdb.jobs.clear()
+    mdb.models[description["model_name"]] = Model(description["model_name"])
+    return mdb
+
+
+def executeOnCaeStartup():
+    pass
@@ -0,0 +1,3 @@
+from fake_mdb import ElemType
+
+__all__ = ["ElemType"]
@@ -0,0 +1,3 @@
+from fake_mdb import EdgeArray
+
+__all__ = ["EdgeArray"]
@@ -0,0 +1,47 @@
+import os
+import shlex
+import subprocess
+
+# Launching the external programs of a sweep: abaqus cae for the generation
+# workers (run_parallel.py), abaqus job for the solver (scheduler.py) and
+# abaqus python for the result extraction (results_store.py).
+#
+# Commands are templates with named fields,
+#   abaqus job={job} input={inp} cpus={cpus} memory="{memory} mb" interactive
+# split with shlex before the fields are filled in, so Windows paths in the
+# fields are not mangled by shlex. Output and errors of a program go to its
+# log file.
+
+
+def format_command(template, **fields):
+    return [token.format(**fields) for token in shlex.split(template)]
+
+
+def start_logged(command, log_path=None, cwd=None):
+    # Running process, or None if it could not be started (noted in the log);
+    # without a log path the output is dropped
+    log = open(log_path, "w") if log_path else subprocess.DEVNULL
+    try:
+        # abaqus is a batch file on Windows and needs the shell there
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            shell=(os.name == "nt"),
+        )
+    except OSError as error:
+        if log_path:
+            log.write("Could not start %s: %s\n" % (command[0], error))
+        process = None
+    if log_path:
+        log.close()
+    return process
+
+
+def run_logged(command, log_path=None, cwd=None):
+    # Return code, -1 if the program could not be started
+    process = start_logged(command, log_path, cwd)
+    if process is None:
+        return -1
+    return process.wait()
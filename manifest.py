@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import time
+
+# Variant manifest: SQLite index in the output root, one row per variant keyed
+# by the hash of its fully resolved params (parameters.params_hash). It records
+# the artifacts and the status of every variant, so sweeps can skip finished
+# variants and resume after an interruption.
+#
+# status: generated -> input file written
+#         submitted / running -> handed to the solver
+#         completed -> odb written, analysis finished
+#         failed / aborted -> see message
+#
+# dofs, cpus, memory: predicted model size and job resources (resources.py)
+# runtime: seconds of the solver run (scheduler.py)
+
+manifest_file = "manifest.sqlite"
+
+generated_states = ("generated", "submitted", "running", "completed")
+solved_states = ("completed",)
+
+columns = (
+    "job_name",
+    "variant",
+    "status",
+    "inp",
+    "cae",
+    "odb",
+    "message",
+    "dofs",
+    "cpus",
+    "memory",
+    "runtime",
+)
+
+
+def open_manifest(path=manifest_file):
+    # Several CAE workers may write at the same time: wait for the lock
+    connection = sqlite3.connect(path, timeout=60.0)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS variants ("
+        " hash TEXT PRIMARY KEY,"
+        " job_name TEXT,"
+        " variant TEXT,"
+        " status TEXT,"
+        " inp TEXT,"
+        " cae TEXT,"
+        " odb TEXT,"
+        " message TEXT,"
+        " updated REAL,"
+        " dofs INTEGER,"
+        " cpus INTEGER,"
+        " memory INTEGER,"
+        " runtime REAL)"
+    )
+    # Manifests of older sweeps lack the later columns
+    existing = [row[1] for row in connection.execute("PRAGMA table_info(variants)")]
+    for column in columns:
+        if column not in existing:
+            connection.execute("ALTER TABLE variants ADD COLUMN %s" % column)
+    connection.commit()
+    return connection
+
+
+def record(connection, variant_hash, **fields):
+    # Insert or update the given columns of a variant
+    unknown = [key for key in fields if key not in columns]
+    if unknown:
+        raise KeyError("Unknown manifest columns: %s" % ", ".join(unknown))
+    if "variant" in fields and not isinstance(fields["variant"], str):
+        fields["variant"] = json.dumps(fields["variant"], sort_keys=True)
+    fields["updated"] = time.time()
+
+    names = sorted(fields)
+    connection.execute(
+        "INSERT INTO variants (hash, %s) VALUES (?, %s) "
+        "ON CONFLICT(hash) DO UPDATE SET %s"
+        % (
+            ", ".join(names),
+            ", ".join("?" for name in names),
+            ", ".join("%s = excluded.%s" % (name, name) for name in names),
+        ),
+        [variant_hash] + [fields[name] for name in names],
+    )
+    connection.commit()
+
+
+def lookup(connection, variant_hash):
+    cursor = connection.execute(
+        "SELECT hash, %s, updated FROM variants WHERE hash = ?" % ", ".join(columns),
+        (variant_hash,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    entry = dict(zip(("hash",) + columns + ("updated",), row))
+    if entry["variant"]:
+        entry["variant"] = json.loads(entry["variant"])
+    return entry
+
+
+def find(connection, hash_prefix):
+    # Entry by its hash or an unambiguous prefix of it (like git revisions)
+    hashes = [
+        row[0]
+        for row in connection.execute(
+            "SELECT hash FROM variants WHERE substr(hash, 1, ?) = ?",
+            (len(hash_prefix), hash_prefix),
+        ).fetchall()
+    ]
+    if not hashes:
+        raise KeyError("No variant %s in the manifest" % hash_prefix)
+    if len(hashes) > 1:
+        raise KeyError(
+            "Variant hash %s is ambiguous: %s" % (hash_prefix, ", ".join(hashes))
+        )
+    return lookup(connection, hashes[0])
+
+
+def entries(connection, status=None):
+    query = "SELECT hash FROM variants"
+    arguments = ()
+    if status is not None:
+        query += " WHERE status = ?"
+        arguments = (status,)
+    hashes = [row[0] for row in connection.execute(query, arguments).fetchall()]
+    return [lookup(connection, variant_hash) for variant_hash in hashes]
+
+
+def is_generated(connection, variant_hash, root="."):
+    # Input file written and still on disk
+    entry = lookup(connection, variant_hash)
+    return (
+        entry is not None
+        and entry["status"] in generated_states
+        and bool(entry["inp"])
+        and os.path.exists(os.path.join(root, entry["inp"]))
+    )
+
+
+def is_solved(connection, variant_hash, root="."):
+    entry = lookup(connection, variant_hash)
+    return (
+        entry is not None
+        and entry["status"] in solved_states
+        and bool(entry["odb"])
+        and os.path.exists(os.path.join(root, entry["odb"]))
+    )
@@ -0,0 +1,292 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from csv import reader
+
+import numpy as np
+
+# Material library: the material CSV files compiled once into a binary cache
+# (.npz next to the CSV). Every material is a dict of its scalar columns
+# ("name", "E", "Nu", ...) plus one contiguous (n, 2) float array per curve:
+#   C  -> concrete compression hardening (stress, inelastic strain)
+#   T  -> concrete tension stiffening (stress, displacement)
+#   CD -> concrete compression damage (damage, inelastic strain)
+#   TD -> concrete tension damage (damage, displacement)
+#   Y  -> plastic (yield stress, plastic strain)
+# Curves have as many points as the material defines in the CSV; empty cells
+# and trailing all-zero padding rows are dropped.
+# The cache is rebuilt when size and mtime of the CSV change and its content
+# hash differs from the one the cache was built from.
+
+cache_version = 2
+
+curve_prefixes = ("C", "T", "CD", "TD", "Y")
+damage_curves = ("CD", "TD")
+
+curve_column = re.compile(r"^([A-Za-z]+)(\d+)_([xy])$")
+
+# Compiled libraries of this process: csv path -> (size, mtime, materials)
+loaded_libraries = {}
+
+
+def parse_cell(cell):
+    # Quoted cells like "\t0" or "0.345208475 " are numbers as well
+    try:
+        return float(cell)
+    except ValueError:
+        return cell.strip()
+
+
+def trim_curve(curve):
+    # Drop trailing (0, 0) rows that only pad shorter curves to the CSV width
+    used = np.flatnonzero(np.any(curve != 0.0, axis=1))
+    length = used[-1] + 1 if len(used) else 1
+    return np.ascontiguousarray(curve[:length])
+
+
+def validate_curve(name, prefix, curve):
+    errors = []
+    if curve.ndim != 2 or curve.shape[1] != 2 or len(curve) == 0:
+        return [
+            "%s %s: expected (n, 2) points, got shape %s" % (name, prefix, curve.shape)
+        ]
+    if not np.all(np.isfinite(curve)):
+        errors.append("%s %s: non-finite values" % (name, prefix))
+
+    # Second column: inelastic strain / displacement, strictly increasing
+    decreasing = np.flatnonzero(np.diff(curve[:, 1]) <= 0.0)
+    if len(decreasing):
+        errors.append(
+            "%s %s: strain not increasing at points %s"
+            % (name, prefix, (decreasing + 2).tolist())
+        )
+    # First column: stress, or damage for the damage curves
+    if prefix in damage_curves:
+        invalid = np.flatnonzero((curve[:, 0] < 0.0) | (curve[:, 0] >= 1.0))
+        label = "damage outside [0, 1)"
+    else:
+        invalid = np.flatnonzero(curve[:, 0] < 0.0)
+        label = "negative stress"
+    if len(invalid):
+        errors.append(
+            "%s %s: %s at points %s" % (name, prefix, label, (invalid + 1).tolist())
+        )
+    return errors
+
+
+def validate_material(material):
+    errors = []
+    for prefix in curve_prefixes:
+        if prefix in material:
+            errors.extend(
+                validate_curve(material["short_name"], prefix, material[prefix])
+            )
+    if errors:
+        raise ValueError("Invalid material curves:\n" + "\n".join(errors))
+
+
+def compile_csv(file_path):
+    materials = {}
+    with open(file_path, "r") as csv_file:
+        csv_reader = reader(csv_file, delimiter=";")
+        csv_index = next(csv_reader)
+
+        for row in csv_reader:
+            if not row:
+                continue
+            material = {}
+            points = {}
+            for key, cell in zip(csv_index, row):
+                match = curve_column.match(key)
+                if match is None:
+                    material[key] = parse_cell(cell)
+                    continue
+                prefix, number, axis = match.groups()
+                if cell.strip() == "":
+                    continue
+                point = points.setdefault(prefix, {}).setdefault(
+                    int(number), [0.0, 0.0]
+                )
+                point[0 if axis == "x" else 1] = float(cell)
+
+            for prefix, curve in points.items():
+                material[prefix] = trim_curve(
+                    np.array(
+                        [curve[number] for number in sorted(curve)], dtype=np.float64
+                    )
+                )
+            validate_material(material)
+            materials[material["short_name"]] = material
+    return materials
+
+
+def file_hash(file_path):
+    with open(file_path, "rb") as source:
+        return hashlib.sha1(source.read()).hexdigest()
+
+
+def cache_path_of(file_path):
+    return os.path.splitext(file_path)[0] + ".npz"
+
+
+def write_cache(cache_path, materials, source_stat, source_hash):
+    meta = {
+        "version": cache_version,
+        "source_size": source_stat.st_size,
+        "source_mtime": source_stat.st_mtime,
+        "source_hash": source_hash,
+        "scalars": {},
+    }
+    arrays = {}
+    for short_name, material in materials.items():
+        scalars = {}
+        for key, value in material.items():
+            if isinstance(value, np.ndarray):
+                arrays["%s::%s" % (short_name, key)] = value
+            else:
+                scalars[key] = value
+        meta["scalars"][short_name] = scalars
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    # Write next to the target and swap, so readers never see half a cache
+    temporary_path = cache_path + ".tmp.npz"
+    np.savez(temporary_path, **arrays)
+    os.replace(temporary_path, cache_path)
+
+
+def refresh_cache(cache_path, materials, source_stat, source_hash):
+    # A missing or read-only cache only costs the CSV parse of the next run
+    try:
+        write_cache(cache_path, materials, source_stat, source_hash)
+    except OSError as error:
+        print("Could not write material cache", cache_path, error)
+
+
+def read_cache(cache_path):
+    with np.load(cache_path, allow_pickle=False) as cache:
+        meta = json.loads(str(cache["meta"]))
+        if meta.get("version") != cache_version:
+            return meta, None
+        materials = dict(
+            (short_name, dict(scalars))
+            for short_name, scalars in meta["scalars"].items()
+        )
+        for key in cache.files:
+            if key == "meta":
+                continue
+            short_name, prefix = key.split("::")
+            materials[short_name][prefix] = np.ascontiguousarray(cache[key])
+    return meta, materials
+
+
+def load_material_library(file_path):
+    source_stat = os.stat(file_path)
+    loaded = loaded_libraries.get(file_path)
+    if loaded and loaded[:2] == (source_stat.st_size, source_stat.st_mtime):
+        return loaded[2]
+
+    cache_path = cache_path_of(file_path)
+    materials = None
+    source_hash = None
+    if os.path.exists(cache_path):
+        try:
+            meta, materials = read_cache(cache_path)
+        except (OSError, ValueError, KeyError):
+            meta, materials = {}, None
+        if materials is not None and (
+            meta["source_size"] != source_stat.st_size
+            or meta["source_mtime"] != source_stat.st_mtime
+        ):
+            # Touched but maybe unchanged: compare the content hash
+            source_hash = file_hash(file_path)
+            if meta["source_hash"] != source_hash:
+                materials = None
+            else:
+                refresh_cache(cache_path, materials, source_stat, source_hash)
+
+    if materials is None:
+        materials = compile_csv(file_path)
+        refresh_cache(
+            cache_path, materials, source_stat, source_hash or file_hash(file_path)
+        )
+
+    loaded_libraries[file_path] = (source_stat.st_size, source_stat.st_mtime, materials)
+    return materials
+
+
+def table(curve):
+    # Curve array -> nested tuples for setValues(table=...)
+    return tuple(map(tuple, curve.tolist()))
+
+
+def decimate_curve(curve, tolerance):
+    # Ramer-Douglas-Peucker on the curve value (stress or damage) over strain:
+    # keeps the fewest points so that every dropped point lies within
+    # tolerance of the linear interpolation between the kept ones
+    x = curve[:, 1]
+    y = curve[:, 0]
+    keep = np.zeros(len(curve), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(curve) - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = slice(first + 1, last)
+        slope = (y[last] - y[first]) / (x[last] - x[first])
+        deviation = np.abs(y[inner] - (y[first] + slope * (x[inner] - x[first])))
+        worst = int(np.argmax(deviation))
+        if deviation[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    reduced = np.ascontiguousarray(curve[keep])
+    error = float(np.max(np.abs(y - np.interp(x, reduced[:, 1], reduced[:, 0]))))
+    return reduced, error
+
+
+def decimate_material(material, stress_tolerance=None, damage_tolerance=None):
+    # Copy of the material with decimated concrete curves; "decimation" holds
+    # prefix -> (points before, points after, max error) for the report
+    decimated = dict(material)
+    report = {}
+    for prefix in ("C", "T", "CD", "TD"):
+        tolerance = damage_tolerance if prefix in damage_curves else stress_tolerance
+        if tolerance is None or prefix not in material:
+            continue
+        reduced, error = decimate_curve(material[prefix], tolerance)
+        decimated[prefix] = reduced
+        report[prefix] = (len(material[prefix]), len(reduced), error)
+    decimated["decimation"] = report
+    return decimated
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a material CSV and report curve decimation"
+    )
+    parser.add_argument("csv", help="material CSV file")
+    parser.add_argument("--stress", type=float, help="max stress error in MPa")
+    parser.add_argument("--damage", type=float, help="max damage error")
+    args = parser.parse_args()
+
+    for short_name, material in load_material_library(args.csv).items():
+        decimated = decimate_material(material, args.stress, args.damage)
+        for prefix in curve_prefixes:
+            if prefix not in material:
+                continue
+            before, after, error = decimated["decimation"].get(
+                prefix, (len(material[prefix]), len(material[prefix]), 0.0)
+            )
+            print(
+                "%-8s %-2s %3d -> %3d points, max error %.3g"
+                % (short_name, prefix, before, after, error)
+            )
+
+
+if __name__ == "__main__":
+    main()
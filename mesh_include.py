@@ -0,0 +1,90 @@
+import hashlib
+import os
+
+# Shared mesh includes: the node and element tables of every part are moved out
+# of a variant input file into include files. An include file is named after
+# the hash of its content, so each distinct part mesh is written only once and
+# every variant with that mesh references the same file via *Include.
+# Include paths are absolute: Abaqus resolves relative paths against the
+# directory the analysis runs in, not against the including file.
+#
+# This saves disk space, not generation time: writeInput in CAE still writes
+# the full tables, which share_mesh then reads and moves out (one more pass
+# over the file). Only decks written without CAE skip the tables for good:
+# patch_inp.py splits the base deck once and writes every variant with the
+# includes.
+
+mesh_keywords = ("node", "element")
+
+
+def keyword_of(line):
+    # "*Concrete Tension Stiffening, type=DISPLACEMENT" -> "concrete tension stiffening"
+    return line[1:].split(",")[0].strip().lower()
+
+
+def is_keyword(line):
+    return line.startswith("*") and not line.startswith("**")
+
+
+def include_line(path, newline):
+    # Parameter values with blanks (G:/ABAQUS Einarbeitung/...) need quotes
+    if " " in path or "," in path:
+        path = '"%s"' % path
+    return "*Include, input=%s%s" % (path, newline)
+
+
+def write_include(block, mesh_dir):
+    content = "".join(block)
+    name = "mesh-%s.inp" % hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    path = os.path.abspath(os.path.join(mesh_dir, name))
+    if not os.path.exists(path):
+        # Parallel workers may write the same mesh: write aside, then swap
+        temporary_path = "%s.%d.tmp" % (path, os.getpid())
+        with open(temporary_path, "w", newline="") as include_file:
+            include_file.write(content)
+        os.replace(temporary_path, path)
+    return path.replace("\\", "/")
+
+
+def split_mesh(lines, mesh_dir):
+    # Replace the *Node / *Element blocks inside *Part ... *End Part by includes
+    os.makedirs(mesh_dir, exist_ok=True)
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    result = []
+    in_part = False
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if is_keyword(line):
+            keyword = keyword_of(line)
+            if keyword == "part":
+                in_part = True
+            elif keyword == "end part":
+                in_part = False
+            elif in_part and keyword in mesh_keywords:
+                # Consecutive node / element blocks of the part
+                start = i
+                i += 1
+                while i < len(lines) and not (
+                    lines[i].startswith("**")
+                    or (
+                        is_keyword(lines[i])
+                        and keyword_of(lines[i]) not in mesh_keywords
+                    )
+                ):
+                    i += 1
+                path = write_include(lines[start:i], mesh_dir)
+                result.append(include_line(path, newline))
+                continue
+        result.append(line)
+        i += 1
+    return result
+
+
+def share_mesh(inp_path, mesh_dir):
+    # Rewrite a written input file in place to use shared mesh includes
+    with open(inp_path, "r", newline="") as inp_file:
+        lines = inp_file.readlines()
+    lines = split_mesh(lines, mesh_dir)
+    with open(inp_path, "w", newline="") as inp_file:
+        inp_file.writelines(lines)
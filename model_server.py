@@ -0,0 +1,201 @@
+import argparse
+import json
+import queue
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from parameters import load_variants
+
+# Model server protocol: a long-lived CAE process (change_parameters.py --
+# serve) opens the base model once and generates variants on request, so
+# neither interactive what-if requests nor a sweep pay CAE startup and
+# openMdb again.
+#
+# Local TCP socket, one JSON object per line in both directions:
+#   {"op": "generate", "variant": {...}}
+#       -> {"ok": true, "hash": ..., "job_name": ..., "inp": ...,
+#           "skipped": false, "seconds": 12.3}
+#   {"op": "ping"}      -> {"ok": true}
+#   {"op": "shutdown"}  -> {"ok": true}, then the server stops
+# Failures answer {"ok": false, "error": "..."}; the server keeps running,
+# also when a client goes away in the middle of a request.
+#
+# The server side only needs a generate(variant) function returning the
+# reply fields, so the protocol runs with a fake mdb as well.
+
+default_host = "127.0.0.1"
+default_port = 50007
+
+
+def parse_address(address):
+    # "host:port" or "port"
+    host, _, port = str(address).rpartition(":")
+    return host or default_host, int(port)
+
+
+def handle_request(request, generate):
+    # Reply to one request and whether the server should stop
+    op = request.get("op")
+    if op == "ping":
+        return {"ok": True}, False
+    if op == "shutdown":
+        return {"ok": True}, True
+    if op != "generate":
+        return {"ok": False, "error": "Unknown op %r" % op}, False
+    started = time.time()
+    try:
+        reply = dict(generate(request["variant"]))
+    except Exception as error:
+        return {"ok": False, "error": "%s: %s" % (type(error).__name__, error)}, False
+    reply.update(ok=True, seconds=time.time() - started)
+    return reply, False
+
+
+def handle_line(line, generate):
+    # Reply to one request line; never raises, the server must stay up
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("Request is not a JSON object")
+        return handle_request(request, generate)
+    except Exception as error:
+        return {"ok": False, "error": "%s: %s" % (type(error).__name__, error)}, False
+
+
+def serve_connection(connection, generate):
+    # Requests of one client until it disconnects; whether to stop the server
+    with connection, connection.makefile("rw", newline="\n") as stream:
+        for line in stream:
+            if not line.strip():
+                continue
+            reply, stop = handle_line(line, generate)
+            stream.write(json.dumps(reply) + "\n")
+            stream.flush()
+            if stop:
+                return True
+    return False
+
+
+def serve(generate, host=default_host, port=default_port, ready=None):
+    # One client at a time: CAE is single threaded anyway
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(8)
+    print("Model server listening on %s:%d" % listener.getsockname())
+    if ready is not None:
+        ready(listener.getsockname())
+
+    stop = False
+    try:
+        while not stop:
+            connection, client = listener.accept()
+            try:
+                stop = serve_connection(connection, generate)
+            except OSError as error:
+                # Client gone mid-request: keep the warm session for the next
+                print("Connection from %s:%d lost: %s" % (client[0], client[1], error))
+    finally:
+        listener.close()
+
+
+def connect(address):
+    host, port = parse_address(address)
+    connection = socket.create_connection((host, port))
+    return connection, connection.makefile("rw", newline="\n")
+
+
+def request(stream, message):
+    stream.write(json.dumps(message) + "\n")
+    stream.flush()
+    line = stream.readline()
+    if not line:
+        raise ConnectionError("Model server closed the connection")
+    return json.loads(line)
+
+
+def send_variants(address, variants):
+    # Generate variants one after the other on one server; yields the replies
+    connection, stream = connect(address)
+    with connection, stream:
+        for variant in variants:
+            yield request(stream, {"op": "generate", "variant": variant})
+
+
+def dispatch(variants, addresses):
+    # Spread variants over several servers: every server takes the next
+    # variant as soon as it is done with the last one
+    pending = queue.Queue()
+    for variant in variants:
+        pending.put(variant)
+    lock = threading.Lock()
+    replies = []
+
+    def work(address):
+        connection, stream = connect(address)
+        with connection, stream:
+            while True:
+                try:
+                    variant = pending.get_nowait()
+                except queue.Empty:
+                    return
+                reply = request(stream, {"op": "generate", "variant": variant})
+                with lock:
+                    replies.append(reply)
+                    print_reply(reply, address)
+
+    with ThreadPoolExecutor(max_workers=len(addresses)) as executor:
+        list(executor.map(work, addresses))
+    return replies
+
+
+def print_reply(reply, address=""):
+    if reply["ok"]:
+        print(
+            "%s %s %s (%.1f s)"
+            % (
+                address,
+                "Skipped" if reply.get("skipped") else "Written",
+                reply.get("inp") or reply.get("job_name"),
+                reply["seconds"],
+            )
+        )
+    else:
+        print("%s Failed: %s" % (address, reply["error"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Send variants to running model servers"
+    )
+    parser.add_argument("variants", nargs="?", help="variant file")
+    parser.add_argument(
+        "--server",
+        action="append",
+        help="host:port of a model server, repeat for several "
+        "(default: %s:%d)" % (default_host, default_port),
+    )
+    parser.add_argument(
+        "--shutdown", action="store_true", help="stop the servers afterwards"
+    )
+    args = parser.parse_args()
+
+    addresses = args.server or ["%s:%d" % (default_host, default_port)]
+    failed = 0
+    if args.variants:
+        replies = dispatch(load_variants(args.variants), addresses)
+        failed = sum(1 for reply in replies if not reply["ok"])
+        print("%d of %d variants generated" % (len(replies) - failed, len(replies)))
+    if args.shutdown:
+        for address in addresses:
+            connection, stream = connect(address)
+            with connection, stream:
+                request(stream, {"op": "shutdown"})
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import argparse
+import os
+import re
+import time
+from collections import deque
+
+from manifest import entries, manifest_file, open_manifest
+from parameters import solver_folder
+
+# Live monitoring of running Abaqus/Standard jobs. The .sta and .msg files of
+# a job are tailed: every check reads only what was appended since the last
+# one. From the .sta lines
+#   STEP  INC ATT SEVERE EQUIL TOTAL  TOTAL      STEP       INC OF
+#                 DISCON ITERS ITERS  TIME/      TIME/LPF    TIME/LPF
+#      2    14   2U    0     7     7  1.43       0.431      0.00125
+# the monitor keeps step, increment, step time and increment size, and counts
+# cutbacks (attempts marked U); from the .msg it counts the notes that the
+# solution appears to be diverging; from the .dat the load-displacement
+# point of every increment, if the input file prints it (early_stop.py).
+#
+# Divergence rules (any of them aborts the job, None disables a rule):
+#   min_increment, min_increment_count: increment size below min_increment
+#                                       for that many increments in a row
+#   max_cutbacks, cutback_window:       cutbacks within the last
+#                                       cutback_window attempts
+#   max_diverging:                      diverging notes in the .msg
+#   stall_seconds:                      no progress of the step time for
+#                                       that long (wall clock)
+
+divergence_rules = {
+    "min_increment": 1e-7,
+    "min_increment_count": 5,
+    "max_cutbacks": 10,
+    "cutback_window": 20,
+    "max_diverging": 100,
+    "stall_seconds": 3600.0,
+}
+
+sta_line = re.compile(
+    r"^\s*(\d+)\s+(\d+)\s+(\d+)(U?)\s+\d+\s+\d+\s+\d+\s+(\S+)\s+(\S+)\s+(\S+)"
+)
+
+# .dat: table row of the node print of early_stop.py (node, U2, RF2); the
+# node label is a number or, in an assembly, e.g. LOAD_PLATE-1.1
+node_row = re.compile(r"^\s*[\w.-]+\s+([-+]?\.?\d[\w.+-]*)\s+([-+]?\.?\d[\w.+-]*)\s*$")
+increment_summary = re.compile(r"INCREMENT\s+\d+\s+SUMMARY")
+
+diverging_note = "SOLUTION APPEARS TO BE DIVERGING"
+completed_note = "THE ANALYSIS HAS COMPLETED SUCCESSFULLY"
+not_completed_note = "THE ANALYSIS HAS NOT BEEN COMPLETED"
+
+
+def new_state(job_name, run_dir):
+    return {
+        "job_name": job_name,
+        "run_dir": run_dir,
+        "offsets": {".sta": 0, ".msg": 0, ".dat": 0},
+        "partial": {".sta": "", ".msg": "", ".dat": ""},
+        "step": None,
+        "increment": None,
+        "step_time": 0.0,
+        "total_time": 0.0,
+        "increment_size": None,
+        "cutbacks": 0,
+        "small_increments": 0,
+        "recent": deque(),
+        "diverging": 0,
+        "finished": None,
+        "last_progress": time.time(),
+        "dat_table": False,
+        "load_sign": None,
+        "displacement": None,
+        "force": None,
+        "peak_force": 0.0,
+        "peak_displacement": None,
+    }
+
+
+def tail(state, suffix):
+    # Complete lines appended to <job><suffix> since the last call
+    path = os.path.join(state["run_dir"], state["job_name"] + suffix)
+    try:
+        with open(path, "rb") as log_file:
+            if os.fstat(log_file.fileno()).st_size < state["offsets"][suffix]:
+                # Written anew, e.g. by the next attempt of the job
+                state["offsets"][suffix] = 0
+                state["partial"][suffix] = ""
+            log_file.seek(state["offsets"][suffix])
+            text = log_file.read().decode("latin-1")
+            state["offsets"][suffix] = log_file.tell()
+    except OSError:
+        return []
+    lines = (state["partial"][suffix] + text).replace("\r", "").split("\n")
+    state["partial"][suffix] = lines.pop()
+    return lines
+
+
+def number(text):
+    # "1.000e-05", also Fortran style "1.000-105"
+    try:
+        return float(text)
+    except ValueError:
+        return float(re.sub(r"(\d)([+-]\d+)$", r"\1e\2", text))
+
+
+def parse_dat(state, lines):
+    # Last U2 / RF2 of the loaded set and the peak force, in load direction
+    for line in lines:
+        if increment_summary.search(line):
+            state["dat_table"] = False
+        elif "NODE FOOT-" in line:
+            state["dat_table"] = True
+        elif state["dat_table"]:
+            match = node_row.match(line)
+            if match is None:
+                continue
+            state["dat_table"] = False
+            displacement = number(match.group(1))
+            force = number(match.group(2))
+            if displacement != 0.0 and state["load_sign"] is None:
+                state["load_sign"] = -1.0 if displacement < 0.0 else 1.0
+            sign = state["load_sign"] or 1.0
+            state["displacement"] = sign * displacement
+            state["force"] = sign * force
+            if state["force"] > state["peak_force"]:
+                state["peak_force"] = state["force"]
+                state["peak_displacement"] = state["displacement"]
+
+
+def update(state, rules=divergence_rules, now=None):
+    now = time.time() if now is None else now
+    window = rules.get("cutback_window") or 1
+    for line in tail(state, ".sta"):
+        if completed_note in line:
+            state["finished"] = "completed"
+            continue
+        if not_completed_note in line:
+            state["finished"] = "not completed"
+            continue
+        match = sta_line.match(line)
+        if match is None:
+            continue
+        step, increment, attempt, unconverged, total_time, step_time, size = (
+            match.groups()
+        )
+        state["recent"].append(1 if unconverged else 0)
+        while len(state["recent"]) > window:
+            state["recent"].popleft()
+        if unconverged:
+            state["cutbacks"] += 1
+            continue
+
+        size = number(size)
+        step_time = number(step_time)
+        if (int(step), step_time) != (state["step"], state["step_time"]):
+            state["last_progress"] = now
+        state["step"] = int(step)
+        state["increment"] = int(increment)
+        state["step_time"] = step_time
+        state["total_time"] = number(total_time)
+        state["increment_size"] = size
+        if rules.get("min_increment") is not None and size < rules["min_increment"]:
+            state["small_increments"] += 1
+        else:
+            state["small_increments"] = 0
+
+    for line in tail(state, ".msg"):
+        if diverging_note in line:
+            state["diverging"] += 1
+    parse_dat(state, tail(state, ".dat"))
+    return state
+
+
+def divergence(state, rules=divergence_rules, now=None):
+    # Reason to abort the job, or None
+    now = time.time() if now is None else now
+    if state["finished"]:
+        return None
+    if (
+        rules.get("min_increment_count") is not None
+        and state["small_increments"] >= rules["min_increment_count"]
+    ):
+        return "increment size below %g for %d increments (step %s, time %g)" % (
+            rules["min_increment"],
+            state["small_increments"],
+            state["step"],
+            state["step_time"],
+        )
+    if (
+        rules.get("max_cutbacks") is not None
+        and sum(state["recent"]) >= rules["max_cutbacks"]
+    ):
+        return "%d cutbacks within %d attempts (step %s, time %g)" % (
+            sum(state["recent"]),
+            len(state["recent"]),
+            state["step"],
+            state["step_time"],
+        )
+    if (
+        rules.get("max_diverging") is not None
+        and state["diverging"] >= rules["max_diverging"]
+    ):
+        return "%d diverging notes in the .msg file" % state["diverging"]
+    if (
+        rules.get("stall_seconds") is not None
+        and now - state["last_progress"] > rules["stall_seconds"]
+    ):
+        return "no progress for %.0f s (step %s, time %g)" % (
+            now - state["last_progress"],
+            state["step"],
+            state["step_time"],
+        )
+    return None
+
+
+def progress(state):
+    # One line summary, e.g. for the message column of the manifest
+    if state["step"] is None:
+        return "starting"
+    return "step %d inc %d time %.4g size %.3g, %d cutbacks" % (
+        state["step"],
+        state["increment"],
+        state["step_time"],
+        state["increment_size"],
+        state["cutbacks"],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show the progress of the running jobs of a sweep"
+    )
+    parser.add_argument("--manifest", default=manifest_file)
+    parser.add_argument("--poll", type=float, default=30.0, help="seconds")
+    args = parser.parse_args()
+
+    connection = open_manifest(args.manifest)
+    run_dir = os.path.join(
+        os.path.dirname(os.path.abspath(args.manifest)), solver_folder
+    )
+    states = {}
+    while True:
+        running = entries(connection, "running")
+        if not running:
+            print("No running jobs")
+            return
+        for entry in running:
+            state = states.setdefault(
+                entry["hash"], new_state(entry["job_name"], run_dir)
+            )
+            update(state)
+            reason = divergence(state)
+            print(
+                "%-60s %s%s"
+                % (
+                    entry["job_name"],
+                    progress(state),
+                    ", diverging: %s" % reason if reason else "",
+                )
+            )
+        time.sleep(args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from patch_inp import load_step, pretension_sets
+
+# Result extraction of one ODB into compact columns (see results_store.py):
+#   time, displacement, force    history output U2 / RF2 of the loaded
+#                                reference point, one value per increment
+#   frame_time                   time of every field output frame
+#   <pretension set>             mean pretension stress of the set per frame
+#                                (S22 for set_pretension, S11 for
+#                                set_pretension_trans, as in modify_pretension)
+#
+# Frames are read one at a time, only the values of the pretension sets are
+# kept, so memory does not grow with the size of the model.
+#
+# Readers: AbaqusReader needs the Python of Abaqus
+#   abaqus python odb_reader.py job.odb results.npz
+# SyntheticReader makes up a plausible response instead, for testing the
+# extraction, the results store and the post-processing without Abaqus
+#   python odb_reader.py --synthetic job.odb results.npz
+
+
+class AbaqusReader:
+    def __init__(self, odb_path):
+        from odbAccess import openOdb
+
+        self.odb = openOdb(odb_path, readOnly=True)
+
+    def load_curve(self, step_name, region_name=None):
+        # Without a name: the only history region with U2 and RF2 output
+        step = self.odb.steps[step_name]
+        if region_name:
+            region = step.historyRegions[region_name]
+        else:
+            candidates = [
+                region
+                for region in step.historyRegions.values()
+                if "U2" in region.historyOutputs.keys()
+                and "RF2" in region.historyOutputs.keys()
+            ]
+            if len(candidates) != 1:
+                raise ValueError(
+                    "Expected one history region with U2 and RF2 in %s, found %d"
+                    % (step_name, len(candidates))
+                )
+            region = candidates[0]
+        displacement = np.array(region.historyOutputs["U2"].data)
+        force = np.array(region.historyOutputs["RF2"].data)
+        return displacement[:, 0], displacement[:, 1], force[:, 1]
+
+    def frames(self, step_name, element_sets):
+        # Yields (frame time, {set name: mean stress component}) per frame
+        step = self.odb.steps[step_name]
+        regions = dict(
+            (name, self.odb.rootAssembly.elementSets[name.upper()])
+            for name in element_sets
+        )
+        for i in range(len(step.frames)):
+            frame = step.frames[i]
+            stress = frame.fieldOutputs["S"]
+            values = {}
+            for name, component in element_sets.items():
+                data = stress.getSubset(region=regions[name]).bulkDataBlocks
+                values[name] = float(
+                    np.mean(
+                        np.concatenate([block.data[:, component] for block in data])
+                    )
+                )
+            yield frame.frameValue, values
+
+    def close(self):
+        self.odb.close()
+
+
+class SyntheticReader:
+    # Response parameters from the "odb" file when it holds a JSON object
+    # (peak_load, stiffness, ductility, pretension), otherwise drawn from
+    # the hash of the file name, so every variant gets its own curve
+    def __init__(self, odb_path):
+        spec = {}
+        try:
+            with open(odb_path, "r") as odb_file:
+                spec = json.load(odb_file)
+        except (OSError, ValueError):
+            pass
+        if not isinstance(spec, dict):
+            spec = {}
+        seed = int(
+            hashlib.sha1(os.path.basename(odb_path).encode("utf-8")).hexdigest()[:8],
+            16,
+        )
+        rng = np.random.default_rng(seed)
+        self.peak_load = spec.get("peak_load", rng.uniform(80.0, 160.0))
+        self.stiffness = spec.get("stiffness", rng.uniform(20.0, 60.0))
+        self.ductility = spec.get("ductility", rng.uniform(2.0, 6.0))
+        self.pretension = spec.get("pretension", 841.0)
+        self.disp = spec.get("disp", -30.0)
+        self.increments = spec.get("increments", 120)
+
+    def load_curve(self, step_name, region_name=None):
+        # Exponential hardening to the peak, then linear softening
+        time = np.linspace(0.0, 1.0, self.increments + 1)
+        u = np.abs(self.disp) * time
+        u_yield = self.peak_load / self.stiffness
+        hardening = self.peak_load * (1.0 - np.exp(-u / u_yield))
+        u_peak = self.ductility * u_yield
+        softening = np.clip(1.0 - 0.5 * (u - u_peak) / max(u[-1] - u_peak, 1e-9), 0, 1)
+        force = np.where(u <= u_peak, hardening, hardening * softening)
+        sign = -1.0 if self.disp < 0.0 else 1.0
+        return time, sign * u, sign * force
+
+    def frames(self, step_name, element_sets):
+        for frame_time in np.linspace(0.0, 1.0, 11):
+            values = {}
+            for name in element_sets:
+                values[name] = float(self.pretension * (1.0 - 0.05 * frame_time))
+            yield float(frame_time), values
+
+    def close(self):
+        pass
+
+
+def pretension_components():
+    # Set name -> stress component, as set by modify_pretension
+    return dict((name, component) for name, (key, component) in pretension_sets.items())
+
+
+def extract(reader, step_name=load_step, region_name=None):
+    # Columns of one ODB
+    time, displacement, force = reader.load_curve(step_name, region_name)
+    columns = {
+        "time": np.asarray(time, dtype=np.float64),
+        "displacement": np.asarray(displacement, dtype=np.float64),
+        "force": np.asarray(force, dtype=np.float64),
+    }
+    element_sets = pretension_components()
+    frame_time = []
+    stress = dict((name, []) for name in element_sets)
+    for value, values in reader.frames(step_name, element_sets):
+        frame_time.append(value)
+        for name in element_sets:
+            stress[name].append(values[name])
+    columns["frame_time"] = np.asarray(frame_time, dtype=np.float64)
+    for name in element_sets:
+        columns[name] = np.asarray(stress[name], dtype=np.float32)
+    return columns
+
+
+def write_columns(output_path, columns):
+    # Written aside and swapped, so the store never holds half a file
+    temporary_path = output_path + ".tmp.npz"
+    np.savez_compressed(temporary_path, **columns)
+    os.replace(temporary_path, output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract the results of an ODB into a columnar .npz"
+    )
+    parser.add_argument("odb", help="output database")
+    parser.add_argument("output", help="results file (.npz)")
+    parser.add_argument("--step", default=load_step)
+    parser.add_argument("--region", help="history region of the reference point")
+    parser.add_argument(
+        "--synthetic", action="store_true", help="made-up results, no Abaqus needed"
+    )
+    args = parser.parse_args()
+
+    reader = (SyntheticReader if args.synthetic else AbaqusReader)(args.odb)
+    try:
+        columns = extract(reader, args.step, args.region)
+    finally:
+        reader.close()
+    write_columns(args.output, columns)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,491 @@
+import hashlib
+import json
+
+from concrete_curves import generate_concrete
+from material_library import decimate_material, load_material_library
+
+file_name = "3_ft.cae"
+model_name = "Model-s16-4"
+
+# file_name = "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/ft_wib_shear_MA.cae"
+# model_name = "Model-s16"
+
+# output folders
+output_folders = {".inp": "INP_files", ".cae": "CAE_files", ".jnl": "JNL_files"}
+# shared mesh include files (see mesh_include.py)
+mesh_folder = "MESH_files"
+# solver runs and their results (see scheduler.py)
+solver_folder = "ODB_files"
+# extracted results, one columnar file per variant hash (see results_store.py)
+results_folder = "RESULTS_files"
+# stage timing traces of the variant generation (see stage_timing.py)
+trace_folder = "TRACE_files"
+
+# default variant: the values used for a single run and the base every variant
+# record of a sweep is resolved against
+default_variant = {
+    # material selection
+    "material_c": "C30",  # C30 / C35 / C40 / C45
+    "material_s": "S235",  # S235 or S355
+    "material_sas": "SAS_950",  # only option SAS_950
+    # analytical concrete instead of material_c (None -> grade from the CSV)
+    "fck": None,  # characteristic compressive strength in MPa
+    "concrete_law": "ec2_sargin",  # see concrete_curves.py
+    # displacement value
+    "disp": -30.0,
+    # pretension value
+    "P_sas": 1.0 * 841.0,  # sigma_sas_max = 841 MPa
+    "P_sas_trans": 1.0 * 841.0,  # sigma_sas_trans_max = 841 MPa
+    # mesh size ratio
+    "alpha": 1.0,
+    # reinforcement ratio for superstructure
+    "beta": 1,
+    # reinforcement radius selection
+    "dia_rf1": 6.0,  # default 6.0  (rf_sas,rf_spz_plate)
+    "dia_rf2": 7.0,  # default 7.0  (rf_sup_trans)
+    "dia_rf3": 10.0,  # default 10.0 (rf_sub_long,...)
+    "dia_rf4": 10.0,  # default 10.0 (rf_sup_long)
+    # mesh types for volume, beam and rigid elements (abaqusConstants names)
+    "mesh_type_volume": "C3D8R",
+    "mesh_type_beam": "B31",
+    "mesh_type_rigid": "R3D3",
+    # mesh controls for volume elements
+    "mesh_tech_volume": "SWEEP",
+    "mesh_algo_volume": "MEDIAL_AXIS",
+    # optional decimation of the concrete curves (None -> full curves)
+    "decimate_stress": None,  # max stress error in MPa (C, T)
+    "decimate_damage": None,  # max damage error (CD, TD)
+}
+
+# variant parameters that determine the part meshes
+mesh_parameters = (
+    "alpha",
+    "mesh_type_volume",
+    "mesh_type_beam",
+    "mesh_type_rigid",
+    "mesh_tech_volume",
+    "mesh_algo_volume",
+)
+
+# csv paths for material parameters
+csv_concrete = (
+    "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/config/concrete_parameters.csv"
+)
+csv_steel = "G:/ABAQUS Einarbeitung/Code/Aktueller_Stand/config/steel_parameters.csv"
+
+
+def load_material_options():
+    # Compiled material library, see material_library.py
+    concrete_options = load_material_library(csv_concrete)
+    steel_options = load_material_library(csv_steel)
+    return concrete_options, steel_options
+
+
+def load_variants(file_path):
+    # Variant file: list of variant records, or {"variants": [...]}
+    with open(file_path, "r") as json_file:
+        variants = json.load(json_file)
+    if isinstance(variants, dict):
+        variants = variants["variants"]
+    return variants
+
+
+def resolve_variant(variant):
+    # Fill every parameter the variant record does not set with its default
+    unknown = [key for key in variant if key not in default_variant]
+    if unknown:
+        raise KeyError("Unknown variant parameters: %s" % ", ".join(sorted(unknown)))
+    resolved = dict(default_variant)
+    resolved.update(variant)
+    return resolved
+
+
+def build_params(variant, concrete_options, steel_options):
+    # Unpack resolved variant values
+    variant = resolve_variant(variant)
+    alpha = variant["alpha"]
+    beta = variant["beta"]
+    mesh_type_volume = variant["mesh_type_volume"]
+    mesh_type_beam = variant["mesh_type_beam"]
+    mesh_type_rigid = variant["mesh_type_rigid"]
+    mesh_tech_volume = variant["mesh_tech_volume"]
+    mesh_algo_volume = variant["mesh_algo_volume"]
+
+    rf_pattern = {
+        "rf_sup_long_n": beta * 2,
+        "rf_sup_long_d": 75.0,
+        "rf_sup_trans_n": beta * 8,
+        "rf_sup_trans_d": 2.0e03,  # 3_ft -> 2.00e03; 2_ft -> 1.5e03
+        "rf_sup_sas_n": 2,
+        "rf_sup_sas_d": 60.0,
+        "rf_back_n": 2,
+        "rf_back_d1": 85.0,
+        "rf_back_d2": 160.0,
+        "rf_back_d3": 235.0,
+        "rf_sub_long_n": 5,
+        "rf_sub_long_d": 400.0,
+        "rf_sub_trans_n": 5,
+        "rf_sub_trans_d": 320.0,
+        "rf_sub_sub_trans_n": 5,
+        "rf_sub_sub_trans_d": 400.0,
+        "rf_sub_sas_n": 4,
+        "rf_sub_sas_d": 180.0,
+    }
+
+    linear_patterns = [
+        {
+            "instanceList": (
+                "rf_sup_long-1",
+                "rf_sup_long-1-lin-2-1-1",
+                "rf_sup_long-1-lin-2-1-2",  # 3_ft
+            ),
+            "direction1": (-1.0, 0.0, 0.0),
+            "number1": rf_pattern["rf_sup_long_n"],
+            "spacing1": rf_pattern["rf_sup_long_d"] / (rf_pattern["rf_sup_long_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_sup_long-1-lin-5-1",
+                "rf_sup_long-1-lin-5-1-lin-2-1",
+                "rf_sup_long-1-lin-5-1-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (1.0, 0.0, 0.0),
+            "number1": rf_pattern["rf_sup_long_n"],
+            "spacing1": rf_pattern["rf_sup_long_d"] / (rf_pattern["rf_sup_long_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_sup_trans-1-lin-2-1-lin-4-lin-2-1-1",
+                "rf_sup_trans-1-lin-4-1-lin-2-lin-2-1",
+                "rf_sup_trans-1-lin-4-1-lin-2-lin-2-1-3",  # 3_ft
+            ),
+            "direction1": (0.0, 0.0, -1.0),
+            "number1": rf_pattern["rf_sup_trans_n"],
+            "spacing1": rf_pattern["rf_sup_trans_d"]
+            / (rf_pattern["rf_sup_trans_n"] - 1),
+            "spacing1": rf_pattern["rf_sup_trans_d"]
+            / (rf_pattern["rf_sup_trans_n"]),  # 3_ft
+        },
+        {
+            "instanceList": (
+                "rf_sas-2-lin-2-1",
+                "rf_sas-2-lin-2-1-lin-2-1",
+                "rf_sas-2-lin-2-1-lin-2-1-1",
+                "rf_sas-2-lin-2-1-lin-2-1-lin-2-1",
+                "rf_sas-2-lin-2-1-lin-2-1-lin-2-1-1",  # 3_ft
+                "rf_sas-2-lin-2-1-lin-2-1-lin-lin-2-1",  # 3_ft
+            ),
+            "direction1": (0.0, -1.0, 0.0),
+            "number1": rf_pattern["rf_sup_sas_n"],
+            "spacing1": rf_pattern["rf_sup_sas_d"],
+        },
+        {
+            "instanceList": (
+                "rf_sub_long-1",
+                "rf_sub_long-1-lin-2-1-1",
+                "rf_sub_long-1-lin-2-1-2",  # 3_ft
+            ),
+            "direction1": (-1.0, 0.0, 0.0),
+            "number1": rf_pattern["rf_sub_long_n"],
+            "spacing1": rf_pattern["rf_sub_long_d"] / (rf_pattern["rf_sub_long_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_back-1-lin-1-2-lin-2-1",
+                "rf_back-1-lin-1-2",
+                "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_back_n"],
+            "spacing1": rf_pattern["rf_back_d1"],
+        },
+        {
+            "instanceList": (
+                "rf_back-1-lin-1-2-lin-2-1",
+                "rf_back-1-lin-1-2",
+                "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_back_n"],
+            "spacing1": rf_pattern["rf_back_d2"],
+        },
+        {
+            "instanceList": (
+                "rf_back-1-lin-1-2-lin-2-1",
+                "rf_back-1-lin-1-2",
+                "rf_back-1-lin-1-2-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_back_n"],
+            "spacing1": rf_pattern["rf_back_d3"],
+        },
+        {
+            "instanceList": (
+                "rf_sub_long-2-1",
+                "rf_sub_long-2-1-lin-2-1-1",
+                "rf_sub_long-2-1-lin-2-1-2",  # 3_ft
+            ),
+            "direction1": (-1.0, 0.0, 0.0),
+            "number1": rf_pattern["rf_sub_long_n"],
+            "spacing1": rf_pattern["rf_sub_long_d"] / (rf_pattern["rf_sub_long_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_sub_trans-1",
+                "rf_sub_trans-1-lin-2-1-2",
+                "rf_sub_trans-1-lin-2-1-3",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_sub_trans_n"],
+            "spacing1": rf_pattern["rf_sub_trans_d"]
+            / (rf_pattern["rf_sub_sub_trans_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_sub_trans-1-lin-2-1-1-lin-1-2",
+                "rf_sub_trans-1-lin-2-1-1-lin-lin-2-1",
+                "rf_sub_trans-1-lin-2-1-1-lin-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_sub_sub_trans_n"],
+            "spacing1": rf_pattern["rf_sub_sub_trans_d"]
+            / (rf_pattern["rf_sub_sub_trans_n"] - 1),
+        },
+        {
+            "instanceList": (
+                "rf_sas-1-lin-2-1-1",
+                "rf_sas-1-lin-1-2-lin-2-1",
+                "rf_sas-1-lin-2-1-1-lin-2-1",
+                "rf_sas-1-lin-1-2-lin-2-1-lin-2-1",
+                "rf_sas-1-lin-2-1-1-lin-2-1-1",  # 3_ft
+                "rf_sas-1-lin-1-2-lin-2-1-lin-2-1-1",  # 3_ft
+            ),
+            "direction1": (0.0, 1.0, 0.0),
+            "number1": rf_pattern["rf_sub_sas_n"],
+            "spacing1": rf_pattern["rf_sub_sas_d"] / (rf_pattern["rf_sub_long_n"] - 1),
+        },
+    ]
+
+    mesh_part_rigid = [
+        {
+            "part_name": "Load_plate",
+            "mesh_size": 25.0 * alpha,
+            "mesh_type": mesh_type_rigid,
+        },
+    ]
+
+    mesh_part_beam = [
+        {
+            "part_name": "rf_back",
+            "mesh_size": 42.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_plate_long",
+            "mesh_size": 20.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sas",
+            "mesh_size": 12.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_spz_plate",
+            "mesh_size": 40.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sub_long",
+            "mesh_size": 20.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sub_long-2",
+            "mesh_size": 20.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sub_trans",
+            "mesh_size": 41.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sup_long",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+        {
+            "part_name": "rf_sup_trans",
+            "mesh_size": 21.0 * alpha,
+            "mesh_type": mesh_type_beam,
+        },
+    ]
+
+    mesh_part_volume = [
+        {
+            "part_name": "Beam",
+            "mesh_size": 15.0 * alpha,
+            "mesh_type": mesh_type_volume,
+            "mesh_tech": mesh_tech_volume,
+            "mesh_algo": mesh_algo_volume,
+        },
+        {
+            "part_name": "Plate_C",
+            "mesh_size": 25.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Plate_CF",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Plate_S",
+            "mesh_size": 20.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_bot",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_bot-2",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_bot-2-Copy",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_top-l",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_top-r",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "Region_top_ext",
+            "mesh_size": 30.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "plate_sas",
+            "mesh_size": 10.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "plate_sas-32",
+            "mesh_size": 10.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "region_enc",
+            "mesh_size": 33.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "sas",
+            "mesh_size": 10.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+        {
+            "part_name": "sas-trans",
+            "mesh_size": 10.0 * alpha,
+            "mesh_type": mesh_type_volume,
+        },
+    ]
+
+    value_pretension = {
+        "P_sas": variant["P_sas"],
+        "P_sas_trans": variant["P_sas_trans"],
+    }
+
+    reinforcement_radius = {
+        "dia_rf1": variant["dia_rf1"],
+        "dia_rf2": variant["dia_rf2"],
+        "dia_rf3": variant["dia_rf3"],
+        "dia_rf4": variant["dia_rf4"],
+    }
+
+    if variant["fck"] is None:
+        material_c = concrete_options[variant["material_c"]]
+    else:
+        material_c = concrete_grade(variant)
+    if variant["decimate_stress"] is not None or variant["decimate_damage"] is not None:
+        material_c = decimate_material(
+            material_c, variant["decimate_stress"], variant["decimate_damage"]
+        )
+
+    params = {
+        "material_c": material_c,
+        "material_s": steel_options[variant["material_s"]],
+        "material_sas": steel_options[variant["material_sas"]],
+        "pretension": value_pretension,
+        "reinforcement": reinforcement_radius,
+        "linear_pattern": linear_patterns,
+        "mesh_part_rigid": mesh_part_rigid,
+        "mesh_part_beam": mesh_part_beam,
+        "mesh_part_volume": mesh_part_volume,
+        "disp": variant["disp"],
+    }
+
+    return params
+
+
+def concrete_grade(variant):
+    # Analytical concrete of a variant with fck set
+    materials = generate_concrete(variant["fck"], variant["concrete_law"])
+    return materials["C%g" % variant["fck"]]
+
+
+def canonical(value):
+    # Plain JSON structure: arrays to lists, numbers to float (1 == 1.0)
+    if isinstance(value, dict):
+        return dict((str(key), canonical(item)) for key, item in value.items())
+    if hasattr(value, "tolist"):
+        return canonical(value.tolist())
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def params_hash(params):
+    # Identity of a variant: hash of everything that goes into the model
+    text = json.dumps(canonical(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def concrete_label(variant):
+    # Concrete of the variant as shown in job names and result tables; part of
+    # a file stem, so without periods, like the material names of
+    # concrete_curves.py (fck 32.5 -> C32_5)
+    variant = resolve_variant(variant)
+    if variant["fck"] is None:
+        return variant["material_c"]
+    return "C%s" % ("%g" % variant["fck"]).replace(".", "_")
+
+
+def job_name(variant, params):
+    # job name: Automatically generated, the hash suffix keeps variants apart
+    # that differ only in parameters not shown in the name (alpha, disp, ...)
+    variant = resolve_variant(variant)
+    return "%s-%s-P_sas%.0f-%.0f-%.0f-%.0f-%.0f-%.0f-%s" % (
+        concrete_label(variant),
+        variant["material_s"],
+        variant["P_sas"],
+        variant["beta"],
+        variant["dia_rf1"],
+        variant["dia_rf2"],
+        variant["dia_rf3"],
+        variant["dia_rf4"],
+        params_hash(params)[:8],
+    )
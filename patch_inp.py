@@ -0,0 +1,383 @@
+import argparse
+import os
+import re
+
+from manifest import is_generated, lookup, manifest_file, open_manifest, record
+from mesh_include import keyword_of, split_mesh
+from parameters import (
+    build_params,
+    default_variant,
+    job_name,
+    load_material_options,
+    load_variants,
+    output_folders,
+    params_hash,
+    resolve_variant,
+)
+
+# Variant parameters that only rewrite keyword data of the input deck. All other
+# parameters (alpha, beta, mesh types) change geometry or mesh and still need
+# change_parameters.py inside CAE.
+patchable_parameters = (
+    "material_c",
+    "material_s",
+    "material_sas",
+    "fck",
+    "concrete_law",
+    "P_sas",
+    "P_sas_trans",
+    "dia_rf1",
+    "dia_rf2",
+    "dia_rf3",
+    "dia_rf4",
+    "disp",
+    "decimate_stress",
+    "decimate_damage",
+)
+
+# Keywords that belong to the material of the preceding *Material line
+material_options = (
+    "elastic",
+    "plastic",
+    "concrete damaged plasticity",
+    "concrete compression hardening",
+    "concrete tension stiffening",
+    "concrete compression damage",
+    "concrete tension damage",
+    "density",
+    "damping",
+    "expansion",
+)
+
+# Predefined stress fields as set in modify_pretension: set -> (value, component)
+pretension_sets = {
+    "set_pretension": ("P_sas", 1),  # sigma22
+    "set_pretension_trans": ("P_sas_trans", 0),  # sigma11
+}
+
+# Beam profiles as set in modify_reinforcement_radius
+profile_radius = {
+    "dia1": "dia_rf1",
+    "dia2": "dia_rf2",
+    "dia3": "dia_rf3",
+    "dia4": "dia_rf4",
+}
+
+# Displacement boundary condition as set in apply_load
+load_boundary = "BC-load"
+load_step = "Step-2-disp"
+
+
+def option_of(line, option):
+    match = re.search(r",\s*%s\s*=\s*([^,\s]+)" % option, line, re.I)
+    if match:
+        return match.group(1)
+    return None
+
+
+def format_row(row):
+    return ", ".join(repr(float(value)) for value in row)
+
+
+def material_tables(role, material):
+    # Keyword data per material option, as set by modify_*_parameters
+    tables = {"elastic": [(material["E"], material["Nu"])]}
+    if role == "concrete":
+        tables["concrete damaged plasticity"] = [
+            (
+                material["Psi"],
+                material["Ecc"],
+                material["fb0/fc0"],
+                material["K"],
+                material["Visc"],
+            )
+        ]
+        for option, prefix in (
+            ("concrete compression hardening", "C"),
+            ("concrete tension stiffening", "T"),
+            ("concrete compression damage", "CD"),
+            ("concrete tension damage", "TD"),
+        ):
+            tables[option] = material[prefix].tolist()
+    else:
+        tables["plastic"] = material["Y"].tolist()
+    return tables
+
+
+def material_roles(params):
+    return {
+        "concrete": params["material_c"],
+        "steel": params["material_s"],
+        "sas": params["material_sas"],
+    }
+
+
+def index_deck(lines, base_params):
+    # Split the base deck once into static text and slots holding everything a
+    # variant can change; rendering a variant then only fills in the slots
+    roles = dict(
+        (material["name"].lower(), role)
+        for role, material in material_roles(base_params).items()
+    )
+    segments = []
+    static = []
+
+    def add_slot(slot):
+        if static:
+            segments.append("".join(static))
+            del static[:]
+        segments.append(slot)
+
+    current_material = None
+    current_step = None
+    comment = ""
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+
+        # Comments and data lines outside a keyword block
+        if line.startswith("**"):
+            if line.startswith("** Job name:"):
+                add_slot({"slot": "job_name", "line": line})
+            else:
+                comment = line
+                static.append(line)
+            continue
+        if not line.startswith("*"):
+            static.append(line)
+            continue
+
+        keyword = keyword_of(line)
+        if keyword == "step":
+            current_step = option_of(line, "name")
+        elif keyword == "end step":
+            current_step = None
+        if keyword == "material":
+            current_material = roles.get(option_of(line, "name").lower())
+        elif keyword not in material_options:
+            current_material = None
+
+        # Material names change with the grade: *Material line and material=
+        if keyword == "material" or option_of(line, "material"):
+            add_slot({"slot": "rename", "line": line})
+        else:
+            static.append(line)
+
+        start = i
+        while i < len(lines) and not lines[i].startswith("*"):
+            i += 1
+        data = lines[start:i]
+
+        if current_material and keyword in material_options:
+            add_slot(
+                {
+                    "slot": "table",
+                    "role": current_material,
+                    "option": keyword,
+                    "data": data,
+                }
+            )
+        elif keyword == "beam section" and data:
+            # "** Section: rf_sas  Profile: dia1" precedes the section
+            profile = re.search(r"Profile:\s*(\S+)", comment)
+            if profile and profile.group(1) in profile_radius:
+                add_slot({"slot": "radius", "profile": profile.group(1)})
+                static.extend(data[1:])
+            else:
+                static.extend(data)
+        elif (
+            keyword == "initial conditions"
+            and (option_of(line, "type") or "").upper() == "STRESS"
+        ):
+            for data_line in data:
+                set_name = data_line.split(",")[0].strip()
+                if set_name in pretension_sets:
+                    add_slot({"slot": "stress", "set": set_name})
+                else:
+                    static.append(data_line)
+        elif (
+            keyword == "boundary"
+            and current_step == load_step
+            and comment.startswith("** Name: %s " % load_boundary)
+        ):
+            for data_line in data:
+                add_slot({"slot": "boundary", "line": data_line})
+        else:
+            static.extend(data)
+        comment = ""
+
+    add_slot(None)
+    return segments[:-1]
+
+
+def render_variant(segments, base_params, params, name, newline="\n"):
+    # Yields the lines of the variant deck
+    names = {}
+    tables = {}
+    for role, material in material_roles(params).items():
+        names[material_roles(base_params)[role]["name"].lower()] = material["name"]
+        tables[role] = material_tables(role, material)
+
+    def rename(match):
+        return match.group(1) + names.get(match.group(2).lower(), match.group(2))
+
+    for segment in segments:
+        if isinstance(segment, str):
+            yield segment
+            continue
+
+        slot = segment["slot"]
+        if slot == "job_name":
+            yield re.sub(r"(\*\* Job name:\s*)\S+", r"\g<1>" + name, segment["line"])
+        elif slot == "rename":
+            yield re.sub(
+                r"(,\s*(?:name|material)\s*=\s*)([^,\s]+)",
+                rename,
+                segment["line"],
+                flags=re.I,
+            )
+        elif slot == "table":
+            table = tables[segment["role"]].get(segment["option"])
+            if table is None:
+                # Material options the scripts do not modify (density, ...)
+                for data_line in segment["data"]:
+                    yield data_line
+            else:
+                for row in table:
+                    yield format_row(row) + newline
+        elif slot == "radius":
+            radius = params["reinforcement"][profile_radius[segment["profile"]]]
+            yield repr(float(radius)) + newline
+        elif slot == "stress":
+            key, component = pretension_sets[segment["set"]]
+            stress = [0.0] * 6
+            stress[component] = params["pretension"][key]
+            yield "%s, %s%s" % (segment["set"], format_row(stress), newline)
+        elif slot == "boundary":
+            fields = [field.strip() for field in segment["line"].split(",")]
+            first_dof = int(fields[1])
+            last_dof = int(fields[2]) if len(fields) > 2 and fields[2] else first_dof
+            if first_dof == last_dof == 2:
+                yield "%s, 2, 2, %r%s" % (fields[0], float(params["disp"]), newline)
+            elif first_dof <= 2 <= last_dof:
+                raise ValueError(
+                    "%s covers dof %d to %d, cannot set u2 alone"
+                    % (load_boundary, first_dof, last_dof)
+                )
+            else:
+                yield segment["line"]
+
+
+def check_patchable(base_variant, variant):
+    changed = [
+        key
+        for key in variant
+        if key not in patchable_parameters and variant[key] != base_variant[key]
+    ]
+    if changed:
+        raise ValueError(
+            "Variant changes %s, which needs CAE (change_parameters.py)"
+            % ", ".join(sorted(changed))
+        )
+
+
+def patch_variants(
+    base_inp,
+    variants,
+    base_variant=default_variant,
+    output_dir=output_folders[".inp"],
+    concrete_options=None,
+    steel_options=None,
+    manifest_path=manifest_file,
+    mesh_dir=None,
+):
+    # base_inp has to be written by change_parameters.py for base_variant.
+    # With mesh_dir the variants include the part meshes from shared files
+    # instead of repeating the node and element tables.
+    if concrete_options is None or steel_options is None:
+        concrete_options, steel_options = load_material_options()
+    connection = open_manifest(manifest_path)
+    output_root = os.path.dirname(os.path.abspath(manifest_path))
+    base_variant = resolve_variant(base_variant)
+    base_params = build_params(base_variant, concrete_options, steel_options)
+    # Patched variants have the mesh of the base deck: same job resources
+    base_entry = lookup(connection, params_hash(base_params)) or {}
+    sizing = dict(
+        (key, base_entry.get(key))
+        for key in ("dofs", "cpus", "memory")
+        if base_entry.get(key) is not None
+    )
+
+    with open(base_inp, "r", newline="") as inp_file:
+        lines = inp_file.readlines()
+    newline = "\r\n" if lines and lines[0].endswith("\r\n") else "\n"
+    if mesh_dir:
+        lines = split_mesh(lines, mesh_dir)
+    segments = index_deck(lines, base_params)
+
+    os.makedirs(output_dir, exist_ok=True)
+    for variant in variants:
+        variant = resolve_variant(variant)
+        check_patchable(base_variant, variant)
+        params = build_params(variant, concrete_options, steel_options)
+        variant_hash = params_hash(params)
+        name = job_name(variant, params)
+        inp_path = os.path.join(output_dir, name + ".inp")
+        if is_generated(connection, variant_hash, output_root):
+            print("Skipping", name, "(already generated)")
+            continue
+
+        with open(inp_path, "w", newline="") as inp_file:
+            inp_file.writelines(
+                render_variant(segments, base_params, params, name, newline)
+            )
+        record(
+            connection,
+            variant_hash,
+            job_name=name,
+            variant=variant,
+            status="generated",
+            inp=os.path.relpath(os.path.abspath(inp_path), output_root),
+            **sizing
+        )
+        yield inp_path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write variant input files by patching a base input file"
+    )
+    parser.add_argument("base_inp", help="input file written by change_parameters.py")
+    parser.add_argument("variants", help="variant file written by plan_study.py")
+    parser.add_argument(
+        "--base-variant",
+        help="variant file with the single variant of base_inp (default: default_variant)",
+    )
+    parser.add_argument("--output-dir", default=output_folders[".inp"])
+    parser.add_argument("--manifest", default=manifest_file)
+    parser.add_argument(
+        "--mesh-dir", help="write part meshes once into shared include files here"
+    )
+    args = parser.parse_args()
+
+    base_variant = default_variant
+    if args.base_variant:
+        base_variant = load_variants(args.base_variant)[0]
+
+    count = 0
+    for inp_path in patch_variants(
+        args.base_inp,
+        load_variants(args.variants),
+        base_variant,
+        args.output_dir,
+        manifest_path=args.manifest,
+        mesh_dir=args.mesh_dir,
+    ):
+        print("Written", inp_path)
+        count += 1
+    print("Patched %d variants" % count)
+
+
+if __name__ == "__main__":
+    main()
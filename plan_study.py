@@ -0,0 +1,217 @@
+import argparse
+import itertools
+import json
+import os
+import random
+
+from estimate import estimator, over_budget
+from manifest import manifest_file
+from parameters import build_params, load_material_options, resolve_variant
+
+# Study file (JSON, or TOML with Python >= 3.11):
+#
+# {
+#     "base": {"alpha": 1.0},                     # fixed values for every variant
+#     "strategy": "product",                      # product / zip / lhs
+#     "axes": {
+#         "material_c": ["C30", "C35"],           # list of values
+#         "P_sas": {"min": 420.5, "max": 841.0},  # range (lhs only)
+#     },
+#     "samples": 50,                              # lhs only
+#     "seed": 1,                                  # lhs only
+# }
+#
+# product: full factorial over all axes
+# zip:     i-th value of every axis forms the i-th variant (equal lengths)
+# lhs:     Latin hypercube with "samples" variants; ranges are sampled
+#          continuously, lists pick one of their values per stratum
+#
+# Materials must be in the material library (config/*_parameters.csv);
+# check_materials rejects a study with unknown ones before anything is written.
+
+strategies = ("product", "zip", "lhs")
+
+
+def load_study(file_path):
+    if file_path.endswith(".toml"):
+        import tomllib
+
+        with open(file_path, "rb") as toml_file:
+            return tomllib.load(toml_file)
+
+    with open(file_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def expand_product(axes):
+    names = list(axes)
+    for values in itertools.product(*(axes[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def expand_zip(axes):
+    names = list(axes)
+    lengths = set(len(axes[name]) for name in names)
+    if len(lengths) > 1:
+        raise ValueError(
+            "Axes of a zip study need equal lengths, got %s"
+            % {name: len(axes[name]) for name in names}
+        )
+    for values in zip(*(axes[name] for name in names)):
+        yield dict(zip(names, values))
+
+
+def expand_lhs(axes, samples, seed=None):
+    rng = random.Random(seed)
+    columns = {}
+    for name, axis in axes.items():
+        # One stratum per sample, strata shuffled independently per axis
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        positions = [(stratum + rng.random()) / samples for stratum in strata]
+
+        if isinstance(axis, dict):
+            low = axis["min"]
+            high = axis["max"]
+            columns[name] = [low + position * (high - low) for position in positions]
+        else:
+            columns[name] = [axis[int(position * len(axis))] for position in positions]
+
+    for i in range(samples):
+        yield dict((name, columns[name][i]) for name in axes)
+
+
+def expand_study(study):
+    strategy = study.get("strategy", "product")
+    axes = study.get("axes", {})
+    base = study.get("base", {})
+
+    if strategy not in strategies:
+        raise ValueError(
+            "Unknown strategy %r, expected one of %s"
+            % (strategy, ", ".join(strategies))
+        )
+    if strategy != "lhs":
+        ranges = [name for name, axis in axes.items() if isinstance(axis, dict)]
+        if ranges:
+            raise ValueError("Range axes need the lhs strategy: %s" % ", ".join(ranges))
+
+    if strategy == "product":
+        points = expand_product(axes)
+    elif strategy == "zip":
+        points = expand_zip(axes)
+    else:
+        points = expand_lhs(axes, study["samples"], study.get("seed"))
+
+    for point in points:
+        variant = dict(base)
+        variant.update(point)
+        # Fails early on misspelled parameter names
+        yield resolve_variant(variant)
+
+
+def check_materials(variants, concrete_options, steel_options):
+    # Materials of the variants missing from the material library
+    unknown = set()
+    for variant in variants:
+        if variant["fck"] is None and variant["material_c"] not in concrete_options:
+            unknown.add(("material_c", variant["material_c"]))
+        for name in ("material_s", "material_sas"):
+            if variant[name] not in steel_options:
+                unknown.add((name, variant[name]))
+    if unknown:
+        raise ValueError(
+            "Materials not in the material library: %s (concrete: %s; steel: %s)"
+            % (
+                ", ".join("%s=%s" % item for item in sorted(unknown)),
+                ", ".join(sorted(concrete_options)),
+                ", ".join(sorted(steel_options)),
+            )
+        )
+
+
+def expand_params(study, concrete_options=None, steel_options=None):
+    # Full params dict per variant, as consumed by change_parameters.py
+    if concrete_options is None or steel_options is None:
+        concrete_options, steel_options = load_material_options()
+    variants = list(expand_study(study))
+    check_materials(variants, concrete_options, steel_options)
+    for variant in variants:
+        yield variant, build_params(variant, concrete_options, steel_options)
+
+
+def check_budget(variants, limits, reject=True, manifest_path=manifest_file):
+    # Pre-mesh cost estimate of every variant (estimate.py); variants above a
+    # limit are dropped, or only reported with reject=False
+    concrete_options, steel_options = load_material_options()
+    cost_of = estimator(manifest_path, concrete_options, steel_options)
+    accepted = []
+    rejected = []
+    for variant in variants:
+        cost = cost_of(build_params(variant, concrete_options, steel_options))
+        exceeded = over_budget(cost, **limits)
+        if exceeded:
+            print(
+                "%s alpha %g: %d dofs, %d MB, %.1f h exceeds %s"
+                % (
+                    "Rejected" if reject else "Over budget",
+                    variant["alpha"],
+                    cost["dofs"],
+                    cost["memory"],
+                    cost["hours"],
+                    ", ".join(exceeded),
+                )
+            )
+            if reject:
+                rejected.append(variant)
+                continue
+        accepted.append(variant)
+    return accepted, rejected
+
+
+def write_variants(variants, file_path):
+    with open(file_path, "w") as json_file:
+        json.dump({"variants": list(variants)}, json_file, indent=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Expand a study file into a variant file for change_parameters.py"
+    )
+    parser.add_argument("study", help="study file (.json or .toml)")
+    parser.add_argument("variants", help="output variant file (.json)")
+    parser.add_argument("--max-dofs", type=float, help="budget: degrees of freedom")
+    parser.add_argument("--max-memory", type=float, help="budget: solver memory, MB")
+    parser.add_argument("--max-hours", type=float, help="budget: solver runtime")
+    parser.add_argument(
+        "--flag-only",
+        action="store_true",
+        help="keep variants over budget, only report them",
+    )
+    parser.add_argument(
+        "--manifest", default=manifest_file, help="earlier runs for the calibration"
+    )
+    args = parser.parse_args()
+
+    variants = list(expand_study(load_study(args.study)))
+    check_materials(variants, *load_material_options())
+    limits = {
+        "max_dofs": args.max_dofs,
+        "max_memory": args.max_memory,
+        "max_hours": args.max_hours,
+    }
+    if any(limit is not None for limit in limits.values()):
+        variants, rejected = check_budget(
+            variants, limits, not args.flag_only, args.manifest
+        )
+        if rejected:
+            # Kept aside, e.g. to plan them again with a coarser mesh
+            rejected_file = os.path.splitext(args.variants)[0] + ".rejected.json"
+            write_variants(rejected, rejected_file)
+            print("Rejected %d variants -> %s" % (len(rejected), rejected_file))
+    write_variants(variants, args.variants)
+    print("Planned %d variants -> %s" % (len(variants), args.variants))
+
+
+if __name__ == "__main__":
+    main()
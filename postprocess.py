@@ -0,0 +1,188 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+from manifest import entries, manifest_file, open_manifest
+from parameters import concrete_label, default_variant
+from results_store import load_results
+
+# Response metrics of a whole sweep at once. The load-displacement curves of
+# all variants are stacked into one (variants, increments) matrix, shorter
+# curves padded with their last point (adds no energy, no new peak), and every
+# metric is computed on the whole matrix:
+#   peak_load          maximum force
+#   disp_at_peak       displacement at the maximum force
+#   initial_stiffness  least-squares slope through the origin of the points
+#                      before the peak with force <= elastic_limit * peak
+#   ductility          u_u / u_y: u_y = peak_load / initial_stiffness,
+#                      u_u = first displacement after the peak where the force
+#                      dropped below ultimate_drop * peak (else the last one)
+#   energy             work of the force up to energy_limit displacement
+# Displacement and force are positive in load direction (disp = -30.0 pulls
+# in -y, so both are flipped).
+
+metric_names = (
+    "peak_load",
+    "disp_at_peak",
+    "initial_stiffness",
+    "ductility",
+    "energy",
+)
+
+# Parameters joined to the metrics, after the concrete label of the job name
+# (material_c, or C<fck> for analytical concrete); empty cells for None
+table_parameters = (
+    "material_c",
+    "fck",
+    "concrete_law",
+    "material_s",
+    "P_sas",
+    "P_sas_trans",
+    "beta",
+    "dia_rf1",
+    "dia_rf2",
+    "dia_rf3",
+    "dia_rf4",
+    "alpha",
+    "disp",
+    "decimate_stress",
+    "decimate_damage",
+)
+
+elastic_limit = 0.4
+ultimate_drop = 0.85
+
+
+def stack_curves(curves):
+    # [(displacement, force), ...] -> edge padded (variants, increments) arrays
+    length = max(len(displacement) for displacement, force in curves)
+    U = np.empty((len(curves), length))
+    F = np.empty((len(curves), length))
+    for i, (displacement, force) in enumerate(curves):
+        n = len(displacement)
+        U[i, :n] = displacement
+        U[i, n:] = displacement[-1]
+        F[i, :n] = force
+        F[i, n:] = force[-1]
+    # Load direction: sign of the final displacement
+    sign = np.where(U[:, -1] < 0.0, -1.0, 1.0)[:, None]
+    return sign * U, sign * F
+
+
+def curve_metrics(U, F, energy_limit=abs(default_variant["disp"])):
+    rows = np.arange(len(U))
+    columns = np.arange(U.shape[1])[None, :]
+
+    peak = np.argmax(F, axis=1)
+    peak_load = F[rows, peak]
+    disp_at_peak = U[rows, peak]
+
+    # Initial stiffness: elastic points up to the peak, always the first one
+    elastic = (columns <= peak[:, None]) & (F <= elastic_limit * peak_load[:, None])
+    elastic[:, 0] = True
+    uu = np.sum(np.where(elastic, U * U, 0.0), axis=1)
+    uf = np.sum(np.where(elastic, U * F, 0.0), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        initial_stiffness = np.where(uu > 0.0, uf / uu, np.nan)
+        u_y = peak_load / initial_stiffness
+
+    # Ultimate displacement: first drop below ultimate_drop * peak after it
+    dropped = (columns > peak[:, None]) & (F < ultimate_drop * peak_load[:, None])
+    first_drop = np.where(dropped.any(axis=1), np.argmax(dropped, axis=1), -1)
+    u_u = U[rows, first_drop]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ductility = u_u / u_y
+
+    # Energy: trapezoids up to energy_limit, the crossing one cut at the limit
+    u0, u1 = U[:, :-1], U[:, 1:]
+    f0, f1 = F[:, :-1], F[:, 1:]
+    u_end = np.clip(u1, None, energy_limit)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(u1 > u0, (u_end - u0) / (u1 - u0), 0.0)
+    f_end = f0 + t * (f1 - f0)
+    inside = u0 < energy_limit
+    energy = np.sum(np.where(inside, 0.5 * (f0 + f_end) * (u_end - u0), 0.0), axis=1)
+
+    return {
+        "peak_load": peak_load,
+        "disp_at_peak": disp_at_peak,
+        "initial_stiffness": initial_stiffness,
+        "ductility": ductility,
+        "energy": energy,
+    }
+
+
+def response_table(
+    connection, output_root=".", energy_limit=abs(default_variant["disp"])
+):
+    # One row per variant in the results store: hash, job name, parameters
+    # and metrics, as columns (name -> array)
+    known = dict((entry["hash"], entry) for entry in entries(connection))
+    results = load_results(output_root, list(known), ("displacement", "force"))
+    hashes = sorted(results)
+    table = {
+        "hash": np.array(hashes),
+        "job_name": np.array(
+            [known[variant_hash]["job_name"] for variant_hash in hashes]
+        ),
+        "concrete": np.array(
+            [concrete_label(known[variant_hash]["variant"]) for variant_hash in hashes]
+        ),
+    }
+    for name in table_parameters:
+        table[name] = np.array(
+            [
+                dict(default_variant, **known[variant_hash]["variant"])[name]
+                for variant_hash in hashes
+            ]
+        )
+    if not hashes:
+        for name in metric_names:
+            table[name] = np.array([])
+        return table
+
+    U, F = stack_curves(
+        [
+            (results[variant_hash]["displacement"], results[variant_hash]["force"])
+            for variant_hash in hashes
+        ]
+    )
+    table.update(curve_metrics(U, F, energy_limit))
+    return table
+
+
+def write_table(table, file_path):
+    # Semicolon separated, like the material CSV files
+    names = list(table)
+    with open(file_path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file, delimiter=";")
+        writer.writerow(names)
+        for row in zip(*(table[name].tolist() for name in names)):
+            writer.writerow(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Response metrics of all variants in the results store"
+    )
+    parser.add_argument("output", help="table file (.csv)")
+    parser.add_argument("--manifest", default=manifest_file)
+    parser.add_argument(
+        "--energy-limit",
+        type=float,
+        default=abs(default_variant["disp"]),
+        help="displacement up to which the energy is integrated",
+    )
+    args = parser.parse_args()
+
+    connection = open_manifest(args.manifest)
+    output_root = os.path.dirname(os.path.abspath(args.manifest))
+    table = response_table(connection, output_root, args.energy_limit)
+    write_table(table, args.output)
+    print("Written %d variants -> %s" % (len(table["hash"]), args.output))
+
+
+if __name__ == "__main__":
+    main()
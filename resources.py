@@ -0,0 +1,58 @@
+import math
+import os
+
+# Job resources from the model size: a variant with alpha = 0.5 has about 8
+# times the elements of alpha = 1.0, so one setting for every job either
+# wastes cores on the small jobs or starves the big ones.
+#
+# Abaqus/Standard with the sparse direct solver, rules of thumb:
+#   cores:  about dofs_per_core degrees of freedom per core, rounded up to a
+#           power of two, one domain per core (numDomains = numCpus); at most
+#           max_cpus cores and the cores max_tokens licence tokens pay for
+#   memory: memory_base plus memory_per_dof per degree of freedom, rounded up
+#           to memory_step, in MB
+
+dofs_per_core = 50000
+memory_base = 512.0  # MB
+memory_per_dof = 0.005  # MB, about 5 kB per degree of freedom
+memory_step = 256
+
+# Degrees of freedom per node by element family (first letters of the code)
+node_dofs = {"C3D": 3, "B3": 6, "R3D": 0}
+
+
+def dofs_of(element_code):
+    for prefix, dofs in node_dofs.items():
+        if element_code.startswith(prefix):
+            return dofs
+    return 3
+
+
+def licence_tokens(cpus):
+    # Abaqus analysis tokens: int(5 * N^0.422) for N cores
+    return int(5 * cpus**0.422)
+
+
+def job_resources(dofs, elements=None, max_cpus=None, max_memory=None, max_tokens=None):
+    # dofs: degrees of freedom of the model; returns the mdb.Job settings
+    # together with the size they were derived from
+    max_cpus = max_cpus or os.cpu_count() or 1
+    cpus = 1
+    while (
+        cpus * dofs_per_core < dofs
+        and cpus * 2 <= max_cpus
+        and (max_tokens is None or licence_tokens(cpus * 2) <= max_tokens)
+    ):
+        cpus *= 2
+
+    memory = memory_base + memory_per_dof * dofs
+    memory = int(math.ceil(memory / memory_step) * memory_step)
+    if max_memory:
+        memory = min(memory, max_memory)
+    return {
+        "dofs": int(dofs),
+        "elements": None if elements is None else int(elements),
+        "cpus": cpus,
+        "domains": cpus,
+        "memory": memory,
+    }
@@ -0,0 +1,130 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from launch import format_command, run_logged
+from manifest import entries, manifest_file, open_manifest
+from parameters import results_folder
+
+# Results store: the columns extracted from every solved ODB (odb_reader.py),
+# one compressed .npz per variant in results_folder, named after the variant
+# hash of the manifest. Extraction runs one reader process per ODB, several
+# at a time, and skips variants already in the store.
+
+# Default extraction: the Abaqus reader via the Python of Abaqus. Any other
+# command can be given with the same placeholders, e.g.
+# "python {reader} --synthetic {odb} {output}" for made-up results.
+extract_command = "abaqus python {reader} {odb} {output}"
+
+reader_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "odb_reader.py")
+
+
+def results_path(variant_hash, output_root="."):
+    return os.path.join(output_root, results_folder, variant_hash + ".npz")
+
+
+def has_results(variant_hash, output_root="."):
+    return os.path.exists(results_path(variant_hash, output_root))
+
+
+def read_results(variant_hash, output_root=".", columns=None):
+    # Columns of one variant, all or the given ones
+    with np.load(results_path(variant_hash, output_root)) as results:
+        return dict(
+            (name, results[name])
+            for name in (columns or results.files)
+            if name in results.files
+        )
+
+
+def load_results(output_root=".", hashes=None, columns=None):
+    # variant hash -> columns of every variant in the store
+    if hashes is None:
+        folder = os.path.join(output_root, results_folder)
+        if not os.path.isdir(folder):
+            return {}
+        hashes = sorted(
+            file[: -len(".npz")]
+            for file in os.listdir(folder)
+            if file.endswith(".npz") and not file.endswith(".tmp.npz")
+        )
+    return dict(
+        (variant_hash, read_results(variant_hash, output_root, columns))
+        for variant_hash in hashes
+        if has_results(variant_hash, output_root)
+    )
+
+
+def build_extract_command(template, odb_path, output_path):
+    return format_command(
+        template, reader=reader_path, odb=odb_path, output=output_path
+    )
+
+
+def extract_one(odb_path, output_path, command=extract_command):
+    log_path = os.path.splitext(output_path)[0] + ".log"
+    returncode = run_logged(
+        build_extract_command(command, odb_path, output_path), log_path
+    )
+    if returncode == 0 and os.path.exists(output_path):
+        os.remove(log_path)
+    return returncode, log_path
+
+
+def extract_results(
+    connection, output_root=".", command=extract_command, workers=None, hashes=None
+):
+    # Extract every completed variant of the manifest that is not in the store
+    os.makedirs(os.path.join(output_root, results_folder), exist_ok=True)
+    jobs = []
+    for entry in entries(connection, "completed"):
+        if hashes is not None and entry["hash"] not in hashes:
+            continue
+        if has_results(entry["hash"], output_root) or not entry["odb"]:
+            continue
+        odb_path = os.path.abspath(os.path.join(output_root, entry["odb"]))
+        jobs.append((entry, odb_path, results_path(entry["hash"], output_root)))
+
+    def run(job):
+        entry, odb_path, output_path = job
+        returncode, log_path = extract_one(odb_path, output_path, command)
+        if returncode == 0:
+            print("Extracted", entry["job_name"])
+        else:
+            print(
+                "Extracting %s failed (exit status %d), see %s"
+                % (entry["job_name"], returncode, log_path)
+            )
+        return returncode
+
+    # Reading an ODB is mostly one core and disk: one reader per ODB
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        returncodes = list(executor.map(run, jobs))
+    return len(jobs), sum(1 for returncode in returncodes if returncode != 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Extract the results of all solved variants into the store"
+    )
+    parser.add_argument("--manifest", default=manifest_file)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--command",
+        default=extract_command,
+        help="reader, {reader}, {odb} and {output} are replaced per ODB",
+    )
+    args = parser.parse_args()
+
+    connection = open_manifest(args.manifest)
+    output_root = os.path.dirname(os.path.abspath(args.manifest))
+    count, failed = extract_results(connection, output_root, args.command, args.workers)
+    print("Extracted %d of %d variants" % (count - failed, count))
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from launch import format_command, run_logged
+from manifest import is_generated, manifest_file, open_manifest
+from parameters import (
+    build_params,
+    file_name,
+    load_material_options,
+    load_variants,
+    mesh_folder,
+    output_folders,
+    params_hash,
+    trace_folder,
+)
+
+# Default launcher: one CAE process per worker, running change_parameters.py in
+# batch mode on the worker's slice of variants. Any other command can be given
+# with the same placeholders, e.g. "python fake_cae.py {variants} {manifest}".
+abaqus_command = "abaqus cae noGUI={script} -- {variants} --manifest {manifest}"
+
+script_path = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "change_parameters.py"
+)
+
+
+def partition(variants, slices):
+    # Contiguous, balanced slices (consecutive variants stay together)
+    slices = max(1, min(slices, len(variants)))
+    size, rest = divmod(len(variants), slices)
+    chunks = []
+    start = 0
+    for i in range(slices):
+        stop = start + size + (1 if i < rest else 0)
+        chunks.append(variants[start:stop])
+        start = stop
+    return chunks
+
+
+def build_command(template, script, variants_file, manifest_path):
+    return format_command(
+        template, script=script, variants=variants_file, manifest=manifest_path
+    )
+
+
+def pending_variants(variants, manifest_path):
+    # Drop variants whose input the manifest already has (resumed sweeps)
+    concrete_options, steel_options = load_material_options()
+    connection = open_manifest(manifest_path)
+    output_root = os.path.dirname(os.path.abspath(manifest_path))
+    pending = []
+    for variant in variants:
+        params = build_params(variant, concrete_options, steel_options)
+        if not is_generated(connection, params_hash(params), output_root):
+            pending.append(variant)
+    connection.close()
+    return pending
+
+
+def prepare_worker(work_root, index, variants, base_cae):
+    # Every worker gets its own directory: change_parameters.py moves all
+    # output files of its working directory, and CAE locks the opened .cae
+    worker_dir = os.path.abspath(os.path.join(work_root, "worker-%03d" % index))
+    os.makedirs(worker_dir, exist_ok=True)
+    for folder in output_folders.values():
+        os.makedirs(os.path.join(worker_dir, folder), exist_ok=True)
+    shutil.copy2(base_cae, os.path.join(worker_dir, os.path.basename(base_cae)))
+
+    variants_file = os.path.join(worker_dir, "variants.json")
+    with open(variants_file, "w") as json_file:
+        json.dump({"variants": variants}, json_file, indent=1)
+    return worker_dir, variants_file
+
+
+def run_worker(worker_dir, command):
+    log_path = os.path.join(worker_dir, "worker.log")
+    return run_logged(command, log_path, worker_dir), log_path
+
+
+def collect_outputs(worker_dir, output_root):
+    # Move the worker's output files into the common output folders
+    for folder in output_folders.values():
+        source = os.path.join(worker_dir, folder)
+        target = os.path.join(output_root, folder)
+        os.makedirs(target, exist_ok=True)
+        for file in os.listdir(source):
+            os.replace(os.path.join(source, file), os.path.join(target, file))
+
+
+def run_parallel(
+    variants,
+    workers,
+    slices=None,
+    command=abaqus_command,
+    script=script_path,
+    base_cae=file_name,
+    work_root="workers",
+    output_root=".",
+    shared_mesh=False,
+    lean=False,
+    trace=False,
+    incremental=False,
+    max_cpus=None,
+    max_tokens=None,
+):
+    # Workers share the manifest of the output root
+    manifest_path = os.path.abspath(os.path.join(output_root, manifest_file))
+    variants = pending_variants(variants, manifest_path)
+    if not variants:
+        print("All variants already generated")
+        return []
+
+    # Extra script arguments appended to every worker command
+    extra_arguments = []
+    if shared_mesh:
+        mesh_dir = os.path.abspath(os.path.join(output_root, mesh_folder))
+        extra_arguments += ["--mesh-dir", mesh_dir]
+    if lean:
+        extra_arguments.append("--lean")
+    if incremental:
+        extra_arguments.append("--incremental")
+    if max_cpus:
+        extra_arguments += ["--max-cpus", str(max_cpus)]
+    if max_tokens:
+        extra_arguments += ["--max-tokens", str(max_tokens)]
+    if trace:
+        # Every worker writes its traces into the common trace folder
+        trace_dir = os.path.abspath(os.path.join(output_root, trace_folder))
+        extra_arguments += ["--trace", trace_dir]
+
+    chunks = partition(variants, slices or workers)
+    jobs = []
+    for i, chunk in enumerate(chunks):
+        worker_dir, variants_file = prepare_worker(work_root, i, chunk, base_cae)
+        worker_command = build_command(command, script, variants_file, manifest_path)
+        worker_command += extra_arguments
+        jobs.append((i, chunk, worker_dir, worker_command))
+
+    def run(job):
+        i, chunk, worker_dir, worker_command = job
+        print("Worker %d: starting %d variants" % (i, len(chunk)))
+        returncode, log_path = run_worker(worker_dir, worker_command)
+        if returncode == 0:
+            collect_outputs(worker_dir, output_root)
+        print("Worker %d: finished with exit status %d" % (i, returncode))
+        return {
+            "worker": i,
+            "variants": len(chunk),
+            "returncode": returncode,
+            "log": log_path,
+        }
+
+    # At most "workers" processes run at the same time
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, jobs))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a sweep with several CAE processes in parallel"
+    )
+    parser.add_argument("variants", help="variant file written by plan_study.py")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--slices", type=int, help="number of slices (default: one per worker)"
+    )
+    parser.add_argument(
+        "--command",
+        default=abaqus_command,
+        help="launcher, {script}, {variants} and {manifest} are replaced per worker",
+    )
+    parser.add_argument("--base-cae", default=file_name)
+    parser.add_argument("--work-root", default="workers")
+    parser.add_argument("--output-root", default=".")
+    parser.add_argument(
+        "--shared-mesh",
+        action="store_true",
+        help="store part meshes once in shared include files (saves disk)",
+    )
+    parser.add_argument(
+        "--lean",
+        action="store_true",
+        help="write input files only, no .cae per variant",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="every worker replays only the changed steps on one live model",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="write stage timing traces (summary: python stage_timing.py)",
+    )
+    parser.add_argument(
+        "--max-cpus", type=int, help="cores per job at most (scheduler --cores)"
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="licence tokens per job at most (scheduler --tokens)",
+    )
+    args = parser.parse_args()
+
+    variants = load_variants(args.variants)
+
+    results = run_parallel(
+        variants,
+        args.workers,
+        slices=args.slices,
+        command=args.command,
+        base_cae=args.base_cae,
+        work_root=args.work_root,
+        output_root=args.output_root,
+        shared_mesh=args.shared_mesh,
+        lean=args.lean,
+        trace=args.trace,
+        incremental=args.incremental,
+        max_cpus=args.max_cpus,
+        max_tokens=args.max_tokens,
+    )
+
+    failed = [result for result in results if result["returncode"] != 0]
+    print("%d of %d workers succeeded" % (len(results) - len(failed), len(results)))
+    for result in failed:
+        print(
+            "Worker %d failed (exit status %d), see %s"
+            % (result["worker"], result["returncode"], result["log"])
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
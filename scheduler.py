@@ -0,0 +1,539 @@
+import argparse
+import os
+import subprocess
+import time
+
+from early_stop import force_missing, softened
+from launch import format_command, run_logged, start_logged
+from manifest import entries, manifest_file, open_manifest, record
+from monitor import divergence, divergence_rules, new_state, progress, update
+from parameters import solver_folder
+from resources import licence_tokens
+
+# Local job scheduler: solves the generated input files of the manifest under a
+# budget of CPU cores, Abaqus licence tokens and memory. The queue is a table
+# of the manifest database, so a restarted scheduler continues where the last
+# one stopped; jobs that were running when it stopped are queued again.
+#
+# queue state: queued -> running -> done
+#                                -> queued again (retry) or failed
+#                                -> failed, aborted by a divergence rule
+#
+# Jobs start by priority (higher first), then in the order they were queued.
+# A job that does not fit into the free budget is passed over by smaller jobs
+# behind it. A job needing more cores or tokens than the whole budget runs on
+# the cores the budget has; one needing more memory stays queued, reported
+# in its message, until a scheduler with a larger budget runs it. Every job runs in solver_folder below the output root, where
+# the .odb, .sta and .msg files of the job are written.
+
+# Default solver: Abaqus/Standard in the foreground, so the exit status is the
+# one of the analysis. Any other command can be given with the same
+# placeholders, e.g. "python fake_solver.py {job} {inp}".
+solver_command = (
+    "abaqus job={job} input={inp} cpus={cpus} "
+    'memory="{memory} mb" interactive ask_delete=OFF'
+)
+
+# Stops a diverging job (see monitor.py); empty: terminate the solver process
+kill_command = "abaqus terminate job={job}"
+
+queue_states = ("queued", "running", "done", "failed")
+
+queue_columns = (
+    "job_name",
+    "inp",
+    "priority",
+    "cpus",
+    "memory",
+    "attempts",
+    "max_attempts",
+    "state",
+    "message",
+    "queued",
+    "updated",
+)
+
+
+def open_queue(path=manifest_file):
+    connection = open_manifest(path)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS queue ("
+        " hash TEXT PRIMARY KEY,"
+        " job_name TEXT,"
+        " inp TEXT,"
+        " priority INTEGER,"
+        " cpus INTEGER,"
+        " memory INTEGER,"
+        " attempts INTEGER,"
+        " max_attempts INTEGER,"
+        " state TEXT,"
+        " message TEXT,"
+        " queued REAL,"
+        " updated REAL)"
+    )
+    connection.commit()
+    return connection
+
+
+def update_job(connection, variant_hash, **fields):
+    fields["updated"] = time.time()
+    names = sorted(fields)
+    connection.execute(
+        "UPDATE queue SET %s WHERE hash = ?"
+        % ", ".join("%s = ?" % name for name in names),
+        [fields[name] for name in names] + [variant_hash],
+    )
+    connection.commit()
+
+
+def queued_jobs(connection, state=None, hashes=None):
+    # Jobs of the queue, of one state and of the given variant hashes only
+    query = "SELECT hash, %s FROM queue" % ", ".join(queue_columns)
+    arguments = ()
+    if state is not None:
+        query += " WHERE state = ?"
+        arguments = (state,)
+    query += " ORDER BY priority DESC, queued, hash"
+    return [
+        dict(zip(("hash",) + queue_columns, row))
+        for row in connection.execute(query, arguments).fetchall()
+        if hashes is None or row[0] in hashes
+    ]
+
+
+def enqueue(
+    connection,
+    output_root=".",
+    priority=0,
+    cpus=1,
+    memory=4000,
+    max_attempts=2,
+    retry_failed=False,
+    hashes=None,
+):
+    # Queue every generated input file of the manifest that is not queued yet,
+    # or only those of the given variant hashes; cpus and memory apply to
+    # inputs the manifest has no sizing for
+    now = time.time()
+    count = 0
+    for entry in entries(connection, "generated"):
+        if hashes is not None and entry["hash"] not in hashes:
+            continue
+        if not entry["inp"] or not os.path.exists(
+            os.path.join(output_root, entry["inp"])
+        ):
+            continue
+        cursor = connection.execute(
+            "INSERT OR IGNORE INTO queue (hash, %s) VALUES (?, %s)"
+            % (", ".join(queue_columns), ", ".join("?" for name in queue_columns)),
+            (
+                entry["hash"],
+                entry["job_name"],
+                entry["inp"],
+                priority,
+                entry["cpus"] or cpus,
+                entry["memory"] or memory,
+                0,
+                max_attempts,
+                "queued",
+                None,
+                now,
+                now,
+            ),
+        )
+        if cursor.rowcount:
+            record(connection, entry["hash"], status="submitted", message=None)
+            count += 1
+    if retry_failed:
+        for job in queued_jobs(connection, "failed", hashes):
+            update_job(connection, job["hash"], state="queued", attempts=0)
+            record(connection, job["hash"], status="submitted", message=None)
+            count += 1
+    connection.commit()
+    return count
+
+
+def recover(connection, hashes=None):
+    # Jobs of a scheduler that stopped while they were running start again
+    for job in queued_jobs(connection, "running", hashes):
+        print("Requeueing", job["job_name"], "(scheduler was stopped)")
+        update_job(connection, job["hash"], state="queued")
+        record(connection, job["hash"], status="submitted")
+
+
+def build_solver_command(template, job, inp_path):
+    return format_command(
+        template,
+        job=job["job_name"],
+        inp=inp_path,
+        cpus=job["cpus"],
+        memory=job["memory"],
+    )
+
+
+def start_job(job, command, output_root, run_dir):
+    inp_path = os.path.abspath(os.path.join(output_root, job["inp"]))
+    log_path = os.path.join(run_dir, job["job_name"] + ".log")
+    process = start_logged(
+        build_solver_command(command, job, inp_path), log_path, run_dir
+    )
+    return process, log_path
+
+
+def budget_cpus(job, budget):
+    # Most cores up to those of the job within the cores and tokens of the
+    # budget; 0 if not even one core fits
+    cpus = job["cpus"]
+    while cpus > 0 and (
+        cpus > budget["cores"] or licence_tokens(cpus) > budget["tokens"]
+    ):
+        cpus -= 1
+    return cpus
+
+
+def fits(job, free):
+    return (
+        job["cpus"] <= free["cores"]
+        and licence_tokens(job["cpus"]) <= free["tokens"]
+        and job["memory"] <= free["memory"]
+    )
+
+
+def finish_job(connection, job, returncode, log_path, output_root, runtime=None):
+    odb_path = os.path.join(solver_folder, job["job_name"] + ".odb")
+    if returncode == 0 and os.path.exists(os.path.join(output_root, odb_path)):
+        update_job(connection, job["hash"], state="done", message=None)
+        # The runtime calibrates the cost estimate (estimate.py)
+        record(
+            connection,
+            job["hash"],
+            status="completed",
+            odb=odb_path,
+            message=None,
+            runtime=runtime,
+        )
+        print("Completed", job["job_name"])
+        return
+
+    if returncode == 0:
+        message = "no odb written, see %s" % log_path
+    else:
+        message = "exit status %d, see %s" % (returncode, log_path)
+    if job["attempts"] < job["max_attempts"]:
+        print("Retrying", job["job_name"], "(%s)" % message)
+        update_job(connection, job["hash"], state="queued", message=message)
+        record(connection, job["hash"], status="submitted", message=message)
+    else:
+        print("Failed", job["job_name"], "(%s)" % message)
+        update_job(connection, job["hash"], state="failed", message=message)
+        record(connection, job["hash"], status="failed", message=message)
+
+
+def kill_job(run, run_dir, kill_command):
+    job = run["job"]
+    killed = False
+    if kill_command:
+        killed = (
+            run_logged(build_solver_command(kill_command, job, ""), cwd=run_dir) != -1
+        )
+    if not killed:
+        run["process"].terminate()
+    try:
+        run["process"].wait(timeout=120)
+    except subprocess.TimeoutExpired:
+        run["process"].kill()
+        run["process"].wait()
+
+
+def abort_job(connection, run, run_dir, reason, kill_command):
+    # Divergence is no reason to try again: the job is not retried
+    job = run["job"]
+    print("Aborting", job["job_name"], "(%s)" % reason)
+    kill_job(run, run_dir, kill_command)
+    update_job(connection, job["hash"], state="failed", message=reason)
+    record(connection, job["hash"], status="aborted", message=reason)
+
+
+def stop_job(connection, run, run_dir, reason, kill_command, output_root):
+    # Softening captured (early_stop.py): the job ends with the increments so
+    # far and counts as completed when its .odb is there
+    job = run["job"]
+    print("Stopping", job["job_name"], "(%s)" % reason)
+    kill_job(run, run_dir, kill_command)
+    if not os.path.exists(os.path.join(run_dir, job["job_name"] + ".odb")):
+        message = "%s, but no odb written" % reason
+        update_job(connection, job["hash"], state="failed", message=message)
+        record(connection, job["hash"], status="failed", message=message)
+        return
+    finish_job(
+        connection, job, 0, run["log"], output_root, time.time() - run["started"]
+    )
+    update_job(connection, job["hash"], message=reason)
+    record(connection, job["hash"], message=reason)
+
+
+def run_queue(
+    connection,
+    output_root=".",
+    command=solver_command,
+    cores=os.cpu_count() or 1,
+    tokens=None,
+    memory=16000,
+    poll=5.0,
+    rules=divergence_rules,
+    kill_command=kill_command,
+    stop_drop=None,
+    hashes=None,
+):
+    # Runs until the queue is empty, or only the jobs of the given variant
+    # hashes are done; cores, tokens and memory (MB) are the budgets of all
+    # jobs running at the same time. Running jobs are watched
+    # by monitor.py and aborted when they meet a divergence rule; with
+    # stop_drop they end once the load dropped that fraction below its peak.
+    # Without a token budget, the tokens of all cores in one job.
+    if tokens is None:
+        tokens = licence_tokens(cores)
+    budget = {"cores": cores, "tokens": tokens, "memory": memory}
+    run_dir = os.path.abspath(os.path.join(output_root, solver_folder))
+    os.makedirs(run_dir, exist_ok=True)
+    recover(connection, hashes)
+
+    running = {}
+    # Jobs the budget can never run: hash -> reason
+    held = {}
+    try:
+        while True:
+            # Reap finished jobs, watch the others
+            for variant_hash, run in list(running.items()):
+                job = run["job"]
+                returncode = run["process"].poll()
+                if returncode is not None:
+                    del running[variant_hash]
+                    finish_job(
+                        connection,
+                        job,
+                        returncode,
+                        run["log"],
+                        output_root,
+                        time.time() - run["started"],
+                    )
+                    continue
+                update(run["monitor"], rules)
+                reason = divergence(run["monitor"], rules)
+                if reason:
+                    del running[variant_hash]
+                    abort_job(connection, run, run_dir, reason, kill_command)
+                    continue
+                reason = softened(run["monitor"], stop_drop)
+                if reason:
+                    del running[variant_hash]
+                    stop_job(
+                        connection, run, run_dir, reason, kill_command, output_root
+                    )
+                    continue
+                warning = force_missing(run["monitor"], stop_drop)
+                if warning and not run.get("warned"):
+                    run["warned"] = True
+                    print("Warning:", warning)
+                # Progress for "scheduler.py status"
+                update_job(connection, variant_hash, message=progress(run["monitor"]))
+
+            free = dict(budget)
+            for run in running.values():
+                free["cores"] -= run["job"]["cpus"]
+                free["tokens"] -= licence_tokens(run["job"]["cpus"])
+                free["memory"] -= run["job"]["memory"]
+
+            queued = [
+                job
+                for job in queued_jobs(connection, "queued", hashes)
+                if job["hash"] not in held
+            ]
+            if not queued and not running:
+                break
+
+            for job in queued:
+                if not fits(job, budget):
+                    cpus = budget_cpus(job, budget)
+                    if cpus and job["memory"] <= budget["memory"]:
+                        print(
+                            "Resizing %s to %d cores (budget)" % (job["job_name"], cpus)
+                        )
+                        update_job(connection, job["hash"], cpus=cpus)
+                        job["cpus"] = cpus
+                    else:
+                        message = (
+                            "held: needs %d cores, %d tokens, %d MB; "
+                            "budget is %d, %d, %d MB"
+                            % (
+                                job["cpus"],
+                                licence_tokens(job["cpus"]),
+                                job["memory"],
+                                budget["cores"],
+                                budget["tokens"],
+                                budget["memory"],
+                            )
+                        )
+                        print("Holding", job["job_name"], "(%s)" % message)
+                        held[job["hash"]] = message
+                        update_job(connection, job["hash"], message=message)
+                        record(connection, job["hash"], message=message)
+                        continue
+                if not fits(job, free):
+                    continue
+
+                update_job(
+                    connection,
+                    job["hash"],
+                    state="running",
+                    attempts=job["attempts"] + 1,
+                )
+                job["attempts"] += 1
+                process, log_path = start_job(job, command, output_root, run_dir)
+                if process is None:
+                    finish_job(connection, job, -1, log_path, output_root)
+                    continue
+                record(connection, job["hash"], status="running")
+                print(
+                    "Started %s (%d cores, %d MB, attempt %d/%d)"
+                    % (
+                        job["job_name"],
+                        job["cpus"],
+                        job["memory"],
+                        job["attempts"],
+                        job["max_attempts"],
+                    )
+                )
+                running[job["hash"]] = {
+                    "job": job,
+                    "process": process,
+                    "log": log_path,
+                    "started": time.time(),
+                    "monitor": new_state(job["job_name"], run_dir),
+                }
+                free["cores"] -= job["cpus"]
+                free["tokens"] -= licence_tokens(job["cpus"])
+                free["memory"] -= job["memory"]
+
+            time.sleep(poll)
+    finally:
+        # Interrupted: stop the solvers, the jobs are queued again on restart
+        for run in running.values():
+            if run["process"].poll() is None:
+                print("Stopping", run["job"]["job_name"])
+                run["process"].terminate()
+                run["process"].wait()
+
+
+def print_status(connection):
+    jobs = queued_jobs(connection)
+    for state in queue_states:
+        print("%-8s %d" % (state, sum(1 for job in jobs if job["state"] == state)))
+    for job in jobs:
+        if job["state"] in ("running", "failed") or (
+            job["state"] == "queued" and job["message"]
+        ):
+            print(
+                "  %-8s %s %s" % (job["state"], job["job_name"], job["message"] or "")
+            )
+
+
+def rule_value(kind):
+    # Command line value of a divergence rule: 0, none or off disable the rule
+    def parse(text):
+        if text.strip().lower() in ("none", "off"):
+            return None
+        value = kind(text)
+        return None if value == 0 else value
+
+    return parse
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Queue and solve the generated input files of a sweep"
+    )
+    parser.add_argument("--manifest", default=manifest_file)
+    commands = parser.add_subparsers(dest="action", required=True)
+
+    queue_parser = commands.add_parser("enqueue", help="queue generated inputs")
+    queue_parser.add_argument("--priority", type=int, default=0)
+    queue_parser.add_argument(
+        "--cpus", type=int, default=1, help="cores per job without sizing"
+    )
+    queue_parser.add_argument(
+        "--memory", type=int, default=4000, help="MB per job without sizing"
+    )
+    queue_parser.add_argument(
+        "--attempts", type=int, default=2, help="attempts before a job fails"
+    )
+    queue_parser.add_argument(
+        "--retry-failed", action="store_true", help="queue failed jobs again"
+    )
+
+    run_parser = commands.add_parser("run", help="solve the queued jobs")
+    run_parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    run_parser.add_argument(
+        "--tokens",
+        type=int,
+        help="licence tokens (default: the tokens of --cores cores in one job)",
+    )
+    run_parser.add_argument("--memory", type=int, default=16000, help="MB in total")
+    run_parser.add_argument(
+        "--command",
+        default=solver_command,
+        help="solver, {job}, {inp}, {cpus} and {memory} are replaced per job",
+    )
+    run_parser.add_argument("--poll", type=float, default=5.0, help="seconds")
+    run_parser.add_argument(
+        "--kill-command",
+        default=kill_command,
+        help="stops a diverging job, {job} is replaced; empty: terminate",
+    )
+    run_parser.add_argument(
+        "--stop-drop",
+        type=float,
+        help="end a job once the load dropped this many percent below its peak",
+    )
+    for rule, value in divergence_rules.items():
+        run_parser.add_argument(
+            "--" + rule.replace("_", "-"),
+            type=rule_value(type(value)),
+            default=value,
+            help="divergence rule, see monitor.py (0 or none disables it)",
+        )
+
+    commands.add_parser("status", help="print the queue")
+    args = parser.parse_args()
+
+    connection = open_queue(args.manifest)
+    output_root = os.path.dirname(os.path.abspath(args.manifest))
+    if args.action == "enqueue":
+        count = enqueue(
+            connection,
+            output_root,
+            priority=args.priority,
+            cpus=args.cpus,
+            memory=args.memory,
+            max_attempts=args.attempts,
+            retry_failed=args.retry_failed,
+        )
+        print("Queued %d jobs" % count)
+    elif args.action == "run":
+        run_queue(
+            connection,
+            output_root,
+            command=args.command,
+            cores=args.cores,
+            tokens=args.tokens,
+            memory=args.memory,
+            poll=args.poll,
+            rules=dict((rule, getattr(args, rule)) for rule in divergence_rules),
+            kill_command=args.kill_command,
+            stop_drop=args.stop_drop / 100.0 if args.stop_drop else None,
+        )
+    print_status(connection)
+
+
+if __name__ == "__main__":
+    main()
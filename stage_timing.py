@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from parameters import trace_folder
+
+# Stage timing of the variant generation. change_parameters.py wraps every
+# stage (openMdb, each modify_*, the linear pattern, the mesh of every part,
+# writeInput, saveAs, moving the output files) in stage(); with tracing on,
+# each stage becomes a complete event of the Chrome trace format
+#   {"name": "mesh", "cat": "mesh", "ph": "X", "ts": 1.2e6, "dur": 3.4e5,
+#    "pid": 4711, "tid": 1, "args": {"part": "concrete", "elements": 25344}}
+# (ts and dur in microseconds), to be opened in chrome://tracing or Perfetto.
+#
+# Events inside a variant go to <trace folder>/<job name>.trace.json, the rest
+# of a CAE session (openMdb, moving files) to session-<pid>.trace.json. All
+# times count from the start of the process, so the files of one session line
+# up when loaded together. summarize() aggregates any number of trace files
+# per stage and per meshed part.
+
+trace_suffix = ".trace.json"
+
+# Tracing state of this process: folder is None while tracing is off
+tracing = {
+    "folder": None,
+    "origin": time.perf_counter(),
+    "session": [],
+    "variant": None,
+    "events": [],
+}
+
+
+def start_tracing(folder):
+    os.makedirs(folder, exist_ok=True)
+    tracing["folder"] = folder
+    tracing["session"] = []
+
+
+@contextmanager
+def stage(name, category="stage", **args):
+    # Time the block; the yielded dict takes further args, e.g. element counts
+    if tracing["folder"] is None:
+        yield args
+        return
+    events = tracing["session"] if tracing["variant"] is None else tracing["events"]
+    started = time.perf_counter()
+    try:
+        yield args
+    finally:
+        events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (started - tracing["origin"]) * 1e6,
+                "dur": (time.perf_counter() - started) * 1e6,
+                "pid": os.getpid(),
+                "tid": 1,
+                "args": args,
+            }
+        )
+
+
+@contextmanager
+def variant_trace(name):
+    # Everything timed inside the block goes to the trace file of the variant
+    if tracing["folder"] is None:
+        yield
+        return
+    tracing["variant"] = name
+    tracing["events"] = []
+    try:
+        with stage(name, "variant"):
+            yield
+    finally:
+        write_trace(
+            tracing["events"], os.path.join(tracing["folder"], name + trace_suffix)
+        )
+        tracing["variant"] = None
+        tracing["events"] = []
+
+
+def stop_tracing():
+    if tracing["folder"] is None:
+        return None
+    path = os.path.join(tracing["folder"], "session-%d%s" % (os.getpid(), trace_suffix))
+    write_trace(tracing["session"], path)
+    tracing["folder"] = None
+    return path
+
+
+def write_trace(events, file_path):
+    with open(file_path, "w") as json_file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, json_file, indent=1)
+
+
+def read_traces(folder=trace_folder):
+    events = []
+    for file in sorted(os.listdir(folder)):
+        if file.endswith(trace_suffix):
+            with open(os.path.join(folder, file)) as json_file:
+                events.extend(json.load(json_file)["traceEvents"])
+    return events
+
+
+def summarize(events):
+    # Totals per stage and per meshed part, in seconds
+    stages = {}
+    parts = {}
+    variants = 0
+    for event in events:
+        seconds = event["dur"] * 1e-6
+        if event["cat"] == "variant":
+            variants += 1
+            continue
+        entry = stages.setdefault(
+            event["name"], {"count": 0, "seconds": 0.0, "max_seconds": 0.0}
+        )
+        entry["count"] += 1
+        entry["seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+        if event["cat"] == "mesh":
+            part = parts.setdefault(
+                event["args"]["part"],
+                {"count": 0, "seconds": 0.0, "elements": 0, "cached": 0},
+            )
+            part["count"] += 1
+            part["seconds"] += seconds
+            part["elements"] += event["args"].get("elements", 0)
+            part["cached"] += 1 if event["args"].get("cached") else 0
+
+    total = sum(entry["seconds"] for entry in stages.values())
+    for entry in stages.values():
+        entry["mean_seconds"] = entry["seconds"] / entry["count"]
+        entry["share"] = entry["seconds"] / total if total else 0.0
+    return {"variants": variants, "seconds": total, "stages": stages, "parts": parts}
+
+
+def print_summary(summary):
+    print(
+        "%d variants, %.1f s in timed stages"
+        % (summary["variants"], summary["seconds"])
+    )
+    print(
+        "%-40s %6s %10s %10s %10s %6s"
+        % ("stage", "count", "total s", "mean s", "max s", "share")
+    )
+    for name, entry in sorted(
+        summary["stages"].items(), key=lambda item: -item[1]["seconds"]
+    ):
+        print(
+            "%-40s %6d %10.2f %10.3f %10.3f %5.1f%%"
+            % (
+                name,
+                entry["count"],
+                entry["seconds"],
+                entry["mean_seconds"],
+                entry["max_seconds"],
+                100.0 * entry["share"],
+            )
+        )
+    if summary["parts"]:
+        print(
+            "%-40s %6s %10s %12s %6s"
+            % ("mesh of part", "count", "total s", "elements", "cached")
+        )
+        for name, part in sorted(
+            summary["parts"].items(), key=lambda item: -item[1]["seconds"]
+        ):
+            print(
+                "%-40s %6d %10.2f %12d %6d"
+                % (
+                    name,
+                    part["count"],
+                    part["seconds"],
+                    part["elements"],
+                    part["cached"],
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Summarize the stage timing traces of a sweep"
+    )
+    parser.add_argument("--folder", default=trace_folder)
+    parser.add_argument("--output", help="write the summary as JSON here")
+    args = parser.parse_args()
+
+    summary = summarize(read_traces(args.folder))
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as json_file:
+            json.dump(summary, json_file, indent=1, sort_keys=True)
+        print("Written", args.output)
+
+
+if __name__ == "__main__":
+    main()